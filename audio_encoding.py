@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Streaming Audio Encoding
+
+Encodes float audio segments into int16 PCM, WAV, FLAC or Opus (in OGG)
+bytes as they are produced, so synthesized speech can be written straight
+into an HTTP response. The output format is picked from a `format`
+parameter or the request's Accept header.
+
+WAV streams don't know their final length up front and use the usual
+"unknown size" header. FLAC is the exception to streaming: its STREAMINFO
+totals can only be written by seeking back once the audio is complete, and
+libsndfile refuses FLAC without them, so a FLAC stream is held back and sent
+whole when it finishes.
+"""
+
+import io
+import struct
+
+import numpy as np
+
+# format -> Content-Type
+AUDIO_FORMATS = {
+    'wav': 'audio/wav',
+    'pcm': 'application/octet-stream',
+    'flac': 'audio/flac',
+    'opus': 'audio/ogg; codecs=opus'
+}
+
+# Accept header media types -> format
+ACCEPT_TYPES = {
+    'audio/wav': 'wav',
+    'audio/wave': 'wav',
+    'audio/x-wav': 'wav',
+    'audio/vnd.wave': 'wav',
+    'audio/l16': 'pcm',
+    'audio/pcm': 'pcm',
+    'application/octet-stream': 'pcm',
+    'audio/flac': 'flac',
+    'audio/x-flac': 'flac',
+    'audio/ogg': 'opus',
+    'audio/opus': 'opus'
+}
+
+
+def negotiate_format(requested: str | None, accept_header: str | None = None,
+                     default: str = 'wav') -> str | None:
+    """
+    Pick the output format from an explicit format or the Accept header
+
+    Returns:
+        The format name, or None if the explicitly requested format is unsupported
+    """
+    if requested:
+        requested = requested.lower()
+        return requested if requested in AUDIO_FORMATS else None
+
+    candidates = []
+    for position, part in enumerate((accept_header or '').split(',')):
+        media_type, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        if media_type in ACCEPT_TYPES and quality > 0:
+            candidates.append((-quality, position, ACCEPT_TYPES[media_type]))
+
+    return min(candidates)[2] if candidates else default
+
+
+def audio_to_pcm16(audio) -> np.ndarray:
+    """Convert float audio to int16 PCM"""
+    return (np.clip(np.asarray(audio, dtype=np.float32).reshape(-1), -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Build a WAV header for a stream whose total length isn't known yet"""
+    unknown_size = 0xFFFFFFFF
+    return (
+        b'RIFF' + struct.pack('<I', unknown_size) + b'WAVE' +
+        b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate,
+                              sample_rate * channels * sample_width,
+                              channels * sample_width, sample_width * 8) +
+        b'data' + struct.pack('<I', unknown_size)
+    )
+
+
+class PCMEncoder:
+    """Raw little-endian int16 PCM"""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+
+    def encode(self, audio) -> bytes:
+        """Encode one segment, returning the bytes ready to send"""
+        return audio_to_pcm16(audio).tobytes()
+
+    def finish(self) -> bytes:
+        """Flush the end of the stream"""
+        return b''
+
+
+class WAVEncoder(PCMEncoder):
+    """int16 PCM behind a streaming WAV header"""
+
+    def __init__(self, sample_rate: int):
+        super().__init__(sample_rate)
+        self._header_sent = False
+
+    def encode(self, audio) -> bytes:
+        data = super().encode(audio)
+        if not self._header_sent:
+            self._header_sent = True
+            return wav_stream_header(self.sample_rate) + data
+        return data
+
+
+class _StreamBuffer:
+    """
+    Write-only file object that hands out bytes as they are appended
+
+    libsndfile may seek back to patch headers once bytes are already sent;
+    those rewrites are dropped and only unsent bytes are kept in memory.
+    """
+
+    def __init__(self):
+        self._pending = bytearray()
+        self._sent = 0
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        size = len(data)
+        start = self._position - self._sent
+        if start < 0:
+            data = data[-start:]
+            start = 0
+        end = start + len(data)
+        if end > len(self._pending):
+            self._pending.extend(b'\0' * (end - len(self._pending)))
+        self._pending[start:end] = data
+        self._position += size
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        start = max(0, self._position - self._sent)
+        data = bytes(self._pending[start:] if size < 0 else self._pending[start:start + size])
+        self._position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self._sent + len(self._pending)
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        """Remove and return the bytes not sent yet"""
+        data = bytes(self._pending)
+        self._sent += len(self._pending)
+        self._pending.clear()
+        return data
+
+
+class SoundFileEncoder:
+    """
+    FLAC or Opus/OGG through libsndfile
+
+    Opus bytes are emitted as pages are written. FLAC is encoded into a
+    seekable buffer and emitted by finish(), once libsndfile has patched the
+    STREAMINFO totals in.
+    """
+
+    SOUNDFILE_FORMATS = {
+        'flac': ('FLAC', 'PCM_16'),
+        'opus': ('OGG', 'OPUS')
+    }
+
+    # Formats whose header needs the final length
+    BUFFERED_FORMATS = {'flac'}
+
+    def __init__(self, sample_rate: int, audio_format: str):
+        import soundfile as sf
+
+        self.sample_rate = sample_rate
+        container, subtype = self.SOUNDFILE_FORMATS[audio_format]
+        self._buffered = audio_format in self.BUFFERED_FORMATS
+        self._buffer = io.BytesIO() if self._buffered else _StreamBuffer()
+        self._file = sf.SoundFile(self._buffer, mode='w', samplerate=sample_rate, channels=1,
+                                  format=container, subtype=subtype)
+
+    def encode(self, audio) -> bytes:
+        self._file.write(np.asarray(audio, dtype=np.float32).reshape(-1))
+        return b'' if self._buffered else self._buffer.take()
+
+    def finish(self) -> bytes:
+        self._file.close()
+        return self._buffer.getvalue() if self._buffered else self._buffer.take()
+
+
+def create_encoder(audio_format: str, sample_rate: int):
+    """
+    Create a streaming encoder for a format
+
+    Raises:
+        ValueError: If the format is unsupported
+    """
+    if audio_format == 'pcm':
+        return PCMEncoder(sample_rate)
+    if audio_format == 'wav':
+        return WAVEncoder(sample_rate)
+    if audio_format in SoundFileEncoder.SOUNDFILE_FORMATS:
+        return SoundFileEncoder(sample_rate, audio_format)
+    raise ValueError(f"Unsupported audio format '{audio_format}' (use one of {', '.join(AUDIO_FORMATS)})")
+
+
+def encode_audio(audio, sample_rate: int, audio_format: str = 'wav') -> bytes:
+    """Encode a whole clip in one go"""
+    if audio_format == 'wav':
+        # Complete clip: write the real sizes instead of the streaming placeholders
+        data = audio_to_pcm16(audio).tobytes()
+        header = bytearray(wav_stream_header(sample_rate))
+        header[4:8] = struct.pack('<I', 36 + len(data))
+        header[40:44] = struct.pack('<I', len(data))
+        return bytes(header) + data
+
+    if audio_format in SoundFileEncoder.SOUNDFILE_FORMATS:
+        # Seekable buffer, so libsndfile can fill in the FLAC totals at close
+        import soundfile as sf
+
+        container, subtype = SoundFileEncoder.SOUNDFILE_FORMATS[audio_format]
+        buffer = io.BytesIO()
+        sf.write(buffer, np.asarray(audio, dtype=np.float32).reshape(-1), sample_rate,
+                 format=container, subtype=subtype)
+        return buffer.getvalue()
+
+    encoder = create_encoder(audio_format, sample_rate)
+    return encoder.encode(audio) + encoder.finish()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Generated Audio Artifact Store
+
+Holds the audio files handed out by /synthesize until clients fetch them.
+Files live in one directory, bounded by total bytes (least recently used
+files go first) and by age; a background sweeper removes expired files.
+An in-memory index maps filename -> metadata, so serving a file is a dict
+lookup instead of a filesystem probe, and only files the store wrote (or
+found in its own directory at startup) can be served.
+
+Filenames are content addressed (a hash of the encoded bytes), so a URL
+always names the same audio: it can be cached as immutable, the hash is
+its ETag, and identical renders share one file.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import mimetypes
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class AudioStore:
+    """Directory of generated audio files with size-capped LRU and TTL eviction"""
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024,
+                 max_age: float = 3600, sweep_interval: float = 60, prefix: str = 'real_speech_'):
+        """
+        Initialize the store, indexing files already in the directory
+
+        Args:
+            directory: Where audio files are written
+            max_bytes: Byte budget; least recently used files are removed beyond it
+            max_age: Seconds a file is kept after it was written (0 = no limit)
+            sweep_interval: Seconds between background sweeps
+            prefix: Filename prefix of stored files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # filename -> {'path', 'size', 'created', 'modified', 'mimetype', 'etag'}, LRU order
+        self._bytes = 0
+        self._stats = {'stored': 0, 'served': 0, 'expired': 0, 'evicted': 0}
+        self._stop = threading.Event()
+        self._sweeper = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Adopt files left by a previous run, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.startswith(self.prefix) or name.endswith('.tmp') or '.' not in name:
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, path, stat.st_size))
+
+        for created, name, path, size in sorted(entries):
+            self._entries[name] = {'path': path, 'size': size, 'created': created, 'modified': created,
+                                   'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                                   'etag': name[len(self.prefix):].split('.')[0]}
+            self._bytes += size
+
+        if entries:
+            logger.info(f"🗂️ Audio store: {len(entries)} files in {self.directory} ({self._bytes / 1e6:.1f} MB)")
+
+    def put(self, data: bytes, extension: str = 'wav', mimetype: str = 'audio/wav') -> str:
+        """
+        Write an audio file and return the filename it is served under
+
+        Identical bytes map to the same filename; storing them again only
+        refreshes the existing file's age and LRU position.
+
+        Raises:
+            OSError: If the file can't be written
+        """
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        filename = f"{self.prefix}{digest}.{extension}"
+        path = os.path.join(self.directory, filename)
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None and os.path.exists(path):
+                entry['created'] = time.time()
+                self._entries.move_to_end(filename)
+                return filename
+
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if filename in self._entries:
+                self._bytes -= self._entries[filename]['size']
+            now = time.time()
+            self._entries[filename] = {'path': path, 'size': len(data), 'created': now, 'modified': now,
+                                       'mimetype': mimetype, 'etag': digest}
+            self._entries.move_to_end(filename)
+            self._bytes += len(data)
+            self._stats['stored'] += 1
+            # Enforce the byte budget right away; age is left to the sweeper
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self._stats['evicted'] += 1
+        return filename
+
+    def get(self, filename: str) -> dict | None:
+        """Look up a stored file's metadata (path, size, created, modified, mimetype, etag), marking it recently used"""
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return None
+            if self.max_age and time.time() - entry['created'] > self.max_age:
+                self._remove(filename)
+                self._stats['expired'] += 1
+                return None
+            self._entries.move_to_end(filename)
+            self._stats['served'] += 1
+            return dict(entry)
+
+    def discard(self, filename: str):
+        """Forget a file, e.g. one removed from disk behind the store's back"""
+        with self._lock:
+            if filename in self._entries:
+                self._remove(filename)
+
+    def _remove(self, filename: str):
+        entry = self._entries.pop(filename)
+        self._bytes -= entry['size']
+        try:
+            os.unlink(entry['path'])
+        except FileNotFoundError:
+            pass
+
+    def sweep(self) -> int:
+        """Remove expired files and anything over the byte budget, returning how many went"""
+        removed = 0
+        with self._lock:
+            if self.max_age:
+                cutoff = time.time() - self.max_age
+                for filename in [name for name, entry in self._entries.items() if entry['created'] < cutoff]:
+                    self._remove(filename)
+                    self._stats['expired'] += 1
+                    removed += 1
+
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evicted'] += 1
+                removed += 1
+
+        if removed:
+            logger.info(f"🧹 Audio store sweep removed {removed} files")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Audio store sweep failed: {e}")
+
+    def start(self):
+        """Start the background sweeper"""
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name='audio-store-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def stop(self):
+        """Stop the background sweeper"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def get_stats(self) -> dict:
+        """Get usage, limits and eviction counters"""
+        with self._lock:
+            return {
+                **self._stats,
+                'directory': self.directory,
+                'files': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_age_seconds': self.max_age,
+                'sweep_interval_seconds': self.sweep_interval,
+                'oldest_age_seconds': time.time() - min(
+                    (entry['created'] for entry in self._entries.values()), default=time.time()
+                )
+            }
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Magic Unicorn Batch Synthesis
+
+Offline bulk synthesis of JSONL corpora (audiobook chapters, prompt
+libraries). Each input line is a JSON object:
+
+    {"text": "...", "voice": "af_heart", "speed": 1.0, "output": "ch01/0001.wav"}
+
+Only "text" is required; "voice" may also be a blend ("af_heart:0.7+af_sky:0.3")
+and "output" defaults to the line number, resolved against --output-dir. Lines are grouped into batches of similar length and
+spread over worker processes, each with its own ONNX Runtime session and
+intra-op thread budget. Every WAV is written atomically as soon as its batch
+finishes, so an interrupted run can be restarted and only renders the lines
+whose output is missing.
+
+Run it with the Kokoro project interpreter, e.g.:
+
+    venv/bin/python batch_synthesize.py corpus.jsonl -o out/ --workers 4 --threads 2
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from audio_encoding import encode_audio
+from token_batching import (
+    BATCH_PROBE_TEXTS, MAX_TOKENS, build_token_batch, iter_bucketed_batches, verify_batched_inference
+)
+from synthesis_worker_pool import DEFAULT_MODEL_PATH, DEFAULT_VOICES_PATH, DEFAULT_KOKORO_SRC
+
+logger = logging.getLogger("batch_synthesize")
+
+# Per-process synthesis state, set up by _init_worker
+_worker = None
+
+
+class BatchWorker:
+    """Kokoro model, session and tokenizer cache owned by one worker process"""
+
+    def __init__(self, model_path: str, voices_path: str, session_profile: str, intra_op_threads: int):
+        from kokoro_onnx import Kokoro
+        from phoneme_cache import PhonemeCache
+        from session_profiles import create_inference_session
+        from voice_store import VoiceStore
+        from voice_blending import VoiceBlender
+
+        # Share the tuned session with Kokoro when this kokoro-onnx version allows it; otherwise
+        # reuse Kokoro's own session rather than loading the model a second time
+        if hasattr(Kokoro, 'from_session'):
+            self.session = create_inference_session(model_path, session_profile,
+                                                    intra_op_num_threads=intra_op_threads)
+            self.kokoro = Kokoro.from_session(self.session, voices_path)
+        else:
+            logger.warning("kokoro-onnx has no Kokoro.from_session; session profiles and optimized models don't apply")
+            self.kokoro = Kokoro(model_path, voices_path)
+            self.session = self.kokoro.sess
+
+        self.voice_store = VoiceStore(voices_path)
+        self.voice_blender = VoiceBlender(self.voice_store)
+        self.phoneme_cache = PhonemeCache(self.kokoro.tokenizer)
+
+        reason = self._probe()
+        self.batched_inference_supported = reason is None
+        if reason is not None:
+            logger.warning(f"⚠️ Model does not batch correctly, running lines one by one: {reason}")
+
+    def _probe(self) -> str | None:
+        """Learn the model's sample rate and check its padded batches against single runs"""
+        voice_style = self.voice_store.get_voice_style(self.voice_store.get_voices()[0])
+        _, self.sample_rate = self.kokoro.create(BATCH_PROBE_TEXTS[0], voice_style, lang='en-us')
+        token_seqs = [self.phoneme_cache.tokens(text, 'en-us') for text in BATCH_PROBE_TEXTS]
+
+        def run_model(tokens, styles, speeds):
+            return self.session.run(None, {'tokens': tokens, 'style': styles, 'speed': speeds})
+
+        return verify_batched_inference(run_model, token_seqs, voice_style)
+
+    def synthesize_batch(self, items: list[dict]) -> list[dict]:
+        """Synthesize a batch of corpus items and write each one's WAV file"""
+        results = []
+        batchable = []
+        for item in items:
+            try:
+                tokens = self.phoneme_cache.tokens(item['text'], item['lang'])
+            except Exception as e:
+                results.append({'line': item['line'], 'success': False, 'error': str(e)})
+                continue
+
+            if len(tokens) > MAX_TOKENS:
+                # Too long for one pass: let Kokoro chunk it
+                results.append(self._run_single(item))
+            else:
+                batchable.append((item, tokens))
+
+        for group in iter_bucketed_batches(batchable, lambda entry: len(entry[1]), max_batch_size=len(items)):
+            results.extend(self._run_group(group))
+        return results
+
+    def _run_group(self, group: list) -> list[dict]:
+        # A bad voice fails its own line, not the batch it was grouped into
+        results = []
+        resolved = []
+        for item, tokens in group:
+            try:
+                resolved.append((item, tokens, self.voice_blender.resolve(item['voice'])))
+            except Exception as e:
+                results.append({'line': item['line'], 'success': False, 'error': f"Invalid voice: {e}"})
+
+        if len(resolved) > 1 and self.batched_inference_supported:
+            try:
+                batch = build_token_batch(
+                    [tokens for _, tokens, _ in resolved],
+                    [style for _, _, style in resolved],
+                    [item['speed'] for item, _, _ in resolved]
+                )
+                audios = batch.split_audio(self.session.run(None, batch.input_feed()))
+            except Exception as e:
+                # The model passed the batching probe, so only this batch falls back
+                logger.warning(f"⚠️ Batched inference failed, running {len(resolved)} lines one by one: {e}")
+            else:
+                return results + [self._write(item, audio, self.sample_rate)
+                                  for (item, _, _), audio in zip(resolved, audios)]
+
+        return results + [self._run_single(item, style) for item, _, style in resolved]
+
+    def _run_single(self, item: dict, voice_style: np.ndarray | None = None) -> dict:
+        try:
+            if voice_style is None:
+                voice_style = self.voice_blender.resolve(item['voice'])
+            audio, sample_rate = self.kokoro.create(
+                item['text'], voice_style, speed=item['speed'], lang=item['lang']
+            )
+        except Exception as e:
+            return {'line': item['line'], 'success': False, 'error': str(e)}
+        return self._write(item, audio, sample_rate)
+
+    def _write(self, item: dict, audio: np.ndarray, sample_rate: int) -> dict:
+        try:
+            write_wav_atomic(item['output'], audio, sample_rate)
+        except OSError as e:
+            return {'line': item['line'], 'success': False, 'error': str(e)}
+        return {
+            'line': item['line'],
+            'success': True,
+            'output': item['output'],
+            'audio_seconds': len(audio) / sample_rate
+        }
+
+
+def write_wav_atomic(path: str, audio: np.ndarray, sample_rate: int):
+    """Write 16-bit mono WAV via a temp file so partial files never appear"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(encode_audio(audio, sample_rate, 'wav'))
+    os.replace(temp_path, path)
+
+
+def _init_worker(model_path: str, voices_path: str, kokoro_src: str, session_profile: str,
+                 intra_op_threads: int):
+    global _worker
+
+    if os.path.isdir(kokoro_src):
+        from synthesis_worker import clean_sys_path
+        clean_sys_path(kokoro_src)
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s:%(name)s:%(message)s')
+    _worker = BatchWorker(model_path, voices_path, session_profile, intra_op_threads)
+
+
+def _synthesize_batch(items: list[dict]) -> list[dict]:
+    return _worker.synthesize_batch(items)
+
+
+def load_corpus(path: str, output_dir: str, default_voice: str, default_speed: float,
+                default_lang: str) -> tuple[list[dict], int]:
+    """
+    Read corpus lines, resolving defaults and output paths
+
+    Returns:
+        Tuple of (items, number of malformed lines skipped)
+    """
+    items = []
+    invalid = 0
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                if not str(record.get('text', '')).strip():
+                    logger.warning(f"Skipping line {line_number}: no text")
+                    continue
+
+                output = record.get('output') or f"{line_number:06d}.wav"
+                items.append({
+                    'line': line_number,
+                    'text': record['text'],
+                    'voice': record.get('voice', default_voice),
+                    'speed': float(record.get('speed', default_speed)),
+                    'lang': record.get('lang', default_lang),
+                    'output': os.path.join(output_dir, output)
+                })
+            except (ValueError, TypeError) as e:
+                # json.JSONDecodeError is a ValueError
+                invalid += 1
+                logger.error(f"❌ Skipping line {line_number}: malformed record ({e})")
+    return items, invalid
+
+
+def run(args) -> int:
+    items, invalid = load_corpus(args.input, args.output_dir, args.voice, args.speed, args.lang)
+    pending = items if args.overwrite else [item for item in items if not os.path.exists(item['output'])]
+    skipped = len(items) - len(pending)
+
+    logger.info(f"📚 {len(items)} lines, {skipped} already rendered, {len(pending)} to synthesize"
+                + (f", {invalid} malformed" if invalid else ""))
+    if not pending:
+        return 1 if invalid else 0
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    logger.info(f"🔥 Starting {args.workers} worker(s) with {threads} intra-op thread(s) each "
+                f"('{args.session_profile}' session profile)")
+
+    # Text length is a good proxy for token count when grouping lines into batches
+    batches = list(iter_bucketed_batches(pending, lambda item: len(item['text']), args.batch_size))
+
+    start_time = time.time()
+    audio_seconds = 0.0
+    done = 0
+    failed = 0
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(args.model, args.voices, args.kokoro_src, args.session_profile, threads)
+    ) as executor:
+        futures = [executor.submit(_synthesize_batch, batch) for batch in batches]
+        for future in as_completed(futures):
+            for result in future.result():
+                done += 1
+                if result['success']:
+                    audio_seconds += result['audio_seconds']
+                else:
+                    failed += 1
+                    logger.error(f"❌ Line {result['line']} failed: {result['error']}")
+
+            elapsed = time.time() - start_time
+            logger.info(
+                f"[{done}/{len(pending)}] {audio_seconds:.1f}s audio in {elapsed:.1f}s "
+                f"({audio_seconds / elapsed:.2f} audio-s/wall-s)"
+            )
+
+    elapsed = time.time() - start_time
+    logger.info(f"✅ Synthesized {done - failed}/{len(pending)} lines ({failed} failed, {invalid} malformed)")
+    logger.info(f"   Audio: {audio_seconds:.1f}s, wall time: {elapsed:.1f}s")
+    logger.info(f"   Throughput: {audio_seconds / elapsed:.2f} audio-seconds per wall-second")
+    return 1 if failed or invalid else 0
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize a JSONL corpus to WAV files")
+    parser.add_argument('input', help="JSONL file with one {text, voice, speed, output} object per line")
+    parser.add_argument('-o', '--output-dir', default='.', help="Directory outputs are written to")
+    parser.add_argument('--workers', type=positive_int, default=2, help="Number of worker processes")
+    parser.add_argument('--threads', type=int, default=0,
+                        help="ONNX Runtime intra-op threads per worker (default: CPU count / workers)")
+    parser.add_argument('--session-profile', default='throughput',
+                        help="ONNX Runtime tuning profile (see session_profiles.py)")
+    parser.add_argument('--batch-size', type=positive_int, default=8, help="Lines per inference batch")
+    parser.add_argument('--voice', default='af_heart', help="Voice for lines that don't set one")
+    parser.add_argument('--speed', type=float, default=1.0, help="Speed for lines that don't set one")
+    parser.add_argument('--lang', default='en-us', help="Language for lines that don't set one")
+    parser.add_argument('--overwrite', action='store_true', help="Re-render lines whose output already exists")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Kokoro ONNX model")
+    parser.add_argument('--voices', default=DEFAULT_VOICES_PATH, help="Kokoro voices file")
+    parser.add_argument('--kokoro-src', default=DEFAULT_KOKORO_SRC, help="kokoro-onnx source directory")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(run(parse_args()))
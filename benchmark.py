@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Magic Unicorn TTS Benchmark
+
+Reproducible latency/RTF benchmark for KokoroMLIRNPUIntegration.create_audio
+and the /synthesize HTTP path. Runs a fixed corpus across text lengths and
+voices with warmup, and reports p50/p95/p99 latency, RTF, time-to-first-audio,
+peak RSS and throughput at N concurrent clients. Results are written as JSON
+so runs can be diffed between commits (--compare).
+
+--stub swaps the model for a synthetic one with a fixed RTF, so the harness
+itself can run on CPU-only machines without the Kokoro model or an NPU.
+
+    python benchmark.py --target all --stub -o results.json
+    python benchmark.py --target http --url http://localhost:5000 --concurrency 1,4,8
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import subprocess
+import threading
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from text_segmentation import split_text_segments
+
+logger = logging.getLogger("benchmark")
+
+# Fixed corpus so numbers stay comparable between commits
+BENCHMARK_CORPUS = {
+    # Same length as the 52-character test sentence behind the turbo mode figures
+    'short': "Hello! This is a quick test of Magic Unicorn NPU TTS",
+    'medium': (
+        "The quick brown fox jumps over the lazy dog while the unicorn watches from "
+        "the meadow. Neural processing units make real-time speech synthesis practical "
+        "on a laptop, even for long passages of text."
+    ),
+    'long': (
+        "Once upon a time, in a valley hidden between silver mountains, there lived a "
+        "unicorn who could sing in any voice she heard. Travelers came from distant "
+        "kingdoms to listen, and each of them left with a song of their own. One winter "
+        "the river froze and the roads were buried in snow, yet the music never stopped. "
+        "It echoed through the pines, across the frozen lakes, and into every village "
+        "that needed a little warmth before the spring returned."
+    )
+}
+BENCHMARK_VOICES = ['af_heart', 'af_sarah', 'am_michael']
+
+# Kokoro speaks roughly 15 characters per second at speed 1.0
+STUB_SECONDS_PER_CHAR = 1 / 15
+SAMPLE_RATE = 24000
+
+
+class StubSynthesizer:
+    """Synthetic stand-in for the Kokoro model with a fixed real-time factor"""
+
+    def __init__(self, rtf: float = 0.02):
+        self.rtf = rtf
+
+    def _synthesize(self, text: str, speed: float) -> np.ndarray:
+        duration = len(text) * STUB_SECONDS_PER_CHAR / speed
+        time.sleep(duration * self.rtf)
+        t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    def create_audio(self, text: str, voice: str, speed: float = 1.0, lang: str = 'en-us'):
+        return self._synthesize(text, speed), SAMPLE_RATE
+
+    def create_audio_stream(self, text: str, voice: str, speed: float = 1.0, lang: str = 'en-us'):
+        for segment in split_text_segments(text):
+            yield self.create_audio(segment, voice, speed, lang)
+
+    def synthesize(self, text: str, voice: str, speed: float = 1.0, lang: str = 'en-us') -> dict:
+        """SynthesisWorkerPool-compatible entry point for the in-process web app"""
+        return {
+            'success': True,
+            'audio_data': self._synthesize(text, speed),
+            'sample_rate': SAMPLE_RATE,
+            'method_used': 'Stub model',
+            'voice': voice
+        }
+
+    def get_stats(self) -> dict:
+        return {'stub': True, 'rtf': self.rtf}
+
+
+class IntegrationTarget:
+    """Benchmarks create_audio / create_audio_stream in process"""
+
+    name = 'integration'
+
+    def __init__(self, engine, startup: dict | None = None):
+        self.engine = engine
+        self.startup = startup
+
+    def synthesize(self, text: str, voice: str) -> tuple[float, float]:
+        """Returns (latency seconds, audio seconds)"""
+        start = time.perf_counter()
+        audio, sample_rate = self.engine.create_audio(text, voice)
+        return time.perf_counter() - start, len(audio) / sample_rate
+
+    def first_audio(self, text: str, voice: str) -> float:
+        start = time.perf_counter()
+        stream = self.engine.create_audio_stream(text, voice)
+        next(stream)
+        ttfa = time.perf_counter() - start
+        stream.close()
+        return ttfa
+
+
+class HttpTarget:
+    """Benchmarks /synthesize and /synthesize/stream on a server or the in-process app"""
+
+    name = 'http'
+    startup = None
+
+    def __init__(self, url: str | None = None, app=None):
+        self.url = url.rstrip('/') if url else None
+        self.app = app
+
+    def _post(self, path: str, payload: dict, first_byte_only: bool = False):
+        if self.app is not None:
+            response = self.app.test_client().post(path, json=payload, buffered=False)
+            body = next(response.response, b'') if first_byte_only else response.get_data()
+            response.close()
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            return body
+
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=300) as response:
+            return response.read(1) if first_byte_only else response.read()
+
+    def synthesize(self, text: str, voice: str) -> tuple[float, float]:
+        start = time.perf_counter()
+        result = json.loads(self._post('/synthesize', {'text': text, 'voice': voice, 'cache': False}))
+        latency = time.perf_counter() - start
+        if not result.get('success'):
+            raise RuntimeError(result.get('error'))
+        return latency, float(result['metrics']['audio_length'])
+
+    def first_audio(self, text: str, voice: str) -> float:
+        start = time.perf_counter()
+        self._post('/synthesize/stream', {'text': text, 'voice': voice, 'format': 'pcm', 'cache': False},
+                   first_byte_only=True)
+        return time.perf_counter() - start
+
+
+def summarize(values: list[float]) -> dict:
+    """Mean and p50/p95/p99 of a list of measurements"""
+    if not values:
+        return {}
+    array = np.asarray(values)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        'mean': float(array.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'min': float(array.min()),
+        'max': float(array.max())
+    }
+
+
+def current_rss_mb() -> float:
+    """Current resident set size of this process"""
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_cases(target, iterations: int, warmup: int) -> list[dict]:
+    """Latency, RTF and time-to-first-audio per (length, voice) case"""
+    cases = []
+    for length, text in BENCHMARK_CORPUS.items():
+        for voice in BENCHMARK_VOICES:
+            for _ in range(warmup):
+                target.synthesize(text, voice)
+
+            latencies, rtfs, ttfas = [], [], []
+            audio_seconds = 0.0
+            for _ in range(iterations):
+                latency, audio_duration = target.synthesize(text, voice)
+                latencies.append(latency)
+                rtfs.append(latency / audio_duration if audio_duration else 0.0)
+                audio_seconds = audio_duration
+                ttfas.append(target.first_audio(text, voice))
+
+            case = {
+                'name': f'{length}/{voice}',
+                'text_chars': len(text),
+                'voice': voice,
+                'iterations': iterations,
+                'audio_seconds': audio_seconds,
+                'latency': summarize(latencies),
+                'rtf': summarize(rtfs),
+                'ttfa': summarize(ttfas)
+            }
+            cases.append(case)
+            logger.info(
+                f"   {case['name']:<20} p50 {case['latency']['p50']:.3f}s  "
+                f"p95 {case['latency']['p95']:.3f}s  RTF {case['rtf']['mean']:.3f}  "
+                f"TTFA {case['ttfa']['p50']:.3f}s"
+            )
+    return cases
+
+
+def run_concurrency(target, clients: int, requests_per_client: int) -> dict:
+    """Throughput with N clients each sending requests back to back"""
+    work = [
+        (text, voice)
+        for text in BENCHMARK_CORPUS.values()
+        for voice in BENCHMARK_VOICES
+    ]
+    latencies = []
+    audio_seconds = [0.0]
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(index: int):
+        for i in range(requests_per_client):
+            text, voice = work[(index + i) % len(work)]
+            try:
+                latency, audio_duration = target.synthesize(text, voice)
+            except Exception as e:
+                logger.warning(f"Request failed: {e}")
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(latency)
+                audio_seconds[0] += audio_duration
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    wall_time = time.perf_counter() - start
+
+    result = {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'wall_time': wall_time,
+        'requests_per_second': len(latencies) / wall_time,
+        'audio_seconds_per_second': audio_seconds[0] / wall_time,
+        'latency': summarize(latencies)
+    }
+    logger.info(
+        f"   {clients:>3} client(s): {result['requests_per_second']:.2f} req/s, "
+        f"{result['audio_seconds_per_second']:.2f} audio-s/s, p95 {result['latency'].get('p95', 0):.3f}s"
+    )
+    return result
+
+
+def build_targets(args) -> list:
+    targets = []
+    stub = StubSynthesizer(args.stub_rtf) if args.stub else None
+
+    if args.target in ('integration', 'all'):
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        if stub is not None:
+            engine = stub
+        else:
+            from kokoro_mlir_integration import create_kokoro_mlir_npu_integration
+            engine = create_kokoro_mlir_npu_integration(args.model, args.voices, session_profile=args.session_profile)
+
+        # Model load cost: time and resident memory added by building the integration
+        startup = {
+            'seconds': time.perf_counter() - start,
+            'rss_before_mb': rss_before,
+            'rss_after_mb': current_rss_mb()
+        }
+        startup['rss_added_mb'] = startup['rss_after_mb'] - rss_before
+        logger.info(f"⏱️ Integration ready in {startup['seconds']:.3f}s (+{startup['rss_added_mb']:.0f} MB RSS)")
+        targets.append(IntegrationTarget(engine, startup))
+
+    if args.target in ('http', 'all'):
+        if args.url:
+            targets.append(HttpTarget(url=args.url))
+        else:
+            import web_interface_magic_unicorn as web
+            logging.getLogger(web.__name__).setLevel(logging.WARNING)
+            if stub is not None:
+                web._worker_pool = stub
+            targets.append(HttpTarget(app=web.app))
+
+    return targets
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str):
+    """Print p50 latency, RTF and TTFA changes against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    logger.info(f"📊 Compared with {baseline_path} ({baseline['benchmark'].get('git_commit')})")
+    for target, data in results['results'].items():
+        old_cases = {case['name']: case for case in baseline['results'].get(target, {}).get('cases', [])}
+        for case in data['cases']:
+            old = old_cases.get(case['name'])
+            if old is None:
+                continue
+            changes = []
+            for metric in ('latency', 'rtf', 'ttfa'):
+                before, after = old[metric]['p50'], case[metric]['p50']
+                change = (after - before) / before * 100 if before else 0.0
+                changes.append(f"{metric} {after:.3f} ({change:+.1f}%)")
+            logger.info(f"   {target}/{case['name']:<20} " + "  ".join(changes))
+
+
+def run(args) -> dict:
+    targets = build_targets(args)
+    concurrency = [int(n) for n in args.concurrency.split(',') if n]
+
+    results = {
+        'benchmark': {
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stub': args.stub,
+            'config': {
+                'iterations': args.iterations,
+                'warmup': args.warmup,
+                'concurrency': concurrency,
+                'requests_per_client': args.requests_per_client,
+                'voices': BENCHMARK_VOICES,
+                'stub_rtf': args.stub_rtf if args.stub else None,
+                'session_profile': args.session_profile
+            }
+        },
+        'results': {}
+    }
+    try:
+        import onnxruntime
+        results['benchmark']['onnxruntime'] = onnxruntime.__version__
+    except ImportError:
+        results['benchmark']['onnxruntime'] = None
+
+    for target in targets:
+        logger.info(f"🚀 Benchmarking {target.name} ({args.iterations} runs per case, {args.warmup} warmup)")
+        cases = run_cases(target, args.iterations, args.warmup)
+
+        logger.info(f"🔀 Concurrency ({args.requests_per_client} requests per client)")
+        scaling = [run_concurrency(target, clients, args.requests_per_client) for clients in concurrency]
+
+        results['results'][target.name] = {
+            'startup': target.startup,
+            'cases': cases,
+            'overall': {
+                'latency_p50': float(np.median([case['latency']['p50'] for case in cases])),
+                'rtf_mean': float(np.mean([case['rtf']['mean'] for case in cases])),
+                'ttfa_p50': float(np.median([case['ttfa']['p50'] for case in cases]))
+            },
+            'concurrency': scaling,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        overall = results['results'][target.name]['overall']
+        logger.info(
+            f"✅ {target.name}: p50 {overall['latency_p50']:.3f}s, RTF {overall['rtf_mean']:.3f}, "
+            f"TTFA {overall['ttfa_p50']:.3f}s, peak RSS {peak_rss_mb():.0f} MB"
+        )
+
+    return results
+
+
+def parse_args(argv=None):
+    from synthesis_worker_pool import DEFAULT_MODEL_PATH, DEFAULT_VOICES_PATH
+
+    parser = argparse.ArgumentParser(description="Benchmark Magic Unicorn TTS latency, RTF and throughput")
+    parser.add_argument('--target', choices=['integration', 'http', 'all'], default='integration',
+                        help="What to benchmark")
+    parser.add_argument('--url', help="Base URL of a running server (default: in-process web app)")
+    parser.add_argument('--iterations', type=int, default=5, help="Measured runs per case")
+    parser.add_argument('--warmup', type=int, default=1, help="Warmup runs per case")
+    parser.add_argument('--concurrency', default='1,2,4', help="Comma-separated client counts")
+    parser.add_argument('--requests-per-client', type=int, default=5, help="Requests per concurrent client")
+    parser.add_argument('--stub', action='store_true', help="Use a synthetic model instead of Kokoro")
+    parser.add_argument('--stub-rtf', type=float, default=0.02, help="Real-time factor of the stub model")
+    parser.add_argument('--session-profile', help="ONNX Runtime tuning profile for the integration")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Kokoro ONNX model")
+    parser.add_argument('--voices', default=DEFAULT_VOICES_PATH, help="Kokoro voices file")
+    parser.add_argument('-o', '--output', help="Write results JSON to this file (default: stdout)")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    results = run(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Synthesis Job Queue
+
+Bounded priority queue of synthesis jobs served by a fixed set of worker
+threads, so HTTP request threads return a job ID immediately instead of
+being held for the whole generation. Jobs can be polled for status, queue
+position and ETA, and a completion callback lets the web layer push results
+over SocketIO.
+"""
+
+import time
+import uuid
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class SynthesisJob:
+    """A queued synthesis request and its outcome"""
+
+    def __init__(self, payload: dict, priority: int):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.sequence = 0
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+
+class SynthesisJobQueue:
+    """Bounded priority job queue with worker threads"""
+
+    def __init__(self, handler, workers: int = 2, max_queued: int = 100,
+                 max_finished: int = 1000, on_complete=None):
+        """
+        Initialize the queue and start its workers
+
+        Args:
+            handler: Callable run for each job payload, returning a result dict
+            workers: Number of worker threads
+            max_queued: Jobs allowed to wait before submit() rejects new ones
+            max_finished: Finished jobs kept for polling
+            on_complete: Optional callback receiving each finished job
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.on_complete = on_complete
+
+        self._heap = []            # (priority, sequence, job)
+        self._sequence = 0
+        self._jobs = OrderedDict()  # job_id -> job, oldest first
+        self._condition = threading.Condition()
+        self._avg_service_time = None
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f'synthesis-job-{i}', daemon=True).start()
+
+    def submit(self, payload: dict, priority: int = 5) -> SynthesisJob:
+        """
+        Queue a job (lower priority values run first)
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        with self._condition:
+            if len(self._heap) >= self.max_queued:
+                self._stats['rejected'] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+
+            job = SynthesisJob(payload, priority)
+            self._sequence += 1
+            job.sequence = self._sequence
+            heapq.heappush(self._heap, (priority, job.sequence, job))
+            self._jobs[job.id] = job
+            self._stats['submitted'] += 1
+            self._condition.notify()
+            return job
+
+    def get(self, job_id: str) -> SynthesisJob | None:
+        """Look up a job by ID"""
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                _, _, job = heapq.heappop(self._heap)
+                job.status = 'running'
+                job.started_at = time.time()
+
+            try:
+                job.result = self.handler(job.payload)
+                job.status = 'done'
+            except Exception as e:
+                logger.error(f"❌ Synthesis job {job.id[:8]} failed: {e}")
+                job.error = str(e)
+                job.status = 'failed'
+            job.finished_at = time.time()
+
+            with self._condition:
+                duration = job.finished_at - job.started_at
+                if self._avg_service_time is None:
+                    self._avg_service_time = duration
+                else:
+                    self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * duration
+                self._stats['completed' if job.status == 'done' else 'failed'] += 1
+                self._prune_finished()
+
+            if self.on_complete:
+                try:
+                    self.on_complete(job)
+                except Exception as e:
+                    logger.warning(f"Job completion callback failed: {e}")
+
+    def _prune_finished(self):
+        """Drop the oldest finished jobs beyond max_finished"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def describe(self, job: SynthesisJob) -> dict:
+        """Get a job's status, queue position and ETA as a JSON-ready dict"""
+        with self._condition:
+            position = None
+            eta = None
+            avg = self._avg_service_time
+            if job.status == 'queued':
+                position = sum(1 for entry in self._heap if entry[:2] < (job.priority, job.sequence))
+                if avg is not None:
+                    eta = (position // self.workers + 1) * avg
+            elif job.status == 'running' and avg is not None:
+                eta = max(0.0, avg - (time.time() - job.started_at))
+
+        info = {
+            'job_id': job.id,
+            'status': job.status,
+            'priority': job.priority,
+            'position': position,
+            'eta_seconds': round(eta, 2) if eta is not None else None,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at
+        }
+        if job.status == 'done':
+            info['result'] = job.result
+        elif job.status == 'failed':
+            info['error'] = job.error
+        return info
+
+    def get_stats(self) -> dict:
+        """Get queue depth and job counters"""
+        with self._condition:
+            return {
+                **self._stats,
+                'queued': len(self._heap),
+                'running': sum(1 for job in self._jobs.values() if job.status == 'running'),
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'avg_service_time': self._avg_service_time
+            }
@@ -15,53 +15,117 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "kokoro-onnx", "src")
 
 from kokoro_onnx import Kokoro
 from kokoro_mlir_npu import KokoroNPUAcceleratorMLIR
-import onnxruntime as ort
+
+from text_segmentation import split_text_segments
+from synthesis_cache import cache_key, model_fingerprint
+from phoneme_cache import PhonemeCache
+from micro_batching import MicroBatchScheduler
+from token_batching import BATCH_PROBE_TEXTS, build_token_batch, verify_batched_inference
+from session_profiles import create_inference_session, describe_profile
+from voice_store import VoiceStore
+from voice_blending import VoiceBlender
+import tracing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
+class MLIRNPUSession:
+    """ONNX session proxy whose run() goes through the MLIR-AIE NPU accelerator"""
+    
+    def __init__(self, session, accelerator):
+        self.session = session
+        self.accelerator = accelerator
+    
+    def run(self, output_names, input_feed, run_options=None):
+        """MLIR-AIE NPU-accelerated inference run"""
+        return self.accelerator.accelerated_inference(
+            lambda: self.session.run(output_names, input_feed, run_options),
+            input_feed
+        )
+    
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
 class KokoroMLIRNPUIntegration:
     """Complete integration of Kokoro TTS with MLIR-AIE NPU acceleration"""
     
-    def __init__(self, model_path: str, voices_path: str):
+    def __init__(self, model_path: str, voices_path: str, cache=None,
+                 batching: dict | None = None, session_profile: str | None = None):
         """
         Initialize Kokoro MLIR-AIE NPU integration
         
         Args:
             model_path: Path to Kokoro ONNX model
             voices_path: Path to voices file
+            cache: Optional SynthesisCache consulted before generating audio
+            batching: Optional MicroBatchScheduler settings (max_batch_size,
+                max_wait_ms, max_padding_ratio) to batch concurrent requests
+            session_profile: ONNX Runtime tuning profile (see session_profiles;
+                None = MAGIC_UNICORN_SESSION_PROFILE or latency)
         """
         self.model_path = model_path
         self.voices_path = voices_path
+        self.session_profile = session_profile
+        self.cache = cache
+        self.model_hash = model_fingerprint(model_path) if cache is not None else None
         
         # Initialize MLIR-AIE NPU accelerator
         self.mlir_accelerator = KokoroNPUAcceleratorMLIR()
         self.acceleration_enabled = self.mlir_accelerator.acceleration_enabled
         
-        # Initialize standard Kokoro for comparison and voice handling
-        self.kokoro_standard = Kokoro(model_path, voices_path)
-        
-        # Create NPU-accelerated ONNX session
+        # Load the model once: standard Kokoro and the NPU path share one session
         self._create_npu_session()
         
+        # Voice styles shared with other processes through a memory-mapped store
+        self.voice_store = VoiceStore(voices_path)
+        self.voice_blender = VoiceBlender(self.voice_store)
+        
+        # Memoized G2P front end (phonemize + tokenize)
+        self.phoneme_cache = PhonemeCache(self.kokoro_standard.tokenizer)
+        
+        # Optional micro-batching of concurrent requests in front of the session, only
+        # when this model's padded batches reproduce single-request audio
+        self.batched_inference_supported = None
+        self.batching_disabled_reason = None
+        self.batch_scheduler = None
+        if batching:
+            self.batching_disabled_reason = self._probe_batched_inference(batching.get('bucket_edges'))
+            self.batched_inference_supported = self.batching_disabled_reason is None
+            if self.batched_inference_supported:
+                self.batch_scheduler = MicroBatchScheduler(self._run_inference_batch, **batching)
+                logger.info(f"📦 Micro-batching enabled: {batching}")
+            else:
+                logger.warning(f"⚠️ Micro-batching disabled, model does not batch correctly: "
+                               f"{self.batching_disabled_reason}")
+        
         if self.acceleration_enabled:
             logger.info("🎉 Kokoro MLIR-AIE NPU integration ready")
         else:
             logger.warning("⚠️ MLIR-AIE NPU not available, using CPU fallback")
     
     def _create_npu_session(self):
-        """Create ONNX Runtime session optimized for NPU operations"""
+        """Create the ONNX Runtime session shared by standard Kokoro and the NPU path"""
         try:
-            # Create session with CPU provider (we'll intercept matrix ops for NPU)
-            providers = ['CPUExecutionProvider']
-            self.npu_session = ort.InferenceSession(self.model_path, providers=providers)
+            if hasattr(Kokoro, 'from_session'):
+                # Create session with the tuning profile's providers (we'll intercept matrix ops for NPU)
+                self.session = create_inference_session(self.model_path, self.session_profile)
+                # Initialize standard Kokoro for comparison and voice handling on the same session
+                self.kokoro_standard = Kokoro.from_session(self.session, self.voices_path)
+            else:
+                # Older kokoro-onnx: let Kokoro load the model once and reuse its session
+                logger.warning("kokoro-onnx has no Kokoro.from_session; session profiles and "
+                               "optimized models don't apply")
+                self.kokoro_standard = Kokoro(self.model_path, self.voices_path)
+                self.session = self.kokoro_standard.sess
             
             if self.acceleration_enabled:
                 # Wrap session for NPU acceleration
-                self.npu_session = self._wrap_session_for_mlir_npu(self.npu_session)
+                self.npu_session = self._wrap_session_for_mlir_npu(self.session)
                 logger.info("🚀 Created MLIR-AIE NPU-accelerated session")
             else:
+                self.npu_session = self.session
                 logger.info("Created CPU-only session")
                 
         except Exception as e:
@@ -70,18 +134,8 @@ class KokoroMLIRNPUIntegration:
     
     def _wrap_session_for_mlir_npu(self, session):
         """Wrap ONNX session to use MLIR-AIE NPU for matrix operations"""
-        original_run = session.run
-        
-        def mlir_npu_accelerated_run(output_names, input_feed, run_options=None):
-            """MLIR-AIE NPU-accelerated inference run"""
-            return self.mlir_accelerator.accelerated_inference(
-                lambda: original_run(output_names, input_feed, run_options),
-                input_feed
-            )
-        
-        # Replace the run method
-        session.run = mlir_npu_accelerated_run
-        return session
+        # Proxy instead of patching session.run, so the shared session stays plain for Kokoro
+        return MLIRNPUSession(session, self.mlir_accelerator)
     
     def _handle_npu_optimized_model(self, session, tokens, style, speed):
         """Handle models that don't need tokens input"""
@@ -110,13 +164,41 @@ class KokoroMLIRNPUIntegration:
         
         Args:
             text: Text to synthesize
-            voice: Voice name
+            voice: Voice name, named blend, blend spec ("af_heart:0.7+af_sky:0.3"
+                or {"af_heart": 0.7, "af_sky": 0.3}) or style array
             speed: Speaking speed
             lang: Language code
             
         Returns:
             Tuple of (audio_array, sample_rate)
         """
+        # Blends are identified by their canonical spec, so equal mixes share cache entries
+        if isinstance(voice, (str, dict)):
+            voice = self.voice_blender.registry.normalize(voice)
+        
+        # Only named voices and blends have a stable content address
+        key = None
+        if self.cache is not None and isinstance(voice, str):
+            key = cache_key(text, voice, speed, lang, self.model_hash)
+            with tracing.span('cache_lookup') as lookup:
+                cached = self.cache.get(key)
+            if lookup is not None:
+                lookup['attributes']['hit'] = cached is not None
+            if cached is not None:
+                logger.info(f"💾 Synthesis cache hit: {key[:12]}")
+                return cached
+        
+        audio, sample_rate = self._generate_audio(text, voice, speed, lang)
+        if key is not None:
+            self.cache.put(key, audio, sample_rate)
+        return audio, sample_rate
+    
+    def _generate_audio(self, text: str, voice: str, speed: float,
+                        lang: str) -> tuple[np.ndarray, int]:
+        """Generate audio on the NPU path, falling back to standard CPU generation"""
+        # Standard Kokoro only knows base voices, so hand it the resolved style
+        voice_style = self.voice_blender.resolve(voice) if isinstance(voice, str) else voice
+        
         try:
             if self.acceleration_enabled:
                 logger.info(f"🚀 Generating audio with MLIR-AIE NPU acceleration")
@@ -127,12 +209,35 @@ class KokoroMLIRNPUIntegration:
                 return self._create_audio_npu_accelerated(text, voice, speed, lang)
             else:
                 logger.info("Using CPU fallback for audio generation")
-                return self.kokoro_standard.create(text, voice, speed, lang)
+                with tracing.span('cpu_inference'):
+                    return self.kokoro_standard.create(text, voice_style, speed, lang)
                 
         except Exception as e:
             logger.error(f"MLIR-AIE NPU audio generation failed: {e}")
             logger.info("Falling back to standard CPU generation")
-            return self.kokoro_standard.create(text, voice, speed, lang)
+            with tracing.span('cpu_inference', fallback=True):
+                return self.kokoro_standard.create(text, voice_style, speed, lang)
+    
+    def create_audio_stream(self, text: str, voice: str, speed: float = 1.0,
+                           lang: str = "en-us"):
+        """
+        Create audio segment by segment for streaming playback
+        
+        Args:
+            text: Text to synthesize
+            voice: Voice name
+            speed: Speaking speed
+            lang: Language code
+        
+        Yields:
+            Tuple of (audio_array, sample_rate) for each sentence/clause segment
+        """
+        segments = split_text_segments(text)
+        if not segments:
+            raise ValueError("Empty text provided")
+        
+        for segment in segments:
+            yield self.create_audio(segment, voice, speed, lang)
     
     def _create_audio_npu_accelerated(self, text: str, voice: str, 
                                     speed: float, lang: str) -> tuple[np.ndarray, int]:
@@ -140,35 +245,28 @@ class KokoroMLIRNPUIntegration:
         import time
         
         # Get voice style
-        if isinstance(voice, str):
-            voice_style = self.kokoro_standard.get_voice_style(voice)
-        else:
-            voice_style = voice
+        with tracing.span('voice_resolve'):
+            if isinstance(voice, str):
+                voice_style = self.voice_blender.resolve(voice)
+            else:
+                voice_style = voice
         
         start_time = time.time()
         
-        # Convert text to phonemes
-        if text.strip():
-            phonemes = self.kokoro_standard.tokenizer.phonemize(text, lang)
-        else:
+        # Convert text to phonemes and tokenize (memoized per sentence)
+        if not text.strip():
             raise ValueError("Empty text provided")
+        with tracing.span('phonemize_tokenize'):
+            tokens = self.phoneme_cache.tokens(text, lang)
+        tokenize_time = time.time() - start_time
         
-        # Tokenize phonemes
-        tokens = np.array(self.kokoro_standard.tokenizer.tokenize(phonemes), dtype=np.int64)
-        
-        # Prepare inputs for NPU inference
-        voice_for_length = voice_style[len(tokens)]
-        tokens_padded = [[0, *tokens, 0]]
-        
-        input_feed = {
-            'tokens': tokens_padded,
-            'style': voice_for_length,
-            'speed': np.ones(1, dtype=np.float32) * speed
-        }
-        
-        # Run NPU-accelerated inference
-        result = self._handle_npu_optimized_model(self.npu_session, tokens_padded, voice_for_length, np.ones(1, dtype=np.float32) * speed)
-        audio = result[0]
+        # Run NPU-accelerated inference, batched with concurrent requests when enabled
+        with tracing.span('inference', tokens=len(tokens), batched=self.batch_scheduler is not None):
+            if self.batch_scheduler is not None:
+                group_key = voice if isinstance(voice, str) else 'custom'
+                audio = self.batch_scheduler.run(tokens, voice_style, speed, group_key)
+            else:
+                audio = self._run_inference(tokens, voice_style, speed)
         
         # Debug: Check audio type and shape
         logger.info(f"   Raw audio result type: {type(audio)}")
@@ -188,7 +286,8 @@ class KokoroMLIRNPUIntegration:
         sample_rate = 24000  # Kokoro sample rate
         
         logger.info(f"✅ MLIR-AIE NPU audio generation completed")
-        logger.info(f"   Generation time: {generation_time:.3f}s")
+        logger.info(f"   Generation time: {generation_time:.3f}s "
+                    f"(phonemize+tokenize {tokenize_time:.3f}s, inference {generation_time - tokenize_time:.3f}s)")
         logger.info(f"   Audio length: {len(audio)/sample_rate:.2f}s ({len(audio)} samples)")
         audio_duration = len(audio) / sample_rate
         rtf = generation_time / audio_duration if audio_duration > 0 else 0
@@ -196,9 +295,53 @@ class KokoroMLIRNPUIntegration:
         
         return audio, sample_rate
     
+    def _run_inference(self, tokens: np.ndarray, voice_style: np.ndarray, speed: float):
+        """Run a single sequence through the NPU session"""
+        voice_for_length = voice_style[len(tokens)]
+        tokens_padded = [[0, *tokens, 0]]
+        result = self._handle_npu_optimized_model(self.npu_session, tokens_padded, voice_for_length, np.ones(1, dtype=np.float32) * speed)
+        return result[0]
+    
+    def _probe_batched_inference(self, bucket_edges=None) -> str | None:
+        """Compare a padded probe batch with single runs; None if they match, else why not"""
+        try:
+            voice_style = self.voice_store.get_voice_style(self.voice_store.get_voices()[0])
+            token_seqs = [self.phoneme_cache.tokens(text, "en-us") for text in BATCH_PROBE_TEXTS]
+        except Exception as e:
+            return f"could not prepare the probe: {e}"
+        
+        return verify_batched_inference(
+            lambda tokens, styles, speeds: self._handle_npu_optimized_model(self.npu_session, tokens, styles, speeds),
+            token_seqs, voice_style, bucket_edges=bucket_edges
+        )
+    
+    def _run_inference_batch(self, requests: list) -> list:
+        """Run a micro-batch, running its requests one by one if this batch fails"""
+        if len(requests) == 1:
+            return [self._run_inference(r.tokens, r.style, r.speed) for r in requests]
+        
+        try:
+            return self._run_padded_batch(requests)
+        except Exception as e:
+            # The model passed the batching probe, so only this batch falls back
+            logger.warning(f"⚠️ Batched inference failed, running {len(requests)} requests one by one: {e}")
+            return [self._run_inference(r.tokens, r.style, r.speed) for r in requests]
+    
+    def _run_padded_batch(self, requests: list) -> list:
+        """Run requests as one padded [B, T] batch and split the audio per request"""
+        batch = build_token_batch(
+            [r.tokens for r in requests],
+            [r.style for r in requests],
+            [r.speed for r in requests],
+            self.batch_scheduler.bucket_edges
+        )
+        
+        outputs = self._handle_npu_optimized_model(self.npu_session, batch.tokens, batch.styles, batch.speeds)
+        return batch.split_audio(outputs)
+    
     def get_voices(self) -> list[str]:
-        """Get available voices"""
-        return self.kokoro_standard.get_voices()
+        """Get available voices and named blends"""
+        return self.voice_blender.get_voices()
     
     def get_acceleration_status(self) -> dict:
         """Get detailed acceleration status"""
@@ -207,22 +350,39 @@ class KokoroMLIRNPUIntegration:
             **base_status,
             "model_path": self.model_path,
             "voices_available": len(self.get_voices()),
-            "session_ready": hasattr(self, 'npu_session') and self.npu_session is not None
+            "session_ready": hasattr(self, 'npu_session') and self.npu_session is not None,
+            "session_profile": describe_profile(self.session_profile),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "phoneme_cache": self.phoneme_cache.get_stats(),
+            "voice_store": self.voice_store.get_stats(),
+            "voice_blending": self.voice_blender.get_stats(),
+            "batching": {
+                **self.batch_scheduler.get_stats(),
+                "batched_inference_supported": self.batched_inference_supported
+            } if self.batch_scheduler is not None else {
+                "batched_inference_supported": self.batched_inference_supported,
+                "disabled_reason": self.batching_disabled_reason
+            } if self.batching_disabled_reason else None
         }
 
 
-def create_kokoro_mlir_npu_integration(model_path: str, voices_path: str):
+def create_kokoro_mlir_npu_integration(model_path: str, voices_path: str, cache=None,
+                                       batching: dict | None = None,
+                                       session_profile: str | None = None):
     """
     Create Kokoro MLIR-AIE NPU integration
     
     Args:
         model_path: Path to Kokoro ONNX model
         voices_path: Path to voices file
+        cache: Optional SynthesisCache consulted before generating audio
+        batching: Optional MicroBatchScheduler settings
+        session_profile: ONNX Runtime tuning profile name
         
     Returns:
         KokoroMLIRNPUIntegration instance
     """
-    integration = KokoroMLIRNPUIntegration(model_path, voices_path)
+    integration = KokoroMLIRNPUIntegration(model_path, voices_path, cache, batching, session_profile)
     
     # Print status
     status = integration.get_acceleration_status()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Non-Blocking Log Pipeline for the Web Log Viewer
+
+The logging handler only renders the record's message (like QueueHandler,
+so later changes to its arguments don't show up) and appends it to a
+bounded pending deque; it never locks or waits, so the synthesis hot path
+isn't slowed by the log viewer. A background thread drains the pending
+records every flush interval (or sooner once a batch fills up), turns them
+into log entries, keeps the newest ones in a ring for /logs and hands each batch
+to the registered sinks (e.g. one socket emit per batch instead of one
+per record). When records arrive faster than they are drained the oldest
+pending ones are dropped and counted.
+
+Every entry gets a sequence number, increasing by one per entry, so a
+client that remembers the last number it saw can fetch only newer entries;
+because the ring holds a contiguous run of numbers, the delta is read from
+its tail in O(new entries) rather than by scanning the whole buffer.
+"""
+
+import sys
+import copy
+import logging
+import threading
+from itertools import islice
+from collections import deque
+from datetime import datetime
+
+# Level names clients can filter on, lowest first
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def filter_level(entries: list[dict], min_level: str) -> list[dict]:
+    """Entries at or above a level name"""
+    threshold = logging.getLevelName(min_level)
+    return [entry for entry in entries if entry['levelno'] >= threshold]
+
+
+def filter_entries(entries: list[dict], min_level: str | None = None, module: str | None = None,
+                   query: str | None = None) -> list[dict]:
+    """
+    Entries matching all given filters
+
+    Args:
+        entries: Log entries
+        min_level: Minimum level name
+        module: Logger name, also matching its children (e.g. 'werkzeug')
+        query: Case-insensitive substring of the message
+    """
+    if min_level:
+        entries = filter_level(entries, min_level)
+    if module:
+        prefix = module + '.'
+        entries = [entry for entry in entries
+                   if entry['module'] == module or entry['module'].startswith(prefix)]
+    if query:
+        query = query.lower()
+        entries = [entry for entry in entries if query in entry['message'].lower()]
+    return entries
+
+
+class LogPipelineHandler(logging.Handler):
+    """Logging handler that queues records for the pipeline without blocking"""
+
+    def __init__(self, pipeline: 'LogPipeline'):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record):
+        # Skips the handler lock: emit() is a single deque append
+        if self.filter(record):
+            self.emit(record)
+        return record
+
+    def emit(self, record):
+        self.pipeline.submit(record)
+
+
+class LogPipeline:
+    """Bounded log ring fed by a non-blocking handler, emitted in batches"""
+
+    def __init__(self, capacity: int = 1000, pending_limit: int = 5000,
+                 flush_interval: float = 0.1, batch_size: int = 200):
+        """
+        Initialize the pipeline
+
+        Args:
+            capacity: Formatted entries kept for /logs and new clients
+            pending_limit: Records waiting for the flusher before the oldest are dropped
+            flush_interval: Seconds between batch flushes
+            batch_size: Pending records that trigger an early flush
+        """
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._pending = deque(maxlen=pending_limit)
+        self._entries = deque(maxlen=capacity)
+        self._entries_lock = threading.Lock()
+        self._sinks = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._formatter = logging.Formatter('%(message)s')
+        self._next_seq = 1    # only advanced by flush()
+        # Updated without a lock to keep submit() wait-free; may undercount under heavy contention
+        self._stats = {'submitted': 0, 'dropped': 0, 'batches': 0, 'sink_errors': 0}
+
+        self.handler = LogPipelineHandler(self)
+
+    def submit(self, record: logging.LogRecord):
+        """Queue a record (called on the logging thread; never blocks)"""
+        try:
+            record = self._prepare(record)
+        except Exception:
+            self._stats['dropped'] += 1
+            return
+        if len(self._pending) == self._pending.maxlen:
+            self._stats['dropped'] += 1
+        self._pending.append(record)
+        self._stats['submitted'] += 1
+        if len(self._pending) >= self.batch_size and not self._wake.is_set():
+            self._wake.set()
+
+    def add_sink(self, sink):
+        """Register a callable receiving each batch (list of entries)"""
+        self._sinks.append(sink)
+
+    def _prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copy of the record with its message rendered now, as QueueHandler.prepare does
+
+        Arguments are formatted before the caller can change them, and the
+        traceback becomes text so the queued record doesn't keep frames alive.
+        """
+        message = self._formatter.format(record)
+        record = copy.copy(record)
+        record.message = message
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record.stack_info = None
+        return record
+
+    def _format(self, record: logging.LogRecord) -> dict:
+        return {
+            'timestamp': datetime.fromtimestamp(record.created).strftime('%H:%M:%S.%f')[:-3],
+            'level': record.levelname,
+            'levelno': record.levelno,
+            'message': record.msg,
+            'module': record.name
+        }
+
+    def flush(self) -> list[dict]:
+        """Format pending records into the ring and send them to the sinks as one batch"""
+        batch = []
+        while True:
+            try:
+                record = self._pending.popleft()
+            except IndexError:
+                break
+            try:
+                entry = self._format(record)
+            except Exception:
+                self._stats['dropped'] += 1
+                continue
+            entry['seq'] = self._next_seq
+            self._next_seq += 1
+            batch.append(entry)
+
+        if not batch:
+            return batch
+
+        with self._entries_lock:
+            self._entries.extend(batch)
+        self._stats['batches'] += 1
+
+        for sink in self._sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                # Not logged through the pipeline itself, which would feed back into it
+                self._stats['sink_errors'] += 1
+                print(f"Log pipeline sink error: {e}", file=sys.stderr)
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background flusher"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-pipeline', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher after a final flush"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush()
+
+    def entries(self, min_level: str | None = None) -> list[dict]:
+        """Buffered entries, oldest first, optionally at or above a level"""
+        return self.fetch(min_level=min_level)['logs']
+
+    def fetch(self, since: int | None = None, min_level: str | None = None, module: str | None = None,
+              query: str | None = None) -> dict:
+        """
+        Buffered entries newer than a sequence number, filtered
+
+        Args:
+            since: Last sequence number the caller has seen (all buffered entries if None)
+            min_level: Minimum level name
+            module: Logger name, also matching its children
+            query: Case-insensitive substring of the message
+
+        Returns:
+            Dict with 'logs' (oldest first), 'cursor' (sequence number to pass
+            as since next time, whatever the filters matched) and 'truncated'
+            (entries after since were already evicted from the ring, or since
+            is from before a restart and everything buffered is returned)
+        """
+        with self._entries_lock:
+            cursor = self._entries[-1]['seq'] if self._entries else self._next_seq - 1
+            if since is None or since > cursor:
+                # No cursor, or one from before a restart
+                entries = list(self._entries)
+                truncated = since is not None
+            else:
+                # The ring holds consecutive sequence numbers, so the delta is its last (cursor - since) entries
+                count = min(max(cursor - since, 0), len(self._entries))
+                entries = list(islice(reversed(self._entries), count))
+                entries.reverse()
+                truncated = bool(self._entries) and since < self._entries[0]['seq'] - 1
+        return {
+            'logs': filter_entries(entries, min_level, module, query),
+            'cursor': cursor,
+            'truncated': truncated
+        }
+
+    def get_stats(self) -> dict:
+        """Get throughput and drop counters"""
+        return {
+            **self._stats,
+            'pending': len(self._pending),
+            'buffered': len(self._entries),
+            'capacity': self.capacity,
+            'flush_interval_seconds': self.flush_interval,
+            'batch_size': self.batch_size
+        }
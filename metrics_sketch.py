@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Rolling Quantile Sketches for Performance Metrics
+
+Keeps latency and RTF distributions per voice and method without storing
+samples. Each value goes into a DDSketch (log-spaced buckets with a fixed
+relative error), so inserts are O(1), sketches merge by adding bucket
+counts, and memory depends on the value range, not on request volume.
+
+Sketches are kept in rolling windows at three resolutions, 1 s slots for
+the last minute, 1 min slots for the last hour and 1 h slots for the last
+day, plus an all-time sketch. A query over the last N seconds merges the
+slots of the finest resolution that covers it.
+"""
+
+import math
+import time
+import threading
+
+# (slot seconds, slots kept) - finest first
+DEFAULT_RESOLUTIONS = ((1, 60), (60, 60), (3600, 24))
+
+
+class DDSketch:
+    """Quantile sketch with bounded relative error"""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        """
+        Initialize an empty sketch
+
+        Args:
+            relative_accuracy: Relative error bound of reported quantiles
+            max_bins: Bucket budget; beyond it the lowest buckets are collapsed
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins = {}
+        self.zero_count = 0    # values <= 0 (e.g. an RTF of an empty clip), reported as 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Record one value"""
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._bins[key] = self._bins.get(key, 0) + 1
+            if len(self._bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        """Fold the lowest buckets together until the budget is met"""
+        keys = sorted(self._bins)
+        overflow = len(keys) - self.max_bins
+        folded = sum(self._bins.pop(key) for key in keys[:overflow + 1])
+        self._bins[keys[overflow]] = folded
+
+    def merge(self, other: 'DDSketch'):
+        """Add another sketch's values (both must share the relative accuracy)"""
+        if other.count == 0:
+            return
+        for key, count in other._bins.items():
+            self._bins[key] = self._bins.get(key, 0) + count
+        if len(self._bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the q-quantile (0..1), None when empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for key in sorted(self._bins):
+            seen += self._bins[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+                value = 2 * self._gamma ** key / (1 + self._gamma)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, quantiles: tuple = (0.5, 0.95, 0.99)) -> dict:
+        """Count, mean, min, max and the requested quantiles (as p50, p95, ...)"""
+        summary = {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+        for q in quantiles:
+            summary[f"p{q * 100:g}"] = self.quantile(q)
+        return summary
+
+
+class RollingSketch:
+    """Sketches of one metric in time slots at several resolutions, plus all time"""
+
+    def __init__(self, resolutions: tuple = DEFAULT_RESOLUTIONS, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.resolutions = tuple(sorted(resolutions))
+        # Per resolution: ring of [slot number, sketch]
+        self._rings = [[[None, None] for _ in range(slots)] for _, slots in self.resolutions]
+        self.total = DDSketch(relative_accuracy)
+
+    def add(self, value: float, timestamp: float):
+        """Record a value in its slot at every resolution"""
+        for (seconds, slots), ring in zip(self.resolutions, self._rings):
+            slot_number = int(timestamp // seconds)
+            slot = ring[slot_number % slots]
+            if slot[0] is not None and slot[0] > slot_number:
+                # A late value from a lap this ring has already moved past
+                continue
+            if slot[0] != slot_number:
+                slot[0] = slot_number
+                slot[1] = DDSketch(self.relative_accuracy)
+            slot[1].add(value)
+        self.total.add(value)
+
+    def window(self, seconds: float | None, now: float) -> DDSketch:
+        """Merge the slots covering the last `seconds` (all time if None)"""
+        merged = DDSketch(self.relative_accuracy)
+        if seconds is None:
+            merged.merge(self.total)
+            return merged
+
+        # Finest resolution whose ring spans the window; the coarsest otherwise
+        index = next((i for i, (slot_seconds, slots) in enumerate(self.resolutions)
+                      if slot_seconds * slots >= seconds), len(self.resolutions) - 1)
+        slot_seconds, slots = self.resolutions[index]
+        newest = int(now // slot_seconds)
+        oldest = newest - min(slots, math.ceil(seconds / slot_seconds)) + 1
+        for slot_number, sketch in self._rings[index]:
+            if slot_number is not None and oldest <= slot_number <= newest:
+                merged.merge(sketch)
+        return merged
+
+
+class PerformanceStore:
+    """Rolling latency/RTF distributions keyed by voice and method"""
+
+    def __init__(self, metrics: tuple = ('generation_time', 'rtf', 'ttfb'),
+                 resolutions: tuple = DEFAULT_RESOLUTIONS, relative_accuracy: float = 0.01,
+                 max_series: int = 64):
+        """
+        Initialize an empty store
+
+        Args:
+            metrics: Fields of recorded entries that are tracked
+            resolutions: (slot seconds, slots kept) pairs of the rolling windows
+            relative_accuracy: Relative error bound of the sketches
+            max_series: Voice/method combinations tracked separately; later
+                ones are pooled under ('other', 'other')
+        """
+        self.metrics = tuple(metrics)
+        self.resolutions = resolutions
+        self.relative_accuracy = relative_accuracy
+        self.max_series = max_series
+        self._series = {}    # (voice, method, metric) -> RollingSketch
+        self._keys = set()   # (voice, method) pairs in _series
+        self._lock = threading.Lock()
+
+    def record(self, voice: str, method: str, entry: dict, timestamp: float | None = None):
+        """Add the tracked fields present in a metrics entry"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if (voice, method) not in self._keys:
+                if len(self._keys) >= self.max_series:
+                    voice, method = 'other', 'other'
+                self._keys.add((voice, method))
+            for metric in self.metrics:
+                value = entry.get(metric)
+                if value is None:
+                    continue
+                series = self._series.get((voice, method, metric))
+                if series is None:
+                    series = self._series[(voice, method, metric)] = RollingSketch(
+                        self.resolutions, self.relative_accuracy)
+                series.add(value, timestamp)
+
+    def query(self, metric: str, seconds: float | None = None, voice: str | None = None,
+              method: str | None = None) -> DDSketch:
+        """
+        Merged sketch of a metric over the last `seconds` (all time if None)
+
+        Args:
+            metric: Tracked field, e.g. 'rtf'
+            seconds: Window length
+            voice: Only this voice (all voices if None)
+            method: Only this method (all methods if None)
+
+        Raises:
+            ValueError: If seconds isn't a positive, finite number
+        """
+        if seconds is not None and not (math.isfinite(seconds) and seconds > 0):
+            raise ValueError("window must be a positive number of seconds")
+        now = time.time()
+        merged = DDSketch(self.relative_accuracy)
+        with self._lock:
+            for (series_voice, series_method, series_metric), series in self._series.items():
+                if (series_metric == metric and voice in (None, series_voice)
+                        and method in (None, series_method)):
+                    merged.merge(series.window(seconds, now))
+        return merged
+
+    def keys(self) -> tuple[list, list]:
+        """Voices and methods seen so far"""
+        with self._lock:
+            voices = sorted({voice for voice, _ in self._keys})
+            methods = sorted({method for _, method in self._keys})
+        return voices, methods
+
+    def summary(self, seconds: float | None = None, voice: str | None = None,
+                method: str | None = None, quantiles: tuple = (0.5, 0.95, 0.99)) -> dict:
+        """Quantile summary of every tracked metric over a window"""
+        return {
+            metric: self.query(metric, seconds, voice, method).summary(quantiles)
+            for metric in self.metrics
+        }
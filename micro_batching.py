@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Dynamic Micro-Batching Scheduler
+
+Collects concurrent inference requests for a short window, groups them by
+voice and similar token length, and runs each group as one padded batch so
+ONNX Runtime can use its full SIMD width and thread pool. Results are split
+back per request.
+
+The scheduler doesn't look at the model; batches are zero-padded without an
+attention mask (see token_batching), so only put it in front of a model that
+passed verify_batched_inference().
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+from token_batching import bucket_length
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRequest:
+    """One pending inference request"""
+
+    __slots__ = ('tokens', 'style', 'speed', 'group_key', 'future', 'enqueued_at')
+
+    def __init__(self, tokens, style, speed: float, group_key):
+        self.tokens = tokens
+        self.style = style
+        self.speed = speed
+        self.group_key = group_key
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatchScheduler:
+    """Groups concurrent requests into padded batches for a batch runner"""
+
+    def __init__(self, run_batch, max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 max_padding_ratio: float = 0.25, bucket_edges: list[int] | None = None):
+        """
+        Initialize and start the scheduler
+
+        Args:
+            run_batch: Callable taking a list of BatchRequest and returning one
+                result per request, in order
+            max_batch_size: Largest batch handed to run_batch
+            max_wait_ms: How long the first request of a window waits for company
+            max_padding_ratio: Largest share of padded (wasted) token slots allowed
+                in a batch; longer/shorter requests start a new batch instead
+            bucket_edges: Optional length bucket edges (see token_batching); when
+                set, only requests in the same bucket are batched together and
+                the bucket, not max_padding_ratio, bounds the padding
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_padding_ratio = max_padding_ratio
+        self.bucket_edges = bucket_edges
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'token_slots': 0,
+            'padded_slots': 0,
+            'queue_wait_total': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, tokens, style, speed: float, group_key) -> Future:
+        """Queue a request and return a Future for its result"""
+        request = BatchRequest(tokens, style, speed, group_key)
+        self._queue.put(request)
+        return request.future
+
+    def run(self, tokens, style, speed: float, group_key, timeout: float | None = None):
+        """Queue a request and wait for its result"""
+        return self.submit(tokens, style, speed, group_key).result(timeout)
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            pending = [first]
+            deadline = first.enqueued_at + self.max_wait
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Pick up anything else that arrived during the window
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for batch in self._form_batches(pending):
+                self._execute(batch)
+
+    def _form_batches(self, pending: list[BatchRequest]) -> list[list[BatchRequest]]:
+        """Group by key (and bucket), then greedily pack similar lengths within the padding budget"""
+        groups = {}
+        for request in pending:
+            key = request.group_key
+            if self.bucket_edges:
+                key = (key, bucket_length(len(request.tokens) + 2, self.bucket_edges))
+            groups.setdefault(key, []).append(request)
+
+        batches = []
+        for requests in groups.values():
+            requests.sort(key=lambda r: len(r.tokens))
+            batch = []
+            for request in requests:
+                candidate = batch + [request]
+                slots = self._padded_length(len(request.tokens)) * len(candidate)
+                waste = slots - sum(len(r.tokens) for r in candidate)
+                over_budget = not self.bucket_edges and waste > self.max_padding_ratio * slots
+                if batch and (len(candidate) > self.max_batch_size or over_budget):
+                    batches.append(batch)
+                    batch = [request]
+                else:
+                    batch = candidate
+            if batch:
+                batches.append(batch)
+        return batches
+
+    def _padded_length(self, longest: int) -> int:
+        """Token slots per row once the batch is padded"""
+        if self.bucket_edges:
+            return bucket_length(longest + 2, self.bucket_edges) - 2
+        return longest
+
+    def _execute(self, batch: list[BatchRequest]):
+        started = time.monotonic()
+        try:
+            results = list(self.run_batch(batch))
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch runner returned {len(results)} results for {len(batch)} requests")
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        for request, result in zip(batch, results):
+            # One undeliverable result (e.g. a cancelled future) mustn't strand the rest of the batch
+            try:
+                request.future.set_result(result)
+            except Exception as e:
+                logger.warning(f"⚠️ Dropped a micro-batch result: {e}")
+
+        longest = self._padded_length(max(len(r.tokens) for r in batch))
+        with self._stats_lock:
+            self._stats['requests'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['token_slots'] += sum(len(r.tokens) for r in batch)
+            self._stats['padded_slots'] += longest * len(batch)
+            self._stats['queue_wait_total'] += sum(started - r.enqueued_at for r in batch)
+            self._batch_sizes[len(batch)] += 1
+
+    def get_stats(self) -> dict:
+        """Get batching configuration, batch sizes and padding waste"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+
+        padded = stats.pop('padded_slots')
+        real = stats.pop('token_slots')
+        wait_total = stats.pop('queue_wait_total')
+        return {
+            **stats,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'max_padding_ratio': self.max_padding_ratio,
+            'bucket_edges': self.bucket_edges,
+            'avg_batch_size': stats['requests'] / stats['batches'] if stats['batches'] else 0,
+            'padding_waste': (padded - real) / padded if padded else 0,
+            'avg_queue_wait_ms': wait_total / stats['requests'] * 1000.0 if stats['requests'] else 0,
+            'batch_sizes': batch_sizes
+        }
+
+    def shutdown(self):
+        """Stop the scheduler thread"""
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Optimized Model Cache
+
+ONNX Runtime re-runs graph optimization every time a session is built from
+kokoro-v1.0.onnx. The first session saves its optimized graph here
+(optimized_model_filepath); later sessions load that artifact with graph
+optimization disabled. Artifacts are keyed by model hash, ORT version, CPU
+architecture and session profile, so a new model, ORT upgrade or profile
+change builds a fresh one and stale artifacts of the same model file are
+removed.
+"""
+
+import os
+import json
+import glob
+import hashlib
+import logging
+import platform
+import threading
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZED_MODEL_DIR = os.environ.get(
+    'MAGIC_UNICORN_OPTIMIZED_MODEL_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'magic_unicorn', 'optimized_models')
+)
+
+_index_lock = threading.Lock()
+
+
+def _model_hash(model_path: str, cache_dir: str) -> str:
+    """
+    SHA-256 of the model file, remembered in the cache dir per (size, mtime)
+
+    Hashing a few hundred MB on every worker start would eat much of the time
+    the cache saves, so the digest is stored next to the artifacts.
+    """
+    model_path = os.path.abspath(model_path)
+    stat = os.stat(model_path)
+    index_path = os.path.join(cache_dir, 'model_hashes.json')
+
+    with _index_lock:
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            index = {}
+
+        entry = index.get(model_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        from synthesis_cache import model_fingerprint
+        digest = model_fingerprint(model_path)
+
+        index[model_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            logger.warning(f"Could not update model hash index: {e}")
+        return digest
+
+
+def optimized_model_path(model_path: str, profile_name: str, settings: dict, cache_dir: str) -> str:
+    """Path of the optimized artifact for a model, ORT version and profile"""
+    import onnxruntime as ort
+
+    material = json.dumps({
+        'model': _model_hash(model_path, cache_dir),
+        'onnxruntime': ort.__version__,
+        'machine': platform.machine(),
+        'profile': profile_name,
+        'graph_optimization_level': settings.get('graph_optimization_level'),
+        'providers': settings.get('providers')
+    }, sort_keys=True)
+    key = hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+    # The location is part of the name so same-named models in different dirs don't clean up each other's artifacts
+    location = hashlib.sha256(os.path.abspath(model_path).encode('utf-8')).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{location}.{profile_name}.{key}.onnx")
+
+
+def _remove_stale(path: str):
+    """Remove artifacts of the same model file and profile built under older keys"""
+    stem_profile = os.path.basename(path).rsplit('.', 2)[0]
+    pattern = os.path.join(glob.escape(os.path.dirname(path)), f"{glob.escape(stem_profile)}.*.onnx")
+    for stale in glob.glob(pattern):
+        if stale != path:
+            try:
+                os.unlink(stale)
+                logger.info(f"🧹 Removed stale optimized model {os.path.basename(stale)}")
+            except OSError:
+                pass
+
+
+def create_cached_session(model_path: str, options, providers: list[str], profile_name: str,
+                          settings: dict, cache_dir: str = OPTIMIZED_MODEL_DIR):
+    """
+    Create an InferenceSession, loading or saving the optimized graph
+
+    Args:
+        model_path: Path to the original ONNX model
+        options: SessionOptions built for the profile (modified in place)
+        providers: Execution providers
+        profile_name: Session profile name (part of the cache key)
+        settings: Profile settings (graph-affecting ones are part of the key)
+        cache_dir: Artifact directory
+
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    import onnxruntime as ort
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = optimized_model_path(model_path, profile_name, settings, cache_dir)
+    except OSError as e:
+        logger.warning(f"⚠️ Optimized model cache unavailable: {e}")
+        return ort.InferenceSession(model_path, options, providers=providers)
+
+    if os.path.exists(path):
+        optimization_level = options.graph_optimization_level
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            session = ort.InferenceSession(path, options, providers=providers)
+            logger.info(f"⚡ Loaded pre-optimized model {os.path.basename(path)}")
+            return session
+        except Exception as e:
+            logger.warning(f"⚠️ Discarding unreadable optimized model {path}: {e}")
+            options.graph_optimization_level = optimization_level
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    # Save the optimized graph as a side effect of building this session
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    options.optimized_model_filepath = temp_path
+    session = ort.InferenceSession(model_path, options, providers=providers)
+
+    try:
+        os.replace(temp_path, path)
+        logger.info(f"💾 Saved optimized model {os.path.basename(path)}")
+        _remove_stale(path)
+    except OSError as e:
+        logger.warning(f"Could not save optimized model: {e}")
+    return session
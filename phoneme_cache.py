@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Phoneme/Token Cache for the Kokoro G2P Front End
+
+Memoizes phonemization + tokenization (espeak-based G2P) per sentence and,
+optionally, per word, in bounded LRU tables keyed by (text, lang). Lookups
+return ready-to-run int64 token arrays.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from text_segmentation import split_sentences
+
+
+class _LRUTable:
+    """Small thread-safe LRU map with hit/miss counters"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0
+            }
+
+
+class PhonemeCache:
+    """Memoized phonemize + tokenize for the Kokoro tokenizer"""
+
+    def __init__(self, tokenizer, max_sentences: int = 4096, max_words: int = 32768,
+                 word_level: bool = False):
+        """
+        Initialize the phoneme cache
+
+        Args:
+            tokenizer: Kokoro tokenizer providing phonemize() and tokenize()
+            max_sentences: Maximum cached sentences
+            max_words: Maximum cached words
+            word_level: Phonemize uncached sentences word by word so words are
+                reused across sentences. Faster for varied text, but loses the
+                cross-word context espeak uses, so it is off by default.
+        """
+        self.tokenizer = tokenizer
+        self.word_level = word_level
+        self._sentences = _LRUTable(max_sentences)
+        self._words = _LRUTable(max_words)
+        self._space = np.array(tokenizer.tokenize(" "), dtype=np.int64)
+
+    def _tokenize(self, phonemes: str) -> np.ndarray:
+        tokens = np.array(self.tokenizer.tokenize(phonemes), dtype=np.int64)
+        tokens.setflags(write=False)
+        return tokens
+
+    def _word_tokens(self, word: str, lang: str) -> np.ndarray:
+        key = (word, lang)
+        tokens = self._words.get(key)
+        if tokens is None:
+            tokens = self._tokenize(self.tokenizer.phonemize(word, lang))
+            self._words.put(key, tokens)
+        return tokens
+
+    def _sentence_tokens(self, sentence: str, lang: str) -> np.ndarray:
+        key = (sentence, lang)
+        tokens = self._sentences.get(key)
+        if tokens is not None:
+            return tokens
+
+        if self.word_level:
+            words = [self._word_tokens(word, lang) for word in sentence.split()]
+            tokens = self._join(words)
+            tokens.setflags(write=False)
+        else:
+            tokens = self._tokenize(self.tokenizer.phonemize(sentence, lang))
+
+        self._sentences.put(key, tokens)
+        return tokens
+
+    def _join(self, parts: list[np.ndarray]) -> np.ndarray:
+        """Concatenate token arrays with a space token between them"""
+        joined = []
+        for i, part in enumerate(parts):
+            if i:
+                joined.append(self._space)
+            joined.append(part)
+        return np.concatenate(joined) if joined else np.zeros(0, dtype=np.int64)
+
+    def tokens(self, text: str, lang: str) -> np.ndarray:
+        """
+        Get the int64 token array for text
+
+        Args:
+            text: Text to phonemize
+            lang: Language code
+
+        Returns:
+            Token array (read-only when served straight from the cache)
+        """
+        sentences = split_sentences(text)
+        if len(sentences) == 1:
+            return self._sentence_tokens(sentences[0], lang)
+        return self._join([self._sentence_tokens(sentence, lang) for sentence in sentences])
+
+    def get_stats(self) -> dict:
+        """Get hit ratios of the sentence and word tables"""
+        return {
+            'word_level': self.word_level,
+            'sentences': self._sentences.stats(),
+            'words': self._words.stats()
+        }
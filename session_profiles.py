@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime Session Tuning Profiles
+
+Named SessionOptions presets (latency, throughput, low_memory) applied to
+every InferenceSession the project creates. Profiles can be overridden or
+extended from a JSON file, and the active one is picked at startup with
+MAGIC_UNICORN_SESSION_PROFILE:
+
+    {"profiles": {"throughput": {"intra_op_num_threads": 2},
+                  "pinned": {"base": "latency", "intra_op_thread_affinities": "1;2;3"}}}
+"""
+
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = os.environ.get('MAGIC_UNICORN_SESSION_PROFILE', 'latency')
+PROFILES_CONFIG_PATH = os.environ.get('MAGIC_UNICORN_SESSION_PROFILES')
+
+
+def _physical_cores() -> int:
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    except ImportError:
+        return os.cpu_count() or 1
+
+
+BUILTIN_PROFILES = {
+    # One request at a time as fast as possible: all physical cores, spinning threads
+    'latency': {
+        'intra_op_num_threads': _physical_cores(),
+        'inter_op_num_threads': 1,
+        'execution_mode': 'sequential',
+        'graph_optimization_level': 'all',
+        'enable_cpu_mem_arena': True,
+        'enable_mem_pattern': True,
+        'allow_spinning': True,
+        'intra_op_thread_affinities': None,
+        'providers': ['CPUExecutionProvider']
+    },
+    # Many concurrent sessions/workers: few threads each, no busy-waiting
+    'throughput': {
+        'intra_op_num_threads': 2,
+        'inter_op_num_threads': 1,
+        'execution_mode': 'sequential',
+        'graph_optimization_level': 'all',
+        'enable_cpu_mem_arena': True,
+        'enable_mem_pattern': True,
+        'allow_spinning': False,
+        'intra_op_thread_affinities': None,
+        'providers': ['CPUExecutionProvider']
+    },
+    # Small footprint: no arena or memory patterns, single thread
+    'low_memory': {
+        'intra_op_num_threads': 1,
+        'inter_op_num_threads': 1,
+        'execution_mode': 'sequential',
+        'graph_optimization_level': 'basic',
+        'enable_cpu_mem_arena': False,
+        'enable_mem_pattern': False,
+        'allow_spinning': False,
+        'intra_op_thread_affinities': None,
+        'providers': ['CPUExecutionProvider']
+    }
+}
+
+_GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL'
+}
+
+_EXECUTION_MODES = {
+    'sequential': 'ORT_SEQUENTIAL',
+    'parallel': 'ORT_PARALLEL'
+}
+
+
+def load_profiles(config_path: str | None = None) -> dict:
+    """
+    Get the built-in profiles merged with the JSON config file, if any
+
+    Entries in the file override built-in settings of the same name; new
+    profiles start from the profile named by "base" (default "latency").
+    """
+    profiles = {name: dict(settings) for name, settings in BUILTIN_PROFILES.items()}
+
+    config_path = config_path or PROFILES_CONFIG_PATH
+    if not config_path:
+        return profiles
+
+    try:
+        with open(config_path) as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"⚠️ Could not load session profiles from {config_path}: {e}")
+        return profiles
+
+    for name, settings in config.get('profiles', {}).items():
+        settings = dict(settings)
+        base = profiles.get(settings.pop('base', name), profiles['latency'])
+        profiles[name] = {**base, **settings}
+    return profiles
+
+
+def get_profile(name: str | None = None, config_path: str | None = None) -> tuple[str, dict]:
+    """
+    Resolve a profile by name (None = the startup default)
+
+    Raises:
+        ValueError: If no profile has that name
+    """
+    name = name or DEFAULT_PROFILE
+    profiles = load_profiles(config_path)
+    if name not in profiles:
+        raise ValueError(f"Unknown session profile '{name}' (available: {', '.join(profiles)})")
+    return name, profiles[name]
+
+
+def build_session_options(settings: dict):
+    """Build ORT SessionOptions from profile settings"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    if settings.get('intra_op_num_threads'):
+        options.intra_op_num_threads = int(settings['intra_op_num_threads'])
+    if settings.get('inter_op_num_threads'):
+        options.inter_op_num_threads = int(settings['inter_op_num_threads'])
+
+    options.execution_mode = getattr(ort.ExecutionMode, _EXECUTION_MODES[settings.get('execution_mode', 'sequential')])
+    options.graph_optimization_level = getattr(
+        ort.GraphOptimizationLevel, _GRAPH_OPTIMIZATION_LEVELS[settings.get('graph_optimization_level', 'all')]
+    )
+    options.enable_cpu_mem_arena = bool(settings.get('enable_cpu_mem_arena', True))
+    options.enable_mem_pattern = bool(settings.get('enable_mem_pattern', True))
+
+    options.add_session_config_entry('session.intra_op.allow_spinning', '1' if settings.get('allow_spinning', True) else '0')
+    options.add_session_config_entry('session.inter_op.allow_spinning', '1' if settings.get('allow_spinning', True) else '0')
+    if settings.get('intra_op_thread_affinities'):
+        options.add_session_config_entry('session.intra_op_thread_affinities', settings['intra_op_thread_affinities'])
+
+    return options
+
+
+def create_inference_session(model_path: str, profile: str | None = None,
+                             use_optimized_cache: bool = True, **overrides):
+    """
+    Create an InferenceSession tuned with a session profile
+
+    Args:
+        model_path: Path to the ONNX model
+        profile: Profile name (None = MAGIC_UNICORN_SESSION_PROFILE or latency)
+        use_optimized_cache: Load/save the optimized graph in the optimized
+            model cache (disabled when MAGIC_UNICORN_OPTIMIZED_MODEL_DIR is empty)
+        **overrides: Settings that replace the profile's, e.g. intra_op_num_threads
+
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    import onnxruntime as ort
+    from optimized_model_cache import OPTIMIZED_MODEL_DIR, create_cached_session
+
+    name, settings = get_profile(profile)
+    settings = {**settings, **{key: value for key, value in overrides.items() if value is not None}}
+    options = build_session_options(settings)
+
+    logger.info(f"⚙️ Creating ONNX Runtime session with '{name}' profile "
+                f"({settings['intra_op_num_threads']} intra-op threads)")
+    if use_optimized_cache and OPTIMIZED_MODEL_DIR and settings.get('graph_optimization_level') != 'disable':
+        return create_cached_session(model_path, options, settings['providers'], name, settings)
+    return ort.InferenceSession(model_path, options, providers=settings['providers'])
+
+
+def describe_profile(profile: str | None = None) -> dict:
+    """Get a profile's name and settings for status endpoints"""
+    from optimized_model_cache import OPTIMIZED_MODEL_DIR
+
+    try:
+        name, settings = get_profile(profile)
+    except ValueError as e:
+        return {'name': profile, 'error': str(e)}
+    return {'name': name, 'settings': settings, 'optimized_model_dir': OPTIMIZED_MODEL_DIR or None}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Shared Memory Audio Handoff
+
+Passes synthesized audio from worker processes to the web server through a
+POSIX shared memory segment (/dev/shm) holding a small header and the raw
+samples. The reader maps the segment and wraps it as a NumPy view, so the
+audio is never copied or written to disk.
+"""
+
+import os
+import mmap
+import struct
+import tempfile
+import numpy as np
+
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# magic, dtype string (e.g. b'<f4'), sample count
+HEADER = struct.Struct("<4s8sQ")
+HEADER_MAGIC = b"KAUD"
+HEADER_SIZE = 64  # keeps the sample data 64-byte aligned
+
+
+def segment_name(job_id: str) -> str:
+    """Get the shared memory segment name used for a synthesis job"""
+    return f"kokoro_audio_{job_id}"
+
+
+def _segment_path(name: str) -> str:
+    return os.path.join(SHM_DIR, name)
+
+
+def write_shared_audio(name: str, audio: np.ndarray) -> int:
+    """
+    Write audio into a new shared memory segment
+
+    Args:
+        name: Segment name (see segment_name)
+        audio: 1-D audio samples
+
+    Returns:
+        Number of samples written
+    """
+    audio = np.ascontiguousarray(audio).reshape(-1)
+    dtype = audio.dtype.str.encode()
+
+    fd = os.open(_segment_path(name), os.O_CREAT | os.O_EXCL | os.O_RDWR, 0o600)
+    try:
+        os.ftruncate(fd, HEADER_SIZE + audio.nbytes)
+        with mmap.mmap(fd, HEADER_SIZE + audio.nbytes) as buffer:
+            HEADER.pack_into(buffer, 0, HEADER_MAGIC, dtype, len(audio))
+            samples = np.ndarray(len(audio), dtype=audio.dtype, buffer=buffer, offset=HEADER_SIZE)
+            samples[:] = audio
+            del samples  # release the export before the mapping closes
+    finally:
+        os.close(fd)
+
+    return len(audio)
+
+
+def attach_shared_audio(name: str) -> np.ndarray:
+    """
+    Map a shared memory segment as a NumPy array without copying it
+
+    The segment name is unlinked straight away; the memory itself is released
+    once the returned array is garbage collected.
+    """
+    path = _segment_path(name)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # Copy-on-write mapping: shared pages, but callers may still modify the array
+        buffer = mmap.mmap(fd, 0, access=mmap.ACCESS_COPY)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+    magic, dtype, length = HEADER.unpack_from(buffer, 0)
+    if magic != HEADER_MAGIC:
+        raise ValueError(f"Invalid shared audio segment: {name}")
+
+    return np.frombuffer(buffer, dtype=np.dtype(dtype.rstrip(b"\0").decode()),
+                         count=length, offset=HEADER_SIZE)
+
+
+def discard_shared_audio(name: str):
+    """Remove a segment that will never be attached (e.g. after a failed job)"""
+    try:
+        os.unlink(_segment_path(name))
+    except FileNotFoundError:
+        pass
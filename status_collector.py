@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Background System Status Collector
+
+Status probes (lsmod, xrt-smi, sensors, provider imports, file checks) are
+slow and spawn processes, so they run on background threads, each on its
+own interval, and update a shared snapshot. Endpoints read the snapshot and
+never wait for a probe.
+"""
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StatusCollector:
+    """Periodically refreshed snapshot of system status probes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._probes = {}     # name -> probe state
+        self._stop = threading.Event()
+        self._threads = []
+
+    def register(self, name: str, probe, interval: float, defaults: dict):
+        """
+        Add a probe
+
+        Args:
+            name: Probe name
+            probe: Callable returning a dict of status fields
+            interval: Seconds between refreshes
+            defaults: Fields reported until the probe first succeeds
+        """
+        with self._lock:
+            self._probes[name] = {
+                'probe': probe,
+                'interval': interval,
+                'values': dict(defaults),
+                'updated_at': None,
+                'duration': None,
+                'error': None,
+                'runs': 0
+            }
+
+    def refresh(self, name: str):
+        """Run one probe now and store its result"""
+        probe = self._probes[name]['probe']
+        start = time.time()
+        try:
+            values = probe()
+            error = None
+        except Exception as e:
+            values = None
+            error = str(e)
+            logger.warning(f"Status probe '{name}' failed: {e}")
+
+        with self._lock:
+            state = self._probes[name]
+            if values is not None:
+                state['values'].update(values)
+                state['updated_at'] = time.time()
+            state['duration'] = time.time() - start
+            state['error'] = error
+            state['runs'] += 1
+
+    def _run(self, name: str):
+        interval = self._probes[name]['interval']
+        while True:
+            self.refresh(name)
+            if self._stop.wait(interval):
+                return
+
+    def start(self):
+        """Start one refresh thread per probe (the first refresh runs immediately)"""
+        if self._threads:
+            return
+        for name in self._probes:
+            thread = threading.Thread(target=self._run, args=(name,), name=f'status-probe-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop the refresh threads"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def snapshot(self) -> dict:
+        """Get the latest fields of all probes merged into one dict"""
+        with self._lock:
+            merged = {}
+            for state in self._probes.values():
+                merged.update(state['values'])
+            return merged
+
+    def describe(self) -> dict:
+        """Get per-probe timestamps, ages, durations and errors"""
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    'interval_seconds': state['interval'],
+                    'updated_at': state['updated_at'],
+                    'age_seconds': now - state['updated_at'] if state['updated_at'] else None,
+                    'duration_seconds': state['duration'],
+                    'error': state['error'],
+                    'runs': state['runs']
+                }
+                for name, state in self._probes.items()
+            }
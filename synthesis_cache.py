@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Synthesis Cache
+
+Caches synthesized audio keyed by a hash of (normalized text, voice, speed,
+lang, model file hash), with an in-memory LRU tier in front of an on-disk
+tier. Both tiers are bounded by total bytes and evict least recently used
+entries first.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+@lru_cache(maxsize=16)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def model_fingerprint(model_path: str) -> str:
+    """
+    Get the SHA-256 of a model file
+
+    The hash is computed once per (path, size, mtime), so replacing the model
+    file changes the fingerprint without rehashing on every request.
+    """
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        # Model lives elsewhere (e.g. only inside the worker venv): fall back to the path
+        return hashlib.sha256(os.path.abspath(model_path).encode()).hexdigest()
+    return _hash_file(model_path, stat.st_size, stat.st_mtime_ns)
+
+
+def cache_key(text: str, voice: str, speed: float, lang: str, model_hash: str) -> str:
+    """Build the content address for a synthesis request"""
+    material = "\x1f".join([normalize_text(text), voice, f"{float(speed):.4f}", lang, model_hash])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SynthesisCache:
+    """Two-tier (memory + disk) LRU cache of synthesized audio"""
+
+    def __init__(self, memory_max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: str | None = None,
+                 disk_max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initialize the synthesis cache
+
+        Args:
+            memory_max_bytes: Byte budget of the in-memory tier
+            disk_dir: Directory of the on-disk tier (None disables it)
+            disk_max_bytes: Byte budget of the on-disk tier
+        """
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # key -> (audio, sample_rate)
+        self._memory_bytes = 0
+        self._disk = OrderedDict()     # key -> (path, size, sample_rate)
+        self._disk_bytes = 0
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        """Rebuild the disk index from existing files, oldest first"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".tmp"):
+                # Left behind by a write interrupted in a previous run
+                try:
+                    os.unlink(os.path.join(self.disk_dir, name))
+                except OSError:
+                    pass
+                continue
+            parts = name.split(".")
+            if len(parts) != 3 or parts[2] != "npy" or not parts[1].isdigit():
+                continue
+            path = os.path.join(self.disk_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, parts[0], path, stat.st_size, int(parts[1])))
+
+        for _, key, path, size, sample_rate in sorted(entries):
+            self._disk[key] = (path, size, sample_rate)
+            self._disk_bytes += size
+
+        if entries:
+            logger.info(f"💾 Synthesis cache: {len(entries)} entries on disk ({self._disk_bytes / 1e6:.1f} MB)")
+
+    def get(self, key: str) -> tuple[np.ndarray, int] | None:
+        """Look up cached audio, promoting disk hits into memory"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry
+
+            disk_entry = self._disk.get(key)
+            if disk_entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._disk.move_to_end(key)
+
+        path, _, sample_rate = disk_entry
+        try:
+            audio = np.load(path)
+        except (OSError, ValueError, EOFError) as e:
+            # Missing, truncated or not an array: evict it and synthesize again
+            logger.warning(f"Synthesis cache dropping unreadable {os.path.basename(path)}: {e}")
+            with self._lock:
+                self._drop_disk_entry(key)
+                self._stats['misses'] += 1
+            return None
+
+        os.utime(path)
+        audio.setflags(write=False)
+        with self._lock:
+            self._stats['disk_hits'] += 1
+            self._put_memory(key, audio, sample_rate)
+        return audio, sample_rate
+
+    def put(self, key: str, audio: np.ndarray, sample_rate: int):
+        """Store a read-only copy of the audio in both tiers"""
+        # Cached arrays are shared with every hit, so the caller's array is
+        # left writable and the cache keeps its own frozen copy
+        audio = np.array(audio, copy=True)
+        audio.setflags(write=False)
+        with self._lock:
+            self._put_memory(key, audio, sample_rate)
+
+        if self.disk_dir and audio.nbytes <= self.disk_max_bytes:
+            self._put_disk(key, audio, sample_rate)
+
+    def _put_memory(self, key: str, audio: np.ndarray, sample_rate: int):
+        if audio.nbytes > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+
+        self._memory[key] = (audio, sample_rate)
+        self._memory_bytes += audio.nbytes
+        while self._memory_bytes > self.memory_max_bytes:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self._stats['evictions'] += 1
+
+    def _put_disk(self, key: str, audio: np.ndarray, sample_rate: int):
+        with self._lock:
+            if key in self._disk:
+                return
+        path = os.path.join(self.disk_dir, f"{key}.{sample_rate}.npy")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.save(f, audio)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Synthesis cache disk write failed: {e}")
+            return
+
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._disk:
+                return
+            self._disk[key] = (path, size, sample_rate)
+            self._disk_bytes += size
+            while self._disk_bytes > self.disk_max_bytes:
+                self._drop_disk_entry(next(iter(self._disk)))
+                self._stats['evictions'] += 1
+
+    def _drop_disk_entry(self, key: str):
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return    # already evicted by another thread
+        path, size, _ = entry
+        self._disk_bytes -= size
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and tier usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'memory_max_bytes': self.memory_max_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'disk_max_bytes': self.disk_max_bytes if self.disk_dir else 0
+            })
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0
+        return stats
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Kokoro Synthesis Worker
+
+Long-lived worker process started by SynthesisWorkerPool. Loads the Kokoro
+model once in a clean interpreter and serves synthesis jobs read as JSON lines
+from stdin, answering each job with one JSON line on stdout.
+"""
+
+import sys
+import os
+import json
+import time
+import traceback
+
+
+def clean_sys_path(kokoro_src: str):
+    """Remove conflicting onnxruntime build paths and add the kokoro source"""
+    sys.path = [
+        path for path in sys.path
+        if "onnxruntime/build" not in path and "onnxruntime/onnxruntime" not in path
+    ]
+    if kokoro_src not in sys.path:
+        sys.path.insert(0, kokoro_src)
+
+
+def main() -> int:
+    model_path, voices_path, kokoro_src = sys.argv[1:4]
+
+    # Keep a private copy of stdout for the job protocol and point fd 1 at
+    # stderr, so warnings printed by onnxruntime/espeak can't corrupt replies
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(message: dict):
+        protocol_out.write(json.dumps(message) + '\n')
+        protocol_out.flush()
+
+    clean_sys_path(kokoro_src)
+
+    try:
+        from kokoro_onnx import Kokoro
+        from shared_audio import write_shared_audio
+        from session_profiles import create_inference_session
+        from voice_store import VoiceStore
+        from voice_blending import VoiceBlender
+
+        if hasattr(Kokoro, 'from_session'):
+            # Session tuned with the profile from MAGIC_UNICORN_SESSION_PROFILE
+            kokoro = Kokoro.from_session(create_inference_session(model_path), voices_path)
+        else:
+            # Only build the tuned session when Kokoro can use it, or the model loads twice
+            print("kokoro-onnx has no Kokoro.from_session; session profiles and optimized models don't apply",
+                  file=sys.stderr)
+            kokoro = Kokoro(model_path, voices_path)
+
+        # Style tables come from the memory-mapped store shared by all workers;
+        # blend specs and named blends are mixed from it
+        voice_blender = VoiceBlender(VoiceStore(voices_path))
+    except Exception as e:
+        send({
+            "ready": False,
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        })
+        return 1
+
+    send({"ready": True, "pid": os.getpid()})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Stage boundaries (seconds since the job arrived), reported back as
+        # timings for metrics and as spans for request traces
+        job_start = time.perf_counter()
+        marks = []
+        job = None
+
+        def mark(stage: str):
+            marks.append((stage, time.perf_counter() - job_start))
+
+        try:
+            job = json.loads(line)
+            if job.get("command") == "shutdown":
+                break
+
+            lang = job.get("lang", "en-us")
+            voice_style = voice_blender.resolve(job["voice"])
+            mark("voice_resolve")
+
+            # Phonemize separately so the two stages can be timed
+            tokenizer = getattr(kokoro, "tokenizer", None)
+            phonemes = tokenizer.phonemize(job["text"], lang) if tokenizer is not None else None
+            mark("phonemize")
+
+            if phonemes is not None:
+                audio, sample_rate = kokoro.create(
+                    phonemes, voice_style, speed=job.get("speed", 1.0), lang=lang, is_phonemes=True
+                )
+            else:
+                audio, sample_rate = kokoro.create(
+                    job["text"], voice_style, speed=job.get("speed", 1.0), lang=lang
+                )
+            mark("inference")
+
+            # Hand audio back through shared memory instead of a temp file
+            write_shared_audio(job["audio_segment"], audio)
+            mark("shared_memory_write")
+
+            spans = []
+            previous = 0.0
+            for stage, end in marks:
+                spans.append({"name": stage, "start": previous, "duration": end - previous})
+                previous = end
+
+            send({
+                "job_id": job["job_id"],
+                "success": True,
+                "sample_rate": sample_rate,
+                "audio_samples": len(audio),
+                "audio_segment": job["audio_segment"],
+                "method_used": "Real Kokoro TTS",
+                "voice": job["voice"],
+                "timings": {span["name"]: span["duration"] for span in spans},
+                "spans": spans
+            })
+        except Exception as e:
+            job_id = job.get("job_id") if isinstance(job, dict) else None
+            if job_id is None:
+                # No job_id to reply to, so only report it
+                print(f"Ignoring malformed job line: {e}", file=sys.stderr, flush=True)
+                continue
+            send({
+                "job_id": job_id,
+                "success": False,
+                "error": str(e),
+                "traceback": traceback.format_exc()
+            })
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Kokoro Synthesis Worker Pool
+
+Keeps a pool of warm synthesis worker processes (see synthesis_worker.py) so
+the Kokoro model is loaded once per worker instead of once per request. Each
+worker runs in the project venv interpreter with the same clean import
+environment the per-request subprocess used.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+import subprocess
+
+import tracing
+from shared_audio import segment_name, attach_shared_audio, discard_shared_audio
+
+logger = logging.getLogger(__name__)
+
+# Default locations of the Kokoro NPU project
+KOKORO_PROJECT_DIR = "/home/ucadmin/Development/kokoro_npu_project"
+DEFAULT_PYTHON = os.path.join(KOKORO_PROJECT_DIR, "venv", "bin", "python")
+DEFAULT_PYTHONPATH = os.path.join(KOKORO_PROJECT_DIR, "venv", "lib", "python3.12", "site-packages")
+DEFAULT_MODEL_PATH = os.path.join(KOKORO_PROJECT_DIR, "kokoro-v1.0.onnx")
+DEFAULT_VOICES_PATH = os.path.join(KOKORO_PROJECT_DIR, "voices-v1.0.bin")
+DEFAULT_KOKORO_SRC = os.path.join(KOKORO_PROJECT_DIR, "kokoro-onnx", "src")
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "synthesis_worker.py")
+
+
+class SynthesisWorker:
+    """A single long-lived synthesis worker process"""
+
+    def __init__(self, worker_id: int, command: list[str], env: dict):
+        self.worker_id = worker_id
+        self.command = command
+        self.env = env
+        self.process = None
+        self.jobs_completed = 0
+        self._messages = queue.Queue()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout: float):
+        """Start the worker process and wait until the model is loaded"""
+        self.jobs_completed = 0
+        self._messages = queue.Queue()
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=self.env,
+            text=True,
+            bufsize=1
+        )
+        threading.Thread(
+            target=self._read_messages,
+            args=(self.process, self._messages),
+            daemon=True
+        ).start()
+
+        try:
+            message = self._next_message(timeout)
+        except Exception:
+            self.stop()
+            raise
+
+        if not message.get("ready"):
+            self.stop()
+            raise RuntimeError(f"Worker {self.worker_id} failed to load model: {message.get('error')}")
+
+        logger.info(f"🔥 Synthesis worker {self.worker_id} ready (pid {message.get('pid')})")
+
+    @staticmethod
+    def _read_messages(process, messages):
+        """Forward every protocol line from the worker into the message queue"""
+        with process.stdout:
+            for line in process.stdout:
+                line = line.strip()
+                if line:
+                    messages.put(line)
+        messages.put(None)
+
+    def _next_message(self, timeout: float) -> dict:
+        try:
+            line = self._messages.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Worker {self.worker_id} did not respond within {timeout:.0f}s")
+
+        if line is None:
+            raise RuntimeError(f"Worker {self.worker_id} exited with code {self.process.wait()}")
+        return json.loads(line)
+
+    def run_job(self, job: dict, timeout: float) -> dict:
+        """Send one job to the worker and wait for the reply carrying its job_id"""
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            reply = self._next_message(max(0.0, deadline - time.monotonic()))
+            if not isinstance(reply, dict):
+                raise ValueError(f"Worker {self.worker_id} sent a malformed reply: {reply!r}")
+            if reply.get("job_id") == job["job_id"]:
+                break
+
+            # A late reply to a job that was already given up on: drop it and its audio
+            logger.warning(f"⚠️ Worker {self.worker_id} discarded a reply for job {reply.get('job_id')} "
+                           f"while waiting for {job['job_id']}")
+            if reply.get("audio_segment"):
+                discard_shared_audio(reply["audio_segment"])
+
+        self.jobs_completed += 1
+        return reply
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the worker to exit, killing it if it does not"""
+        # Take the process first so a concurrent stop() (pool shutdown racing a
+        # restart) finds nothing left to stop
+        process, self.process = self.process, None
+        if process is None:
+            return
+
+        try:
+            if process.poll() is None:
+                process.stdin.write(json.dumps({"command": "shutdown"}) + "\n")
+                process.stdin.flush()
+            process.wait(timeout=timeout)
+        except Exception:
+            process.kill()
+            process.wait()
+        finally:
+            # stdout is closed by the reader thread once it sees EOF
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+
+class SynthesisWorkerPool:
+    """Pool of warm Kokoro synthesis workers fed over stdin/stdout pipes"""
+
+    def __init__(self, pool_size: int = 2, max_jobs_per_worker: int = 200,
+                 job_timeout: float = 30.0, startup_timeout: float = 120.0,
+                 python_executable: str = DEFAULT_PYTHON,
+                 pythonpath: str = DEFAULT_PYTHONPATH,
+                 model_path: str = DEFAULT_MODEL_PATH,
+                 voices_path: str = DEFAULT_VOICES_PATH,
+                 kokoro_src: str = DEFAULT_KOKORO_SRC,
+                 session_profile: str | None = None):
+        """
+        Initialize the worker pool (workers are started by start())
+
+        Args:
+            pool_size: Number of worker processes
+            max_jobs_per_worker: Restart a worker after this many jobs (0 disables)
+            job_timeout: Seconds to wait for a worker and for each job
+            startup_timeout: Seconds to wait for a worker to load the model
+            python_executable: Interpreter used for the workers
+            pythonpath: PYTHONPATH given to the workers
+            model_path: Path to Kokoro ONNX model
+            voices_path: Path to voices file
+            kokoro_src: Path to the kokoro-onnx source tree
+            session_profile: ONNX Runtime tuning profile for the workers' sessions
+                (None = inherit MAGIC_UNICORN_SESSION_PROFILE)
+        """
+        self.pool_size = max(1, pool_size)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self.startup_timeout = startup_timeout
+        self.session_profile = session_profile
+
+        env = os.environ.copy()
+        env['PYTHONPATH'] = pythonpath
+        if session_profile:
+            env['MAGIC_UNICORN_SESSION_PROFILE'] = session_profile
+        command = [python_executable, WORKER_SCRIPT, model_path, voices_path, kokoro_src]
+
+        self._workers = [SynthesisWorker(i, command, env) for i in range(self.pool_size)]
+        self._idle = queue.Queue()
+        self._shutdown = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {'jobs': 0, 'failures': 0, 'restarts': 0}
+
+    def start(self):
+        """Start all workers in parallel and wait (up to startup_timeout) for them to load the model"""
+        threads = [
+            threading.Thread(target=self._start_worker, args=(worker,), daemon=True)
+            for worker in self._workers
+        ]
+        for thread in threads:
+            thread.start()
+
+        deadline = time.monotonic() + self.startup_timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        logger.info(f"🚀 Synthesis worker pool ready: {self._idle.qsize()}/{self.pool_size} workers")
+
+    def _start_worker(self, worker: SynthesisWorker):
+        """Start a worker, retrying until it comes up or the pool shuts down"""
+        while not self._shutdown.is_set():
+            try:
+                worker.start(self.startup_timeout)
+                if self._shutdown.is_set():
+                    worker.stop()    # the pool shut down while this worker was loading
+                    return
+                self._idle.put(worker)
+                return
+            except Exception as e:
+                logger.error(f"❌ Synthesis worker {worker.worker_id} failed to start: {e}")
+                self._shutdown.wait(5.0)
+
+    def _restart_worker(self, worker: SynthesisWorker, reason: str):
+        """Stop and respawn a worker on a background thread so the caller isn't blocked"""
+        logger.info(f"♻️ Restarting synthesis worker {worker.worker_id}: {reason}")
+        with self._stats_lock:
+            self._stats['restarts'] += 1
+        threading.Thread(target=self._replace_worker, args=(worker,), daemon=True).start()
+
+    def _replace_worker(self, worker: SynthesisWorker):
+        # stop() can wait up to its timeout for a wedged worker to exit
+        worker.stop()
+        self._start_worker(worker)
+
+    def synthesize(self, text: str, voice: str, speed: float = 1.0,
+                   lang: str = "en-us") -> dict:
+        """
+        Synthesize speech on the next idle worker
+
+        Returns:
+            Result dict with 'success', 'audio_data', 'sample_rate', 'method_used'
+            and 'voice' (or 'error'), plus 'timings' (queue_wait, phonemize,
+            inference seconds)
+        """
+        wait_start = time.perf_counter()
+        try:
+            with tracing.span('queue_wait'):
+                worker = self._idle.get(timeout=self.job_timeout)
+        except queue.Empty:
+            return {
+                'success': False,
+                'error': f"No synthesis worker became available within {self.job_timeout:.0f}s"
+            }
+
+        queue_wait = time.perf_counter() - wait_start
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'audio_segment': segment_name(job_id),
+            'text': text,
+            'voice': voice,
+            'speed': speed,
+            'lang': lang
+        }
+
+        try:
+            with tracing.span('worker_job', worker=worker.worker_id) as job_span:
+                reply = worker.run_job(job, self.job_timeout)
+            if job_span is not None:
+                # Nest the worker's own stage timings under the round trip
+                tracing.current_trace().add_remote_spans(reply.get('spans', []), job_span['id'], job_span['start_ms'])
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['failures'] += 1
+            self._restart_worker(worker, str(e))
+            discard_shared_audio(job['audio_segment'])
+            return {'success': False, 'error': f"Synthesis worker failed: {e}"}
+
+        if self.max_jobs_per_worker and worker.jobs_completed >= self.max_jobs_per_worker:
+            self._restart_worker(worker, f"served {worker.jobs_completed} jobs")
+        else:
+            self._idle.put(worker)
+
+        with self._stats_lock:
+            self._stats['jobs'] += 1
+            if not reply['success']:
+                self._stats['failures'] += 1
+
+        if not reply['success']:
+            discard_shared_audio(job['audio_segment'])
+            return {'success': False, 'error': reply['error']}
+
+        with tracing.span('attach_audio'):
+            audio_data = attach_shared_audio(reply['audio_segment'])
+
+        return {
+            'success': True,
+            'audio_data': audio_data,
+            'sample_rate': reply['sample_rate'],
+            'method_used': reply['method_used'],
+            'voice': reply['voice'],
+            'timings': {'queue_wait': queue_wait, **reply.get('timings', {})}
+        }
+
+    def get_stats(self) -> dict:
+        """Get pool configuration and job counters"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'pool_size': self.pool_size,
+            'max_jobs_per_worker': self.max_jobs_per_worker,
+            'session_profile': self.session_profile,
+            'workers_alive': sum(1 for worker in self._workers if worker.alive),
+            'workers_idle': self._idle.qsize()
+        }
+
+    def shutdown(self):
+        """Stop all workers"""
+        self._shutdown.set()
+        for worker in self._workers:
+            worker.stop()
+        logger.info("Synthesis worker pool stopped")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Tests for format negotiation and the streaming audio encoders"""
+
+import io
+import struct
+import unittest
+import wave
+
+import numpy as np
+
+from audio_encoding import audio_to_pcm16, create_encoder, encode_audio, negotiate_format
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+SAMPLE_RATE = 24000
+AUDIO = (np.sin(np.arange(SAMPLE_RATE) / 20) * 0.5).astype(np.float32)
+
+
+def stream(audio_format, audio=AUDIO, segment=5000):
+    """Encode audio in segments, returning the chunks the encoder emitted"""
+    encoder = create_encoder(audio_format, SAMPLE_RATE)
+    chunks = [encoder.encode(audio[i:i + segment]) for i in range(0, len(audio), segment)]
+    return chunks + [encoder.finish()]
+
+
+class NegotiateFormatTest(unittest.TestCase):
+
+    def test_explicit_format_wins(self):
+        self.assertEqual(negotiate_format('FLAC', 'audio/wav'), 'flac')
+        self.assertIsNone(negotiate_format('mp3', 'audio/wav'))
+
+    def test_accept_header_quality_and_order(self):
+        self.assertEqual(negotiate_format(None, 'audio/flac;q=0.5, audio/ogg'), 'opus')
+        self.assertEqual(negotiate_format(None, 'audio/l16, audio/flac'), 'pcm')
+        self.assertEqual(negotiate_format(None, 'audio/flac;q=0, audio/x-wav;q=0.1'), 'wav')
+        self.assertEqual(negotiate_format(None, 'audio/flac;q=bad, audio/ogg;q=0.2'), 'opus')
+
+    def test_default(self):
+        self.assertEqual(negotiate_format(None, None), 'wav')
+        self.assertEqual(negotiate_format(None, 'text/html, */*'), 'wav')
+        self.assertEqual(negotiate_format(None, '', default='pcm'), 'pcm')
+
+
+class PCMAndWAVTest(unittest.TestCase):
+
+    def test_pcm16_clips(self):
+        pcm = audio_to_pcm16([-2.0, -1.0, 0.0, 0.5, 2.0])
+        self.assertEqual(pcm.dtype, np.int16)
+        self.assertEqual(pcm.tolist(), [-32767, -32767, 0, 16383, 32767])
+
+    def test_pcm_stream_is_raw_samples(self):
+        self.assertEqual(b''.join(stream('pcm')), audio_to_pcm16(AUDIO).tobytes())
+
+    def test_wav_stream_sends_header_once(self):
+        chunks = stream('wav')
+        self.assertTrue(chunks[0].startswith(b'RIFF'))
+        self.assertFalse(any(chunk.startswith(b'RIFF') for chunk in chunks[1:]))
+        self.assertEqual(struct.unpack('<I', chunks[0][40:44])[0], 0xFFFFFFFF)
+
+        with wave.open(io.BytesIO(b''.join(chunks))) as reader:
+            self.assertEqual(reader.getframerate(), SAMPLE_RATE)
+            samples = np.frombuffer(reader.readframes(len(AUDIO) * 2), dtype=np.int16)
+        np.testing.assert_array_equal(samples, audio_to_pcm16(AUDIO))
+
+    def test_whole_wav_has_real_sizes(self):
+        data = encode_audio(AUDIO, SAMPLE_RATE, 'wav')
+        self.assertEqual(struct.unpack('<I', data[4:8])[0], len(data) - 8)
+        with wave.open(io.BytesIO(data)) as reader:
+            self.assertEqual(reader.getnframes(), len(AUDIO))
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            create_encoder('mp3', SAMPLE_RATE)
+
+
+@unittest.skipIf(soundfile is None, "soundfile is not installed")
+class SoundFileFormatsTest(unittest.TestCase):
+
+    def decode(self, data):
+        return soundfile.read(io.BytesIO(data), dtype='int16')
+
+    def test_streamed_flac_round_trip(self):
+        chunks = stream('flac')
+        # Nothing goes out before the STREAMINFO totals are known
+        self.assertFalse(any(chunks[:-1]))
+
+        samples, sample_rate = self.decode(b''.join(chunks))
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        self.assertEqual(len(samples), len(AUDIO))
+        # Lossless apart from libsndfile rounding where audio_to_pcm16 truncates
+        self.assertLessEqual(np.abs(samples.astype(np.int32) - audio_to_pcm16(AUDIO)).max(), 1)
+
+    def test_whole_flac_matches_stream(self):
+        samples, _ = self.decode(encode_audio(AUDIO, SAMPLE_RATE, 'flac'))
+        streamed, _ = self.decode(b''.join(stream('flac')))
+        np.testing.assert_array_equal(samples, streamed)
+
+    def test_streamed_opus_decodes(self):
+        chunks = stream('opus', segment=SAMPLE_RATE // 4)
+        self.assertTrue(chunks[0].startswith(b'OggS'))
+
+        samples, sample_rate = self.decode(b''.join(chunks))
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        self.assertEqual(len(samples), len(AUDIO))
+
+
+if __name__ == '__main__':
+    unittest.main()
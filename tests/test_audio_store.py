@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Tests for the generated audio store"""
+
+import os
+import mimetypes
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import audio_store
+from audio_store import AudioStore
+
+
+class AudioStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = self.tempdir.name
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def at(self, seconds_from_now):
+        """Run the store as if this many seconds had passed"""
+        return mock.patch.object(audio_store.time, 'time', return_value=time.time() + seconds_from_now)
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_content_addressed_put_and_get(self):
+        store = AudioStore(self.directory)
+        filename = store.put(b'a' * 100)
+        self.assertEqual(store.put(b'a' * 100), filename)
+        self.assertNotEqual(store.put(b'b' * 100, 'flac', 'audio/flac'), filename)
+
+        entry = store.get(filename)
+        self.assertTrue(filename.startswith('real_speech_') and filename.endswith('.wav'))
+        self.assertEqual(entry['etag'], filename[len('real_speech_'):-len('.wav')])
+        self.assertEqual((entry['size'], entry['mimetype']), (100, 'audio/wav'))
+        with open(entry['path'], 'rb') as f:
+            self.assertEqual(f.read(), b'a' * 100)
+
+        stats = store.get_stats()
+        self.assertEqual((stats['stored'], stats['served'], stats['files'], stats['bytes']), (2, 1, 2, 200))
+        self.assertEqual(len(self.files()), 2)
+
+    def test_only_stored_files_are_served(self):
+        store = AudioStore(self.directory)
+        with open(os.path.join(self.directory, 'real_speech_other.wav'), 'wb') as f:
+            f.write(b'x')
+        self.assertIsNone(store.get('real_speech_other.wav'))
+        self.assertIsNone(store.get('../etc/passwd'))
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        store = AudioStore(self.directory, max_bytes=250)
+        first = store.put(b'a' * 100)
+        second = store.put(b'b' * 100)
+        store.get(first)                    # second is now least recently used
+        third = store.put(b'c' * 100)
+
+        self.assertIsNone(store.get(second))
+        self.assertIsNotNone(store.get(first))
+        self.assertIsNotNone(store.get(third))
+        self.assertEqual(self.files(), sorted([first, third]))
+        self.assertEqual(store.get_stats()['evicted'], 1)
+
+    def test_single_oversized_file_is_kept(self):
+        store = AudioStore(self.directory, max_bytes=10)
+        filename = store.put(b'a' * 100)
+        self.assertIsNotNone(store.get(filename))
+
+    def test_expired_files_are_not_served(self):
+        store = AudioStore(self.directory, max_age=60)
+        filename = store.put(b'a' * 100)
+
+        with self.at(30):
+            self.assertIsNotNone(store.get(filename))
+        with self.at(61):
+            self.assertIsNone(store.get(filename))
+        self.assertEqual(self.files(), [])
+        self.assertEqual(store.get_stats()['expired'], 1)
+
+    def test_storing_again_refreshes_the_age(self):
+        store = AudioStore(self.directory, max_age=60)
+        with self.at(-50):
+            filename = store.put(b'a' * 100)
+        store.put(b'a' * 100)
+        with self.at(30):
+            self.assertIsNotNone(store.get(filename))
+
+    def test_sweep_removes_expired_and_over_budget_files(self):
+        store = AudioStore(self.directory, max_age=60)
+        with self.at(-120):
+            store.put(b'old')
+        kept = [store.put(bytes([i]) * 100) for i in range(3)]
+
+        store.max_bytes = 250
+        with self.assertLogs('audio_store', 'INFO'):
+            self.assertEqual(store.sweep(), 2)
+        self.assertEqual(self.files(), sorted(kept[1:]))
+        stats = store.get_stats()
+        self.assertEqual((stats['expired'], stats['evicted'], stats['bytes']), (1, 1, 200))
+        self.assertEqual(store.sweep(), 0)
+
+    def test_restart_adopts_existing_files(self):
+        filename = AudioStore(self.directory).put(b'a' * 100)
+        for stray in ['real_speech_x.wav.1.tmp', 'notes.txt', 'real_speech_noext']:
+            open(os.path.join(self.directory, stray), 'wb').close()
+
+        store = AudioStore(self.directory)
+        self.assertEqual(store.get_stats()['files'], 1)
+        entry = store.get(filename)
+        self.assertEqual((entry['size'], entry['mimetype']), (100, mimetypes.guess_type(filename)[0]))
+        self.assertEqual(entry['etag'], filename[len('real_speech_'):-len('.wav')])
+
+    def test_discard(self):
+        store = AudioStore(self.directory)
+        filename = store.put(b'a')
+        os.unlink(os.path.join(self.directory, filename))
+        store.discard(filename)
+        store.discard(filename)
+        self.assertEqual(store.get_stats()['files'], 0)
+
+    def test_background_sweeper(self):
+        store = AudioStore(self.directory, max_age=0.05, sweep_interval=0.02)
+        store.put(b'a')
+        store.start()
+        try:
+            deadline = time.monotonic() + 5
+            while store.get_stats()['files'] and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(store.get_stats()['files'], 0)
+        finally:
+            store.stop()
+        self.assertIsNone(store._sweeper)
+
+
+if __name__ == '__main__':
+    unittest.main()
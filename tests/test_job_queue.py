@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Tests for the asynchronous synthesis job queue"""
+
+import threading
+import unittest
+from unittest import mock
+
+from job_queue import QueueFullError, SynthesisJobQueue
+
+
+class JobQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.ran = []
+        self.finished = threading.Semaphore(0)
+
+    def tearDown(self):
+        self.release.set()    # let blocked worker threads run out
+
+    def handler(self, payload):
+        if payload.get('block'):
+            self.release.wait(5)
+        if payload.get('fail'):
+            raise ValueError("synthesis failed")
+        self.ran.append(payload['name'])
+        return {'name': payload['name']}
+
+    def make_queue(self, **settings):
+        def on_complete(job):
+            self.finished.release()
+        return SynthesisJobQueue(self.handler, on_complete=on_complete, **settings)
+
+    def wait_for(self, count):
+        for _ in range(count):
+            self.assertTrue(self.finished.acquire(timeout=5))
+
+    def test_lower_priority_values_run_first_in_submission_order(self):
+        queue = self.make_queue(workers=1)
+        blocker = queue.submit({'name': 'blocker', 'block': True})
+        self.wait_until_running(queue)
+        jobs = {name: queue.submit({'name': name}, priority)
+                for name, priority in [('b', 5), ('c', 1), ('d', 5), ('e', 1)]}
+
+        self.assertEqual([queue.describe(jobs[name])['position'] for name in 'cedb'], [0, 1, 3, 2])
+        self.assertEqual(queue.describe(blocker)['status'], 'running')
+        self.assertEqual(queue.get_stats()['queued'], 4)
+
+        self.release.set()
+        self.wait_for(5)
+        self.assertEqual(self.ran, ['blocker', 'c', 'e', 'b', 'd'])
+
+    def test_finished_job_description(self):
+        queue = self.make_queue()
+        job = queue.submit({'name': 'a'})
+        self.wait_for(1)
+
+        info = queue.describe(queue.get(job.id))
+        self.assertEqual(info['status'], 'done')
+        self.assertEqual(info['result'], {'name': 'a'})
+        self.assertIsNone(info['position'])
+        self.assertIsNotNone(queue.get_stats()['avg_service_time'])
+
+    def test_failed_job_keeps_its_error(self):
+        queue = self.make_queue()
+        with self.assertLogs('job_queue', 'ERROR'):
+            job = queue.submit({'name': 'a', 'fail': True})
+            self.wait_for(1)
+
+        info = queue.describe(job)
+        self.assertEqual((info['status'], info['error']), ('failed', 'synthesis failed'))
+        self.assertEqual(queue.get_stats()['failed'], 1)
+
+    def test_full_queue_rejects(self):
+        queue = self.make_queue(workers=1, max_queued=2)
+        queue.submit({'name': 'blocker', 'block': True})
+        self.wait_until_running(queue)
+        queue.submit({'name': 'a'})
+        queue.submit({'name': 'b'})
+
+        with self.assertRaises(QueueFullError):
+            queue.submit({'name': 'c'})
+        self.assertEqual(queue.get_stats()['rejected'], 1)
+
+    def test_oldest_finished_jobs_are_pruned(self):
+        queue = self.make_queue(workers=1, max_finished=2)
+        jobs = [queue.submit({'name': str(i)}) for i in range(4)]
+        self.wait_for(4)
+
+        self.assertEqual([queue.get(job.id) is not None for job in jobs], [False, False, True, True])
+
+    def test_failing_callback_does_not_stop_the_worker(self):
+        def on_complete(job):
+            self.finished.release()
+            raise RuntimeError("socket gone")
+
+        queue = SynthesisJobQueue(self.handler, workers=1, on_complete=on_complete)
+        with self.assertLogs('job_queue', 'WARNING'):
+            queue.submit({'name': 'a'})
+            queue.submit({'name': 'b'})
+            self.wait_for(2)
+        self.assertEqual(self.ran, ['a', 'b'])
+
+    def wait_until_running(self, queue):
+        for _ in range(500):
+            if queue.get_stats()['running']:
+                return
+            self.release.wait(0.01)
+        self.fail("job never started")
+
+
+class WebJobQueueTest(unittest.TestCase):
+
+    def test_queue_is_created_by_the_first_job(self):
+        try:
+            import web_interface_magic_unicorn as web
+        except ImportError as e:
+            self.skipTest(f"web interface dependencies missing: {e}")
+
+        def job_threads():
+            return [thread for thread in threading.enumerate() if thread.name.startswith('synthesis-job-')]
+
+        if web._job_queue is not None:
+            self.skipTest("job queue already created in this process")
+        # Importing the web module starts no job workers
+        self.assertIsNone(web.get_job_queue_stats())
+        threads_before = len(job_threads())
+
+        done = threading.Event()
+        with mock.patch.object(web, 'generate_speech', return_value={'success': True}) as generate, \
+                mock.patch.object(web, 'emit_event', side_effect=lambda *args, **kwargs: done.set()):
+            queue = web.get_job_queue()
+            self.assertIs(web.get_job_queue(), queue)
+            queue.submit({'text': 'hello', 'voice': 'af_heart'})
+            self.assertTrue(done.wait(5))
+
+        generate.assert_called_once_with(text='hello', voice='af_heart')
+        self.assertEqual(len(job_threads()), threads_before + queue.workers)
+        self.assertEqual(web.get_job_queue_stats()['completed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
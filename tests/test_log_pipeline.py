@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests for the log pipeline's cursor-based fetch"""
+
+import logging
+import unittest
+
+from log_pipeline import LogPipeline
+
+
+class LogPipelineFetchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pipeline = LogPipeline(capacity=5)
+        self.logger = logging.getLogger(f'test_log_pipeline.{self.id()}')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.pipeline.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.pipeline.handler)
+
+    def log(self, count, level=logging.INFO, start=0):
+        for index in range(start, start + count):
+            self.logger.log(level, 'message %d', index)
+        self.pipeline.flush()
+
+    def messages(self, result):
+        return [entry['message'] for entry in result['logs']]
+
+    def test_empty_pipeline(self):
+        result = self.pipeline.fetch()
+        self.assertEqual(result, {'logs': [], 'cursor': 0, 'truncated': False})
+        self.assertEqual(self.pipeline.fetch(since=0)['truncated'], False)
+
+    def test_delta_after_cursor(self):
+        self.log(3)
+        first = self.pipeline.fetch()
+        self.assertEqual(self.messages(first), ['message 0', 'message 1', 'message 2'])
+        self.assertEqual(first['cursor'], 3)
+
+        self.log(2, start=3)
+        delta = self.pipeline.fetch(since=first['cursor'])
+        self.assertEqual(self.messages(delta), ['message 3', 'message 4'])
+        self.assertEqual(delta['cursor'], 5)
+        self.assertFalse(delta['truncated'])
+
+        self.assertEqual(self.pipeline.fetch(since=delta['cursor'])['logs'], [])
+
+    def test_evicted_entries_are_truncated(self):
+        self.log(3)
+        cursor = self.pipeline.fetch()['cursor']
+        self.log(6, start=3)    # 9 entries through a ring of 5
+
+        result = self.pipeline.fetch(since=cursor)
+        self.assertTrue(result['truncated'])
+        self.assertEqual(self.messages(result), [f'message {index}' for index in range(4, 9)])
+        self.assertEqual(result['cursor'], 9)
+
+    def test_delta_up_to_ring_start_is_not_truncated(self):
+        self.log(8)
+        result = self.pipeline.fetch(since=3)    # ring holds 4..8
+        self.assertFalse(result['truncated'])
+        self.assertEqual(len(result['logs']), 5)
+
+    def test_cursor_from_before_restart_returns_everything(self):
+        self.log(2)
+        result = self.pipeline.fetch(since=100)
+        self.assertTrue(result['truncated'])
+        self.assertEqual(self.messages(result), ['message 0', 'message 1'])
+
+    def test_filters_do_not_move_cursor(self):
+        self.log(2)
+        self.log(1, level=logging.WARNING, start=2)
+        result = self.pipeline.fetch(since=0, min_level='WARNING')
+        self.assertEqual(self.messages(result), ['message 2'])
+        self.assertEqual(result['cursor'], 3)
+
+        self.assertEqual(self.messages(self.pipeline.fetch(query='MESSAGE 1')), ['message 1'])
+
+    def test_message_rendered_at_submit(self):
+        values = ['before']
+        self.logger.info('value %s', values)
+        values[0] = 'after'
+        self.pipeline.flush()
+        self.assertEqual(self.messages(self.pipeline.fetch()), ["value ['before']"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Tests for the rolling quantile sketches"""
+
+import math
+import random
+import unittest
+
+from metrics_sketch import DDSketch, PerformanceStore, RollingSketch
+
+
+class DDSketchTest(unittest.TestCase):
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(42)
+        values = sorted(rng.lognormvariate(0, 1.5) for _ in range(10000))
+        sketch = DDSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.01, 0.25, 0.5, 0.9, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact) / exact, 0.01, f"q={q}")
+
+    def test_zero_and_negative_values_report_zero(self):
+        sketch = DDSketch()
+        for value in (0.0, -1.0, 0.0, 5.0):
+            sketch.add(value)
+        self.assertEqual(sketch.quantile(0.5), 0.0)
+        self.assertAlmostEqual(sketch.quantile(1.0), 5.0, delta=0.05)
+
+    def test_empty_sketch(self):
+        sketch = DDSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        self.assertEqual(sketch.summary()['count'], 0)
+        self.assertIsNone(sketch.summary()['mean'])
+
+    def test_merge_matches_single_sketch(self):
+        values = [0.1 * i for i in range(1, 1001)]
+        whole, first, second = DDSketch(), DDSketch(), DDSketch()
+        for value in values:
+            whole.add(value)
+        for value in values[:400]:
+            first.add(value)
+        for value in values[400:]:
+            second.add(value)
+        first.merge(second)
+
+        self.assertEqual(first.count, whole.count)
+        self.assertAlmostEqual(first.sum, whole.sum)
+        for q in (0.5, 0.95, 0.99):
+            self.assertEqual(first.quantile(q), whole.quantile(q))
+
+    def test_collapse_keeps_bin_budget_and_high_quantiles(self):
+        sketch = DDSketch(relative_accuracy=0.01, max_bins=64)
+        for exponent in range(-300, 300):
+            sketch.add(10 ** (exponent / 100))
+        self.assertLessEqual(len(sketch._bins), 64)
+        self.assertEqual(sketch.count, 600)
+        self.assertLessEqual(abs(sketch.quantile(0.99) - 10 ** 2.93) / 10 ** 2.93, 0.01)
+
+
+class RollingSketchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1_000_000.0
+        self.rolling = RollingSketch()
+
+    def test_window_selects_recent_slots(self):
+        self.rolling.add(1.0, self.now - 5)
+        self.rolling.add(2.0, self.now - 30)
+        self.rolling.add(3.0, self.now - 600)
+        self.rolling.add(4.0, self.now - 7200)
+
+        self.assertEqual(self.rolling.window(10, self.now).count, 1)
+        self.assertEqual(self.rolling.window(60, self.now).count, 2)
+        self.assertEqual(self.rolling.window(3600, self.now).count, 3)
+        self.assertEqual(self.rolling.window(86400, self.now).count, 4)
+        self.assertEqual(self.rolling.window(None, self.now).count, 4)
+
+    def test_window_drops_expired_slots(self):
+        self.rolling.add(1.0, self.now - 120)
+        # A minute ago the 1 s ring held it; now it is only in coarser slots
+        self.assertEqual(self.rolling.window(60, self.now).count, 0)
+        self.assertEqual(self.rolling.window(300, self.now).count, 1)
+
+    def test_reused_slot_forgets_old_values(self):
+        self.rolling.add(1.0, self.now - 60)
+        self.rolling.add(2.0, self.now)    # same 1 s ring position, one lap later
+        window = self.rolling.window(60, self.now)
+        self.assertEqual(window.count, 1)
+        self.assertEqual(window.max, 2.0)
+
+    def test_late_value_keeps_newer_slot(self):
+        self.rolling.add(1.0, self.now)
+        self.rolling.add(2.0, self.now - 7200)    # two laps behind in the 1 min ring
+        self.assertEqual(self.rolling.window(3600, self.now).count, 1)
+        self.assertEqual(self.rolling.window(None, self.now).count, 2)
+
+    def test_longer_than_coarsest_ring_uses_all_slots(self):
+        self.rolling.add(1.0, self.now - 3600 * 20)
+        self.assertEqual(self.rolling.window(3600 * 48, self.now).count, 1)
+
+
+class PerformanceStoreTest(unittest.TestCase):
+
+    def test_query_filters_by_voice_and_method(self):
+        store = PerformanceStore()
+        store.record('af_heart', 'cpu', {'rtf': 0.1, 'generation_time': 0.5})
+        store.record('am_adam', 'cpu', {'rtf': 0.2})
+        store.record('af_heart', 'mlir_npu', {'rtf': 0.3})
+
+        self.assertEqual(store.query('rtf').count, 3)
+        self.assertEqual(store.query('rtf', voice='af_heart').count, 2)
+        self.assertEqual(store.query('rtf', method='cpu').count, 2)
+        self.assertEqual(store.query('generation_time', 60).count, 1)
+        self.assertEqual(store.keys(), (['af_heart', 'am_adam'], ['cpu', 'mlir_npu']))
+
+    def test_series_beyond_cap_are_pooled(self):
+        store = PerformanceStore(max_series=2)
+        for index in range(5):
+            store.record(f'voice_{index}', 'cpu', {'rtf': 0.1})
+        voices, methods = store.keys()
+        self.assertEqual(voices, ['other', 'voice_0', 'voice_1'])
+        self.assertEqual(store.query('rtf', voice='other').count, 3)
+
+    def test_invalid_windows_are_rejected(self):
+        store = PerformanceStore()
+        for seconds in (0, -5, math.inf, math.nan):
+            with self.assertRaises(ValueError):
+                store.query('rtf', seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
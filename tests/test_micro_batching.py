@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for the micro-batching scheduler"""
+
+import threading
+import unittest
+
+import numpy as np
+
+from micro_batching import BatchRequest, MicroBatchScheduler
+from token_batching import build_token_batch
+from tests.test_token_batching import STYLE_TABLE, fake_model, run_alone
+
+
+def tokens_of(length):
+    return np.arange(1, length + 1, dtype=np.int64) % 17
+
+
+class FormBatchesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+
+    def form(self, lengths_and_keys, **settings):
+        self.scheduler = MicroBatchScheduler(lambda batch: [None] * len(batch), **settings)
+        pending = [BatchRequest(tokens_of(length), None, 1.0, key) for length, key in lengths_and_keys]
+        return [[(len(r.tokens), r.group_key) for r in batch] for batch in self.scheduler._form_batches(pending)]
+
+    def test_groups_by_key_and_sorts_by_length(self):
+        batches = self.form([(10, 'a'), (9, 'b'), (8, 'a'), (10, 'b')])
+        self.assertEqual(batches, [[(8, 'a'), (10, 'a')], [(9, 'b'), (10, 'b')]])
+
+    def test_padding_budget_splits_dissimilar_lengths(self):
+        batches = self.form([(10, 'a'), (11, 'a'), (40, 'a')], max_padding_ratio=0.25)
+        self.assertEqual(batches, [[(10, 'a'), (11, 'a')], [(40, 'a')]])
+
+    def test_max_batch_size(self):
+        batches = self.form([(10, 'a')] * 5, max_batch_size=2)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+    def test_buckets_replace_padding_budget(self):
+        batches = self.form([(3, 'a'), (13, 'a'), (20, 'a')], bucket_edges=[16, 32, 64])
+        self.assertEqual(batches, [[(3, 'a'), (13, 'a')], [(20, 'a')]])
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def run_concurrently(self, scheduler, requests):
+        """Submit requests from separate threads so they land in one window"""
+        futures = [None] * len(requests)
+        barrier = threading.Barrier(len(requests))
+
+        def submit(index, request):
+            barrier.wait()
+            futures[index] = scheduler.submit(*request)
+
+        threads = [threading.Thread(target=submit, args=item) for item in enumerate(requests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return futures
+
+    def test_results_reach_their_requests(self):
+        scheduler = MicroBatchScheduler(lambda batch: [len(r.tokens) for r in batch], max_wait_ms=50)
+        try:
+            futures = self.run_concurrently(scheduler, [(tokens_of(n), None, 1.0, 'v') for n in (12, 10, 11)])
+            self.assertEqual([future.result(timeout=5) for future in futures], [12, 10, 11])
+            stats = scheduler.get_stats()
+            self.assertEqual(stats['requests'], 3)
+            self.assertEqual(stats['batches'], 1)
+        finally:
+            scheduler.shutdown()
+
+    def test_short_result_list_fails_every_request(self):
+        scheduler = MicroBatchScheduler(lambda batch: [1], max_wait_ms=50)
+        try:
+            futures = self.run_concurrently(scheduler, [(tokens_of(10), None, 1.0, 'v')] * 2)
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result(timeout=5)
+        finally:
+            scheduler.shutdown()
+
+    def test_runner_error_reaches_every_request(self):
+        def run_batch(batch):
+            raise ValueError("model failed")
+
+        scheduler = MicroBatchScheduler(run_batch)
+        try:
+            with self.assertRaises(ValueError):
+                scheduler.run(tokens_of(10), None, 1.0, 'v', timeout=5)
+        finally:
+            scheduler.shutdown()
+
+    def test_padded_batches_match_single_inference(self):
+        def run_batch(requests):
+            batch = build_token_batch([r.tokens for r in requests], [r.style for r in requests],
+                                      [r.speed for r in requests])
+            return batch.split_audio(fake_model(batch.tokens, batch.styles, batch.speeds))
+
+        scheduler = MicroBatchScheduler(run_batch, max_wait_ms=50, max_padding_ratio=0.9)
+        requests = [(tokens_of(n), STYLE_TABLE, speed, 'v') for n, speed in ((7, 1.0), (23, 1.2), (15, 0.9))]
+        try:
+            futures = self.run_concurrently(scheduler, requests)
+            for (tokens, _, speed, _), future in zip(requests, futures):
+                np.testing.assert_allclose(future.result(timeout=5), run_alone(fake_model, tokens, speed=speed),
+                                           atol=1e-6)
+            self.assertEqual(scheduler.get_stats()['batch_sizes'], {3: 1})
+        finally:
+            scheduler.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for the phoneme/token cache"""
+
+import unittest
+
+import numpy as np
+
+from phoneme_cache import PhonemeCache
+
+
+class FakeTokenizer:
+    """Phonemizes by upper-casing (tagged with the language) and counts the calls"""
+
+    def __init__(self):
+        self.phonemized = []
+
+    def phonemize(self, text, lang):
+        self.phonemized.append(text)
+        return f"{text.upper()}/{lang}"
+
+    def tokenize(self, phonemes):
+        return [ord(char) for char in phonemes]
+
+
+def tokens_of(*phonemes):
+    return [ord(char) for char in " ".join(phonemes)]
+
+
+class PhonemeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tokenizer = FakeTokenizer()
+
+    def test_sentence_is_phonemized_once(self):
+        cache = PhonemeCache(self.tokenizer)
+        first = cache.tokens("Hello there.", "en-us")
+        second = cache.tokens("Hello   there.", "en-us")    # whitespace is normalized
+
+        self.assertIs(first, second)
+        self.assertEqual(first.dtype, np.int64)
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(first.tolist(), tokens_of("HELLO THERE./en-us"))
+        self.assertEqual(self.tokenizer.phonemized, ["Hello there."])
+        stats = cache.get_stats()['sentences']
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_sentences_are_joined_with_a_space_token(self):
+        cache = PhonemeCache(self.tokenizer)
+        cache.tokens("Two.", "en-us")
+        tokens = cache.tokens("One. Two.", "en-us")
+
+        self.assertEqual(tokens.tolist(), tokens_of("ONE./en-us", "TWO./en-us"))
+        self.assertEqual(self.tokenizer.phonemized, ["Two.", "One."])
+
+    def test_language_is_part_of_the_key(self):
+        cache = PhonemeCache(self.tokenizer)
+        self.assertNotEqual(cache.tokens("Hi.", "en-us").tolist(), cache.tokens("Hi.", "en-gb").tolist())
+        self.assertEqual(len(self.tokenizer.phonemized), 2)
+
+    def test_lru_eviction(self):
+        cache = PhonemeCache(self.tokenizer, max_sentences=2)
+        for text in ["A.", "B.", "A.", "C.", "B."]:
+            cache.tokens(text, "en-us")
+        # "B." was least recently used when "C." arrived
+        self.assertEqual(self.tokenizer.phonemized, ["A.", "B.", "C.", "B."])
+        self.assertEqual(cache.get_stats()['sentences']['entries'], 2)
+
+    def test_word_level_reuses_words_across_sentences(self):
+        cache = PhonemeCache(self.tokenizer, word_level=True)
+        tokens = cache.tokens("red fish", "en-us")
+        cache.tokens("blue fish", "en-us")
+
+        self.assertEqual(tokens.tolist(), tokens_of("RED/en-us", "FISH/en-us"))
+        self.assertFalse(tokens.flags.writeable)
+        self.assertEqual(self.tokenizer.phonemized, ["red", "fish", "blue"])
+        stats = cache.get_stats()
+        self.assertTrue(stats['word_level'])
+        self.assertEqual(stats['words']['hits'], 1)
+
+    def test_empty_text(self):
+        cache = PhonemeCache(self.tokenizer)
+        tokens = cache.tokens("  ", "en-us")
+        self.assertEqual(tokens.dtype, np.int64)
+        self.assertEqual(len(tokens), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
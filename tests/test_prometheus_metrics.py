@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Tests for the Prometheus text rendering"""
+
+import unittest
+
+from prometheus_metrics import MetricsRegistry, text_length_bucket
+
+
+class HistogramRenderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.histogram = self.registry.histogram('tts_latency_seconds', 'Latency', ('voice',),
+                                                 buckets=(0.5, 0.1, 1.0))
+
+    def test_buckets_are_cumulative_and_sorted(self):
+        for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+            self.histogram.observe(value, 'af_heart')
+
+        self.assertEqual(self.histogram.render(), [
+            'tts_latency_seconds_bucket{voice="af_heart",le="0.1"} 2',
+            'tts_latency_seconds_bucket{voice="af_heart",le="0.5"} 3',
+            'tts_latency_seconds_bucket{voice="af_heart",le="1.0"} 4',
+            'tts_latency_seconds_bucket{voice="af_heart",le="+Inf"} 5',
+            'tts_latency_seconds_sum{voice="af_heart"} 3.15',
+            'tts_latency_seconds_count{voice="af_heart"} 5',
+        ])
+
+    def test_value_on_bound_counts_in_that_bucket(self):
+        self.histogram.observe(1.0, 'af_heart')
+        lines = self.histogram.render()
+        self.assertIn('tts_latency_seconds_bucket{voice="af_heart",le="0.5"} 0', lines)
+        self.assertIn('tts_latency_seconds_bucket{voice="af_heart",le="1.0"} 1', lines)
+
+    def test_series_rendered_per_label_combination(self):
+        self.histogram.observe(0.2, 'bf_emma')
+        self.histogram.observe(0.2, 'af_heart')
+        buckets = [line for line in self.histogram.render() if 'le="+Inf"' in line]
+        self.assertEqual(buckets, [
+            'tts_latency_seconds_bucket{voice="af_heart",le="+Inf"} 1',
+            'tts_latency_seconds_bucket{voice="bf_emma",le="+Inf"} 1',
+        ])
+
+    def test_label_values_are_escaped(self):
+        self.histogram.observe(0.2, 'a"b\\c\nd')
+        self.assertIn('tts_latency_seconds_count{voice="a\\"b\\\\c\\nd"} 1', self.histogram.render())
+
+    def test_registry_render(self):
+        counter = self.registry.counter('tts_requests_total', 'Requests', ('endpoint',))
+        counter.inc('synthesize')
+        counter.inc('synthesize', amount=2)
+        self.histogram.observe(0.2, 'af_heart')
+
+        text = self.registry.render()
+        self.assertTrue(text.startswith('# HELP tts_latency_seconds Latency\n'
+                                        '# TYPE tts_latency_seconds histogram\n'))
+        self.assertIn('# TYPE tts_requests_total counter\n'
+                      'tts_requests_total{endpoint="synthesize"} 3\n', text)
+        self.assertTrue(text.endswith('\n'))
+
+    def test_empty_histogram_renders_no_series(self):
+        self.assertEqual(self.histogram.render(), [])
+
+
+class TextLengthBucketTest(unittest.TestCase):
+
+    def test_bounds(self):
+        self.assertEqual(text_length_bucket(0), '<=50')
+        self.assertEqual(text_length_bucket(50), '<=50')
+        self.assertEqual(text_length_bucket(51), '<=200')
+        self.assertEqual(text_length_bucket(1000), '<=1000')
+        self.assertEqual(text_length_bucket(1001), '>1000')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Tests for the shared memory audio handoff"""
+
+import os
+import unittest
+import uuid
+
+import numpy as np
+
+from shared_audio import (
+    SHM_DIR, attach_shared_audio, discard_shared_audio, segment_name, write_shared_audio
+)
+
+
+class SharedAudioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.name = segment_name(f"test-{uuid.uuid4().hex}")
+        self.path = os.path.join(SHM_DIR, self.name)
+
+    def tearDown(self):
+        discard_shared_audio(self.name)
+
+    def test_round_trip_unlinks_the_segment(self):
+        audio = np.linspace(-1, 1, 1000, dtype=np.float32)
+        self.assertEqual(write_shared_audio(self.name, audio), 1000)
+        self.assertTrue(os.path.exists(self.path))
+
+        attached = attach_shared_audio(self.name)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(attached.dtype, np.float32)
+        np.testing.assert_array_equal(attached, audio)
+
+    def test_dtype_and_shape_are_kept_flat(self):
+        audio = np.arange(12, dtype=np.int16).reshape(3, 4)
+        write_shared_audio(self.name, audio)
+        attached = attach_shared_audio(self.name)
+        self.assertEqual(attached.dtype, np.int16)
+        self.assertEqual(attached.tolist(), list(range(12)))
+
+    def test_attached_array_is_a_private_copy_on_write(self):
+        write_shared_audio(self.name, np.zeros(8, dtype=np.float32))
+        attached = attach_shared_audio(self.name)
+        attached[0] = 1.0
+        self.assertEqual(attached[0], 1.0)
+
+    def test_empty_audio(self):
+        write_shared_audio(self.name, np.zeros(0, dtype=np.float32))
+        self.assertEqual(len(attach_shared_audio(self.name)), 0)
+
+    def test_segments_are_never_overwritten(self):
+        write_shared_audio(self.name, np.zeros(4, dtype=np.float32))
+        with self.assertRaises(FileExistsError):
+            write_shared_audio(self.name, np.ones(4, dtype=np.float32))
+
+    def test_invalid_segment_is_rejected_and_removed(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 128)
+        with self.assertRaises(ValueError):
+            attach_shared_audio(self.name)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_discard(self):
+        write_shared_audio(self.name, np.zeros(4, dtype=np.float32))
+        discard_shared_audio(self.name)
+        self.assertFalse(os.path.exists(self.path))
+        discard_shared_audio(self.name)    # already gone: no error
+
+
+if __name__ == '__main__':
+    unittest.main()
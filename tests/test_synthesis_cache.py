@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Tests for the two-tier synthesis cache"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from synthesis_cache import SynthesisCache, cache_key, normalize_text
+
+
+def audio_of(samples, value=0.5):
+    return np.full(samples, value, dtype=np.float32)
+
+
+class CacheKeyTest(unittest.TestCase):
+
+    def test_normalized_text_shares_a_key(self):
+        self.assertEqual(normalize_text("  Hello \n world "), "Hello world")
+        self.assertEqual(cache_key("Hello  world", "af", 1.0, "en-us", "m"),
+                         cache_key(" Hello world\n", "af", 1.0, "en-us", "m"))
+
+    def test_every_field_changes_the_key(self):
+        base = cache_key("hi", "af", 1.0, "en-us", "m")
+        for variant in [("ho", "af", 1.0, "en-us", "m"), ("hi", "am", 1.0, "en-us", "m"),
+                        ("hi", "af", 1.1, "en-us", "m"), ("hi", "af", 1.0, "en-gb", "m"),
+                        ("hi", "af", 1.0, "en-us", "n")]:
+            self.assertNotEqual(cache_key(*variant), base)
+
+
+class MemoryTierTest(unittest.TestCase):
+
+    def test_miss_then_hit(self):
+        cache = SynthesisCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", audio_of(10), 24000)
+
+        audio, sample_rate = cache.get("a")
+        self.assertEqual(sample_rate, 24000)
+        np.testing.assert_array_equal(audio, audio_of(10))
+        stats = cache.get_stats()
+        self.assertEqual((stats['memory_hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_cached_copy_is_frozen(self):
+        cache = SynthesisCache()
+        original = audio_of(10)
+        cache.put("a", original, 24000)
+        original[:] = 0    # the caller's array stays writable and separate
+
+        audio, _ = cache.get("a")
+        self.assertFalse(audio.flags.writeable)
+        self.assertEqual(audio[0], 0.5)
+
+    def test_lru_eviction(self):
+        cache = SynthesisCache(memory_max_bytes=2 * 40)
+        cache.put("a", audio_of(10), 24000)
+        cache.put("b", audio_of(10), 24000)
+        cache.get("a")                         # "b" is now least recently used
+        cache.put("c", audio_of(10), 24000)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.get_stats()['memory_bytes'], 80)
+
+    def test_oversized_entry_skips_memory(self):
+        cache = SynthesisCache(memory_max_bytes=16)
+        cache.put("a", audio_of(10), 24000)
+        self.assertIsNone(cache.get("a"))
+
+
+class DiskTierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.disk_dir = self.tempdir.name
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def disk_cache(self, **settings):
+        # A zero memory budget sends every lookup to the disk tier
+        return SynthesisCache(memory_max_bytes=0, disk_dir=self.disk_dir, **settings)
+
+    def test_disk_hit_keeps_sample_rate(self):
+        cache = self.disk_cache()
+        cache.put("a", audio_of(10), 22050)
+
+        audio, sample_rate = cache.get("a")
+        self.assertEqual(sample_rate, 22050)
+        np.testing.assert_array_equal(audio, audio_of(10))
+        self.assertEqual(cache.get_stats()['disk_hits'], 1)
+
+    def test_disk_hit_is_promoted_to_memory(self):
+        cache = SynthesisCache(disk_dir=self.disk_dir)
+        cache.put("a", audio_of(10), 24000)
+
+        reopened = SynthesisCache(disk_dir=self.disk_dir)
+        reopened.get("a")
+        reopened.get("a")
+        stats = reopened.get_stats()
+        self.assertEqual((stats['disk_hits'], stats['memory_hits']), (1, 1))
+
+    def test_index_survives_restart_and_drops_temp_files(self):
+        self.disk_cache().put("a", audio_of(10), 24000)
+        stray = os.path.join(self.disk_dir, "b.24000.npy.1.tmp")
+        open(stray, "wb").close()
+        open(os.path.join(self.disk_dir, "notes.txt"), "w").close()
+        open(os.path.join(self.disk_dir, "c.rate.npy"), "wb").close()
+
+        cache = self.disk_cache()
+        self.assertFalse(os.path.exists(stray))
+        self.assertEqual(cache.get_stats()['disk_entries'], 1)
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_lru_eviction_removes_files(self):
+        cache = self.disk_cache()
+        cache.put("a", audio_of(100), 24000)
+        entry_bytes = cache.get_stats()['disk_bytes']
+        cache = self.disk_cache(disk_max_bytes=2 * entry_bytes)
+        cache.put("b", audio_of(100), 24000)
+        cache.get("a")                         # "b" is now least recently used
+        cache.put("c", audio_of(100), 24000)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertFalse(os.path.exists(os.path.join(self.disk_dir, "b.24000.npy")))
+        self.assertEqual(cache.get_stats()['disk_bytes'], 2 * entry_bytes)
+
+    def test_corrupt_files_are_evicted_as_misses(self):
+        cache = self.disk_cache()
+        contents = {"empty": b"", "truncated": None, "junk": b"not an array" * 8}
+        for key in contents:
+            cache.put(key, audio_of(100), 24000)
+        with open(os.path.join(self.disk_dir, "truncated.24000.npy"), "rb") as f:
+            contents["truncated"] = f.read()[:200]
+
+        for key, data in contents.items():
+            path = os.path.join(self.disk_dir, f"{key}.24000.npy")
+            with open(path, "wb") as f:
+                f.write(data)
+            with self.assertLogs('synthesis_cache', 'WARNING'):
+                self.assertIsNone(cache.get(key), key)
+            self.assertFalse(os.path.exists(path), key)
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['disk_entries'], stats['disk_bytes'], stats['misses']), (0, 0, 3))
+
+    def test_missing_file_is_a_miss(self):
+        cache = self.disk_cache()
+        cache.put("a", audio_of(10), 24000)
+        os.unlink(os.path.join(self.disk_dir, "a.24000.npy"))
+
+        with self.assertLogs('synthesis_cache', 'WARNING'):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get_stats()['disk_entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Tests for the synthesis worker pool and its worker protocol"""
+
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from shared_audio import SHM_DIR, segment_name, write_shared_audio
+from synthesis_worker_pool import SynthesisWorker, SynthesisWorkerPool
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stand-in for kokoro-onnx, loaded by the real synthesis_worker.py
+FAKE_KOKORO = textwrap.dedent('''
+    import os
+    import numpy as np
+
+    class Kokoro:
+        def __init__(self, model_path, voices_path):
+            pass
+
+        def create(self, text, voice, speed=1.0, lang="en-us"):
+            if text == "crash":
+                os._exit(3)
+            if text == "fail":
+                raise ValueError("model failed")
+            return np.full(len(text) * 10, voice.mean() * speed, dtype=np.float32), 22050
+''')
+
+# Worker speaking the pool protocol, misbehaving on request
+SCRIPTED_WORKER = textwrap.dedent('''
+    import json
+    import sys
+    import numpy as np
+    from shared_audio import segment_name, write_shared_audio
+
+    def reply(job, job_id=None):
+        job_id = job_id or job["job_id"]
+        segment = segment_name(job_id)
+        write_shared_audio(segment, np.arange(4, dtype=np.float32))
+        print(json.dumps({"job_id": job_id, "success": True, "sample_rate": 24000,
+                          "audio_segment": segment, "method_used": "scripted",
+                          "voice": job["voice"]}), flush=True)
+
+    print(json.dumps({"ready": True, "pid": 0}), flush=True)
+    for line in sys.stdin:
+        job = json.loads(line)
+        text = job.get("text")
+        if job.get("command") == "shutdown" or text == "exit":
+            break
+        if text == "garble":
+            print("not json", flush=True)
+        elif text == "list":
+            print("[1, 2]", flush=True)
+        elif text == "stale":
+            reply(job, "stale-" + job["job_id"])
+            reply(job)
+        elif text != "silent":
+            reply(job)
+''')
+
+
+def shared_segments():
+    return {name for name in os.listdir(SHM_DIR) if name.startswith("kokoro_audio_")}
+
+
+class SynthesisWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        self.worker = SynthesisWorker(0, [sys.executable, "-c", SCRIPTED_WORKER], env)
+        self.worker.start(timeout=30)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def job(self, text, job_id="job-1"):
+        return {"job_id": job_id, "text": text, "voice": "af"}
+
+    def test_reply_for_the_job(self):
+        reply = self.worker.run_job(self.job("hello"), timeout=10)
+        self.assertEqual(reply["job_id"], "job-1")
+        self.assertEqual(self.worker.jobs_completed, 1)
+        os.unlink(os.path.join(SHM_DIR, reply["audio_segment"]))
+
+    def test_late_reply_is_discarded_with_its_audio(self):
+        with self.assertLogs("synthesis_worker_pool", "WARNING"):
+            reply = self.worker.run_job(self.job("stale"), timeout=10)
+        self.assertEqual(reply["job_id"], "job-1")
+        self.assertNotIn(segment_name("stale-job-1"), shared_segments())
+        os.unlink(os.path.join(SHM_DIR, reply["audio_segment"]))
+
+    def test_malformed_lines_raise(self):
+        with self.assertRaises(ValueError):
+            self.worker.run_job(self.job("garble"), timeout=10)
+        with self.assertRaises(ValueError):
+            self.worker.run_job(self.job("list"), timeout=10)
+
+    def test_silence_times_out(self):
+        with self.assertRaises(TimeoutError):
+            self.worker.run_job(self.job("silent"), timeout=0.2)
+
+    def test_exit_raises(self):
+        with self.assertRaises(RuntimeError):
+            self.worker.run_job(self.job("exit"), timeout=10)
+        self.assertFalse(self.worker.alive)
+
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        root = self.tempdir.name
+        os.makedirs(os.path.join(root, "kokoro_onnx"))
+        with open(os.path.join(root, "kokoro_onnx", "__init__.py"), "w") as f:
+            f.write(FAKE_KOKORO)
+        self.voices_path = os.path.join(root, "voices.npz")
+        np.savez(self.voices_path, af=np.full((510, 1, 256), 0.25, dtype=np.float32))
+
+        self.pool = None
+        self.segments = shared_segments()
+
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.tempdir.cleanup()
+
+    def start_pool(self, scripted=False, **settings):
+        root = self.tempdir.name
+        settings = dict(pool_size=1, job_timeout=30, startup_timeout=30, **settings)
+        env = {'MAGIC_UNICORN_VOICE_STORE_DIR': os.path.join(root, "voice_store"),
+               'MAGIC_UNICORN_VOICE_BLENDS': os.path.join(root, "blends.json")}
+        with mock.patch.dict(os.environ, env):
+            self.pool = SynthesisWorkerPool(python_executable=sys.executable, pythonpath=root,
+                                            model_path=os.path.join(root, "model.onnx"),
+                                            voices_path=self.voices_path, kokoro_src=root, **settings)
+        if scripted:
+            self.pool._workers = [SynthesisWorker(0, [sys.executable, "-c", SCRIPTED_WORKER],
+                                                  dict(os.environ, PYTHONPATH=REPO_DIR))]
+        self.pool.start()
+        return self.pool
+
+    def test_shared_memory_round_trip(self):
+        pool = self.start_pool()
+        result = pool.synthesize("hello", "af", speed=2.0)
+
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(result['sample_rate'], 22050)
+        np.testing.assert_array_equal(result['audio_data'], np.full(50, 0.5, dtype=np.float32))
+        self.assertIn('inference', result['timings'])
+        self.assertIn('queue_wait', result['timings'])
+        self.assertEqual(shared_segments(), self.segments)    # attached segments are unlinked
+
+    def test_error_reply_keeps_the_worker(self):
+        pool = self.start_pool()
+        result = pool.synthesize("fail", "af")
+
+        self.assertFalse(result['success'])
+        self.assertIn("model failed", result['error'])
+        self.assertTrue(pool.synthesize("again", "af")['success'])
+        stats = pool.get_stats()
+        self.assertEqual((stats['jobs'], stats['failures'], stats['restarts']), (2, 1, 0))
+
+    def test_restart_after_crash(self):
+        pool = self.start_pool()
+        with self.assertLogs("synthesis_worker_pool", "INFO"):
+            result = pool.synthesize("crash", "af")
+        self.assertFalse(result['success'])
+        self.assertEqual(pool.get_stats()['restarts'], 1)
+
+        # The replacement starts in the background and takes the next job
+        self.assertTrue(pool.synthesize("hello", "af")['success'])
+        self.assertEqual(shared_segments(), self.segments)
+
+    def test_restart_after_malformed_line(self):
+        pool = self.start_pool(scripted=True)
+        with self.assertLogs("synthesis_worker_pool", "INFO"):
+            result = pool.synthesize("garble", "af")
+        self.assertFalse(result['success'])
+        self.assertEqual(pool.get_stats()['restarts'], 1)
+
+        result = pool.synthesize("hello", "af")
+        self.assertTrue(result['success'], result.get('error'))
+        np.testing.assert_array_equal(result['audio_data'], np.arange(4, dtype=np.float32))
+
+    def test_restart_after_max_jobs(self):
+        pool = self.start_pool(max_jobs_per_worker=1)
+        self.assertTrue(pool.synthesize("one", "af")['success'])
+        self.assertTrue(pool.synthesize("two", "af")['success'])
+        self.assertEqual(pool.get_stats()['restarts'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests for sentence and clause segmentation"""
+
+import unittest
+
+from text_segmentation import split_sentences, split_text_segments
+
+
+class SplitSentencesTest(unittest.TestCase):
+
+    def test_sentence_punctuation(self):
+        self.assertEqual(split_sentences("Hello there.  How are you? Fine! Well… ok"),
+                         ["Hello there.", "How are you?", "Fine!", "Well…", "ok"])
+
+    def test_closing_quotes_and_brackets_stay_with_their_sentence(self):
+        self.assertEqual(split_sentences('He said "go." Then (quietly.) left.'),
+                         ['He said "go."', 'Then (quietly.)', 'left.'])
+
+    def test_paragraph_breaks_end_a_sentence(self):
+        self.assertEqual(split_sentences("A heading\n\nBody text\nstill body."),
+                         ["A heading", "Body text still body."])
+
+    def test_no_split_without_whitespace(self):
+        self.assertEqual(split_sentences("Version 1.5 is out.It works."), ["Version 1.5 is out.It works."])
+
+    def test_blank_text(self):
+        self.assertEqual(split_sentences("  \n\n "), [])
+
+
+class SplitTextSegmentsTest(unittest.TestCase):
+
+    def test_short_sentences_are_kept_whole(self):
+        self.assertEqual(split_text_segments("One. Two, three."), ["One.", "Two, three."])
+
+    def test_long_sentence_splits_at_clauses(self):
+        segments = split_text_segments("alpha beta, gamma delta; epsilon zeta: eta theta.", max_chars=24)
+        self.assertEqual(segments, ["alpha beta, gamma delta;", "epsilon zeta: eta theta."])
+
+    def test_long_clause_splits_at_whitespace_in_order(self):
+        segments = split_text_segments("one, two, three, four; five six seven", max_chars=12)
+        self.assertEqual(segments, ["one, two,", "three, four;", "five six", "seven"])
+
+    def test_unbroken_text_is_cut_at_the_limit(self):
+        self.assertEqual(split_text_segments("a" * 30, max_chars=12), ["a" * 12, "a" * 12, "a" * 6])
+
+    def test_segments_respect_the_limit_and_keep_every_word(self):
+        text = ("The quick brown fox, which was rather tired after a long day of jumping over lazy dogs, "
+                "finally lay down; the dogs, unimpressed, went back to sleep. Short one. " * 3)
+        segments = split_text_segments(text, max_chars=40)
+        self.assertTrue(all(0 < len(segment) <= 40 for segment in segments))
+        self.assertEqual(" ".join(segments).split(), text.split())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Tests for length-bucketed token batching"""
+
+import unittest
+
+import numpy as np
+
+from token_batching import (
+    MAX_TOKENS, PAD_TOKEN, SAMPLES_PER_FRAME, bucket_length, build_token_batch,
+    iter_bucketed_batches, power_of_two_edges, select_style, verify_batched_inference
+)
+
+STYLE_TABLE = np.linspace(0.5, 1.5, 512 * 4, dtype=np.float32).reshape(512, 1, 4)
+
+
+def fake_model(tokens, styles, speeds):
+    """
+    Stand-in for Kokoro: every token (padding included) lasts token % 3 + 1
+    frames at a level set by the token and style, and rows are zero-filled
+    to the longest one
+    """
+    durations = tokens % 3 + 1
+    rows = []
+    for row_tokens, row_durations, style, speed in zip(tokens, durations, styles, speeds):
+        rows.append(np.concatenate([
+            np.full(duration * SAMPLES_PER_FRAME, (token + 1) * 0.01 * style[0] / speed, dtype=np.float32)
+            for token, duration in zip(row_tokens, row_durations)
+        ]))
+    audio = np.zeros((len(rows), max(len(row) for row in rows)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        audio[i, :len(row)] = row
+    return [audio, durations]
+
+
+def leaky_model(tokens, styles, speeds):
+    """Like fake_model, but padding changes every sample of the row (no masking)"""
+    audio, durations = fake_model(tokens, styles, speeds)
+    return [audio + tokens.mean(axis=1, keepdims=True) * 0.01, durations]
+
+
+def run_alone(model, tokens, style_table=STYLE_TABLE, speed=1.0):
+    """Audio of one sequence without padding, as the unbatched path runs it"""
+    outputs = model(np.array([[PAD_TOKEN, *tokens, PAD_TOKEN]], dtype=np.int64),
+                    select_style(style_table, len(tokens))[np.newaxis],
+                    np.array([speed], dtype=np.float32))
+    return outputs[0].reshape(-1)
+
+
+class BucketingTest(unittest.TestCase):
+
+    def test_power_of_two_edges(self):
+        self.assertEqual(power_of_two_edges(), [16, 32, 64, 128, 256, 512])
+        self.assertEqual(power_of_two_edges(16, 100), [16, 32, 64, 100])
+
+    def test_bucket_length(self):
+        self.assertEqual(bucket_length(3), 16)
+        self.assertEqual(bucket_length(16), 16)
+        self.assertEqual(bucket_length(17), 32)
+        self.assertEqual(bucket_length(MAX_TOKENS + 2), 512)
+        self.assertEqual(bucket_length(600), 600)    # past the last edge: unchanged
+        self.assertEqual(bucket_length(11, [10, 20]), 20)
+
+    def test_batches_share_a_bucket_and_respect_size(self):
+        lengths = [5, 40, 7, 12, 33, 100, 6, 8]
+        batches = list(iter_bucketed_batches(lengths, lambda n: n, max_batch_size=3))
+
+        self.assertEqual(batches, [[5, 6, 7], [8, 12], [33, 40], [100]])
+        for batch in batches:
+            self.assertEqual(len({bucket_length(n + 2) for n in batch}), 1)
+        self.assertEqual(sorted(n for batch in batches for n in batch), sorted(lengths))
+
+
+class BuildTokenBatchTest(unittest.TestCase):
+
+    def test_padding_and_boundaries(self):
+        batch = build_token_batch([[5, 6, 7], [8]], [STYLE_TABLE, STYLE_TABLE], [1.0, 1.5])
+
+        self.assertEqual(batch.tokens.shape, (2, 16))
+        self.assertEqual(batch.tokens.dtype, np.int64)
+        self.assertEqual(batch.tokens[0, :5].tolist(), [0, 5, 6, 7, 0])
+        self.assertEqual(batch.tokens[1, :3].tolist(), [0, 8, 0])
+        self.assertTrue((batch.tokens[:, 5:] == PAD_TOKEN).all())
+        self.assertEqual(batch.lengths.tolist(), [3, 1])
+        self.assertEqual(batch.speeds.tolist(), [1.0, 1.5])
+        self.assertAlmostEqual(batch.padding_waste, 1 - 8 / 32)
+
+    def test_style_selected_per_length(self):
+        batch = build_token_batch([[1, 2, 3], [4]], [STYLE_TABLE, STYLE_TABLE])
+        np.testing.assert_array_equal(batch.styles[0], STYLE_TABLE[3].reshape(-1))
+        np.testing.assert_array_equal(batch.styles[1], STYLE_TABLE[1].reshape(-1))
+        self.assertEqual(batch.speeds.tolist(), [1.0, 1.0])
+
+    def test_split_rejects_unbatched_output(self):
+        batch = build_token_batch([[1, 2], [3]], [STYLE_TABLE, STYLE_TABLE])
+        with self.assertRaises(ValueError):
+            batch.split_audio([np.zeros(1000, dtype=np.float32)])
+
+
+class BatchEquivalenceTest(unittest.TestCase):
+
+    SEQUENCES = [[4, 9, 13, 2, 7, 7, 1], [5, 11], [3, 8, 6, 12, 10, 4, 2, 9, 9, 1, 14, 5, 6]]
+
+    def test_split_audio_matches_single_runs(self):
+        batch = build_token_batch(self.SEQUENCES, [STYLE_TABLE] * 3, [1.0, 0.8, 1.2])
+        batched = batch.split_audio(fake_model(batch.tokens, batch.styles, batch.speeds))
+
+        for seq, speed, audio in zip(self.SEQUENCES, [1.0, 0.8, 1.2], batched):
+            single = run_alone(fake_model, seq, speed=speed)
+            self.assertEqual(len(audio), len(single))
+            np.testing.assert_allclose(audio, single, atol=1e-6)
+
+    def test_verify_accepts_matching_model(self):
+        self.assertIsNone(verify_batched_inference(fake_model, self.SEQUENCES, STYLE_TABLE))
+
+    def test_verify_rejects_padding_sensitive_model(self):
+        reason = verify_batched_inference(leaky_model, self.SEQUENCES, STYLE_TABLE)
+        self.assertIn('differs', reason)
+
+    def test_verify_rejects_model_without_batch_outputs(self):
+        def single_output_model(tokens, styles, speeds):
+            return [fake_model(tokens, styles, speeds)[0][0]]
+
+        reason = verify_batched_inference(single_output_model, self.SEQUENCES, STYLE_TABLE)
+        self.assertIn('batched run failed', reason)
+
+
+if __name__ == '__main__':
+    unittest.main()
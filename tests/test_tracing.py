@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests for request tracing and its context propagation"""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+def spans_by_name(trace):
+    return {record['name']: record for record in trace.to_dict()['spans']}
+
+
+def in_thread(func):
+    """Run func on a new thread and return its result"""
+    results = []
+    thread = threading.Thread(target=lambda: results.append(func()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+class TracingTest(unittest.TestCase):
+
+    def test_span_is_a_no_op_without_a_trace(self):
+        self.assertIsNone(tracing.current_trace())
+        with tracing.span('orphan') as record:
+            self.assertIsNone(record)
+
+    def test_nested_spans(self):
+        with tracing.start_trace('request', voice='af') as trace:
+            with tracing.span('outer'):
+                with tracing.span('inner', size=3):
+                    pass
+            with tracing.span('sibling'):
+                pass
+
+        spans = spans_by_name(trace)
+        self.assertIsNone(spans['outer']['parent'])
+        self.assertEqual(spans['inner']['parent'], spans['outer']['id'])
+        self.assertIsNone(spans['sibling']['parent'])
+        self.assertEqual(spans['inner']['attributes'], {'size': 3})
+        self.assertTrue(all(record['duration_ms'] >= 0 for record in spans.values()))
+        self.assertIsNone(tracing.current_trace())
+
+    def test_finished_traces_are_kept(self):
+        with tracing.start_trace('request', voice='af') as trace:
+            pass
+
+        self.assertEqual(tracing.get_trace(trace.trace_id)['attributes'], {'voice': 'af'})
+        self.assertEqual(tracing.get_traces(limit=1)[0]['trace_id'], trace.trace_id)
+        self.assertEqual(tracing.get_traces(limit=0), [])
+        self.assertIsNone(tracing.get_trace('missing'))
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(ValueError):
+            with tracing.start_trace('request') as trace:
+                with tracing.span('stage'):
+                    raise ValueError("bad input")
+
+        self.assertEqual(trace.error, 'bad input')
+        self.assertEqual(spans_by_name(trace)['stage']['attributes'], {'error': 'bad input'})
+        trace.finish('ignored')    # already finished
+        self.assertEqual(trace.error, 'bad input')
+
+    def test_threads_do_not_inherit_the_trace(self):
+        with tracing.start_trace('request'):
+            self.assertIsNone(in_thread(tracing.current_trace))
+
+    def test_bind_carries_trace_and_parent_span_to_other_threads(self):
+        def stage():
+            with tracing.span('threaded') as record:
+                return tracing.current_trace(), record['parent']
+
+        with tracing.start_trace('request') as trace:
+            with tracing.span('fan_out') as parent:
+                bound = tracing.bind(stage)
+                seen_trace, seen_parent = in_thread(bound)
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    pooled = [future.result() for future in
+                              [executor.submit(tracing.bind(stage)) for _ in range(2)]]
+
+        self.assertIs(seen_trace, trace)
+        self.assertEqual(seen_parent, parent['id'])
+        self.assertEqual(pooled, [(trace, parent['id'])] * 2)
+        self.assertEqual(sum(record['name'] == 'threaded' for record in trace.to_dict()['spans']), 3)
+
+    def test_bind_without_a_trace_returns_the_function(self):
+        self.assertIs(tracing.bind(len), len)
+
+    def test_activate_restores_the_previous_context(self):
+        outer = tracing.Trace('outer')
+        inner = tracing.Trace('inner')
+        with tracing.activate(outer):
+            with tracing.activate(inner, parent=7):
+                with tracing.span('child') as record:
+                    self.assertEqual(record['parent'], 7)
+            self.assertIs(tracing.current_trace(), outer)
+        self.assertIsNone(tracing.current_trace())
+
+    def test_remote_spans_nest_under_their_parent(self):
+        with tracing.start_trace('request') as trace:
+            with tracing.span('worker_job') as job:
+                pass
+            trace.add_remote_spans([{'name': 'inference', 'start': 0.001, 'duration': 0.002}],
+                                   job['id'], job['start_ms'])
+
+        remote = spans_by_name(trace)['inference']
+        self.assertEqual(remote['parent'], job['id'])
+        self.assertAlmostEqual(remote['start_ms'], job['start_ms'] + 1.0)
+        self.assertAlmostEqual(remote['duration_ms'], 2.0)
+        self.assertEqual(remote['attributes'], {'remote': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Tests for voice blend parsing, named blends and blended styles"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from voice_blending import BlendRegistry, VoiceBlender, format_blend, is_blend_spec, parse_blend
+
+
+class FakeVoiceStore:
+
+    STYLES = {'af_heart': 1.0, 'af_sky': 3.0, 'am_adam': 5.0}
+
+    def __contains__(self, voice):
+        return voice in self.STYLES
+
+    def get_voices(self):
+        return sorted(self.STYLES)
+
+    def get_voice_style(self, voice):
+        if voice not in self.STYLES:
+            raise KeyError(f"Unknown voice '{voice}'")
+        style = np.full((4, 1, 2), self.STYLES[voice], dtype=np.float32)
+        style.setflags(write=False)
+        return style
+
+
+class ParseBlendTest(unittest.TestCase):
+
+    def test_is_blend_spec(self):
+        self.assertTrue(is_blend_spec('af_heart:0.7+af_sky:0.3'))
+        self.assertTrue(is_blend_spec('af_heart+af_sky'))
+        self.assertTrue(is_blend_spec({'af_heart': 1}))
+        self.assertFalse(is_blend_spec('af_heart'))
+        self.assertFalse(is_blend_spec(None))
+
+    def test_weights_are_normalized_and_sorted(self):
+        self.assertEqual(parse_blend('af_sky:3 + af_heart:1'), [('af_heart', 0.25), ('af_sky', 0.75)])
+        self.assertEqual(parse_blend('af_heart+af_sky'), [('af_heart', 0.5), ('af_sky', 0.5)])
+        self.assertEqual(parse_blend({'af_heart': 7, 'af_sky': 3}), [('af_heart', 0.7), ('af_sky', 0.3)])
+
+    def test_repeated_voices_add_up_and_zero_weights_drop(self):
+        self.assertEqual(parse_blend('af_heart:1+af_sky:0+af_heart:1'), [('af_heart', 1.0)])
+
+    def test_equal_blends_share_a_canonical_form(self):
+        specs = ['af_heart:0.7+af_sky:0.3', 'af_sky:3+af_heart:7', {'af_sky': 0.3, 'af_heart': 0.7}]
+        self.assertEqual({format_blend(parse_blend(spec)) for spec in specs}, {'af_heart:0.7+af_sky:0.3'})
+
+    def test_invalid_specs(self):
+        for spec in ['af_heart:x', 'af_heart:-1', 'af_heart:0', ':1', 'af_heart:nan', {'af_heart': None}]:
+            with self.assertRaises(ValueError, msg=spec):
+                parse_blend(spec)
+
+
+class BlendRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, 'blends', 'voice_blends.json')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def registry(self):
+        return BlendRegistry(self.path, voices=FakeVoiceStore.STYLES)
+
+    def test_register_persists_the_canonical_spec(self):
+        registry = self.registry()
+        with self.assertLogs('voice_blending', 'INFO'):
+            spec = registry.register('warm', 'af_sky:1+af_heart:3')
+
+        self.assertEqual(spec, 'af_heart:0.75+af_sky:0.25')
+        self.assertEqual(registry.get('warm'), spec)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'warm': spec})
+        self.assertEqual(self.registry().get_blends(), {'warm': spec})
+
+    def test_changes_from_another_process_are_picked_up(self):
+        registry = self.registry()
+        self.assertEqual(registry.get_blends(), {})
+
+        other = self.registry()
+        with self.assertLogs('voice_blending', 'INFO'):
+            other.register('bright', 'af_sky')
+        self.assertEqual(registry.get('bright'), 'af_sky:1')
+
+    def test_invalid_registrations(self):
+        registry = self.registry()
+        for name, spec in [('bad name', 'af_heart'), ('', 'af_heart'), ('af_sky', 'af_heart'),
+                           ('reserved', 'af_heart'), ('mix', 'af_heart+bf_unknown')]:
+            with self.assertRaises(ValueError, msg=name):
+                registry.register(name, spec, reserved={'reserved'})
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_normalize(self):
+        registry = self.registry()
+        with self.assertLogs('voice_blending', 'INFO'):
+            registry.register('warm', 'af_heart:3+af_sky:1')
+
+        self.assertEqual(registry.normalize('af_heart'), 'af_heart')
+        self.assertEqual(registry.normalize('warm'), 'af_heart:0.75+af_sky:0.25')
+        self.assertEqual(registry.normalize({'af_sky': 2, 'af_heart': 2}), 'af_heart:0.5+af_sky:0.5')
+        for voice in ['nobody', 'af_heart+nobody', 42]:
+            with self.assertRaises(ValueError, msg=voice):
+                registry.normalize(voice)
+
+    def test_unreadable_file_keeps_the_last_blends(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        with self.assertLogs('voice_blending', 'WARNING'):
+            self.assertEqual(self.registry().get_blends(), {})
+
+
+class VoiceBlenderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        registry = BlendRegistry(os.path.join(self.tempdir.name, 'blends.json'), voices=FakeVoiceStore.STYLES)
+        with self.assertLogs('voice_blending', 'INFO'):
+            registry.register('warm', 'af_heart:3+af_sky:1')
+        self.blender = VoiceBlender(FakeVoiceStore(), registry, max_cached=2)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_base_voice_is_served_from_the_store(self):
+        np.testing.assert_array_equal(self.blender.resolve('af_sky'), np.full((4, 1, 2), 3.0))
+        self.assertEqual(self.blender.get_stats()['misses'], 0)
+
+    def test_blend_mixes_styles_and_is_cached(self):
+        style = self.blender.resolve('af_heart:0.5+af_sky:0.5')
+        np.testing.assert_allclose(style, np.full((4, 1, 2), 2.0))
+        self.assertFalse(style.flags.writeable)
+
+        self.assertIs(self.blender.resolve({'af_sky': 1, 'af_heart': 1}), style)
+        stats = self.blender.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['cached_blends']), (1, 1, 1))
+
+    def test_named_blend(self):
+        np.testing.assert_allclose(self.blender.resolve('warm'), np.full((4, 1, 2), 1.5))
+        self.assertEqual(self.blender.get_voices(), ['af_heart', 'af_sky', 'am_adam', 'warm'])
+        self.assertEqual(self.blender.get_stats()['named_blends'], {'warm': 'af_heart:0.75+af_sky:0.25'})
+
+    def test_lru_cache_is_bounded(self):
+        for spec in ['af_heart+af_sky', 'af_heart+am_adam', 'af_sky+am_adam', 'af_heart+af_sky']:
+            self.blender.resolve(spec)
+        stats = self.blender.get_stats()
+        self.assertEqual((stats['misses'], stats['cached_blends']), (4, 2))
+
+    def test_unknown_voices(self):
+        with self.assertRaises(KeyError):
+            self.blender.resolve('nobody')
+        with self.assertRaises(KeyError):
+            self.blender.resolve('af_heart+nobody')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Tests for the memory-mapped voice style store"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from voice_store import VoiceStore
+
+
+def style_of(value):
+    return np.full((510, 1, 256), value, dtype=np.float32)
+
+
+class VoiceStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.store_dir = os.path.join(self.tempdir.name, 'store')
+        self.voices_path = os.path.join(self.tempdir.name, 'voices.npz')
+        np.savez(self.voices_path, bf_emma=style_of(0.2), af_heart=style_of(0.1))
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_conversion_and_lookup(self):
+        with self.assertLogs('voice_store', 'INFO'):
+            store = VoiceStore(self.voices_path, self.store_dir)
+
+        self.assertEqual(store.get_voices(), ['af_heart', 'bf_emma'])
+        self.assertIn('bf_emma', store)
+        self.assertNotIn('am_adam', store)
+        self.assertFalse(store.get_stats()['mapped'])
+
+        style = store.get_voice_style('bf_emma')
+        np.testing.assert_array_equal(style, style_of(0.2))
+        self.assertIsInstance(store.styles, np.memmap)
+        stats = store.get_stats()
+        self.assertTrue(stats['mapped'])
+        self.assertEqual((stats['voices'], stats['style_shape']), (2, [510, 1, 256]))
+
+    def test_styles_are_read_only(self):
+        store = VoiceStore(self.voices_path, self.store_dir)
+        with self.assertRaises(ValueError):
+            store.get_voice_style('af_heart')[0] = 1.0
+
+    def test_unknown_voice(self):
+        store = VoiceStore(self.voices_path, self.store_dir)
+        with self.assertRaises(KeyError):
+            store.get_voice_style('am_adam')
+
+    def test_converted_store_is_reused(self):
+        first = VoiceStore(self.voices_path, self.store_dir)
+        with mock.patch.object(VoiceStore, '_convert', side_effect=AssertionError("converted again")):
+            second = VoiceStore(self.voices_path, self.store_dir)
+        self.assertEqual(second.array_path, first.array_path)
+        np.testing.assert_array_equal(second.get_voice_style('af_heart'), style_of(0.1))
+
+    def test_changed_voices_file_gets_a_new_store(self):
+        first = VoiceStore(self.voices_path, self.store_dir)
+        np.savez(self.voices_path, af_heart=style_of(0.5))
+        os.utime(self.voices_path, ns=(0, 1))    # the fingerprint is cached by size and mtime
+
+        second = VoiceStore(self.voices_path, self.store_dir)
+        self.assertNotEqual(second.array_path, first.array_path)
+        self.assertEqual(second.get_voices(), ['af_heart'])
+        np.testing.assert_array_equal(second.get_voice_style('af_heart'), style_of(0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Text Segmentation for Streaming Synthesis
+
+Splits input text at sentence boundaries, and long sentences further at
+clause boundaries, so each segment can be synthesized and streamed on its own.
+"""
+
+import re
+
+SENTENCE_BOUNDARY = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\')\]]))\s+|\n{2,}')
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:—–])\s+')
+
+DEFAULT_MAX_SEGMENT_CHARS = 200
+
+
+def _split_long(text: str, max_chars: int) -> list[str]:
+    """Split an over-long sentence at clause boundaries, then at whitespace"""
+    pieces = []
+    current = ""
+    for clause in CLAUSE_BOUNDARY.split(text):
+        if len(clause) > max_chars and current:
+            # Flush what came before, or the clause's pieces would jump ahead of it
+            pieces.append(current)
+            current = ""
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+
+        if current and len(current) + 1 + len(clause) > max_chars:
+            pieces.append(current)
+            current = clause
+        else:
+            current = f"{current} {clause}" if current else clause
+
+    if current:
+        pieces.append(current)
+    return [piece for piece in pieces if piece]
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into whitespace-normalized sentences"""
+    sentences = (" ".join(sentence.split()) for sentence in SENTENCE_BOUNDARY.split(text.strip()))
+    return [sentence for sentence in sentences if sentence]
+
+
+def split_text_segments(text: str, max_chars: int = DEFAULT_MAX_SEGMENT_CHARS) -> list[str]:
+    """
+    Split text into sentence/clause segments for incremental synthesis
+
+    Args:
+        text: Text to split
+        max_chars: Longest segment before splitting at clause boundaries
+
+    Returns:
+        Non-empty segments in reading order
+    """
+    segments = []
+    for sentence in split_sentences(text):
+        if len(sentence) > max_chars:
+            segments.extend(_split_long(sentence, max_chars))
+        else:
+            segments.append(sentence)
+    return segments
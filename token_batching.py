@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Length-Bucketed Token Batching
+
+Builds contiguous int64 [B, T] token batches for the Kokoro model from many
+tokenized requests. Sequence lengths are rounded up to bucket edges (powers
+of two by default) so batches of similar length share one padded shape and
+padded compute stays small. Used by the online micro-batcher and by offline
+bulk jobs alike.
+
+Padding is plain PAD_TOKEN with no attention mask (the Kokoro graph takes
+none), and each row's audio is cut back using its predicted durations.
+Whether that reproduces single-sequence output depends on the exported
+model, so callers check it once with verify_batched_inference() and only
+batch when it passes.
+"""
+
+import bisect
+
+import numpy as np
+
+# Kokoro accepts at most 510 phoneme tokens plus the two boundary tokens
+MAX_TOKENS = 510
+PAD_TOKEN = 0
+
+# Kokoro predicts durations in 40 Hz frames (600 samples each at 24 kHz)
+SAMPLES_PER_FRAME = 600
+
+# Sentences of clearly different lengths, for checking a model's padded batches
+BATCH_PROBE_TEXTS = (
+    "Hello there.",
+    "This sentence is quite a bit longer, so the first one gets padded."
+)
+
+
+def power_of_two_edges(min_length: int = 16, max_length: int = MAX_TOKENS + 2) -> list[int]:
+    """Bucket edges 16, 32, 64, ... ending at max_length"""
+    edges = []
+    edge = min_length
+    while edge < max_length:
+        edges.append(edge)
+        edge *= 2
+    edges.append(max_length)
+    return edges
+
+
+DEFAULT_BUCKET_EDGES = power_of_two_edges()
+
+
+def bucket_length(length: int, bucket_edges: list[int] | None = None) -> int:
+    """Round a padded sequence length up to its bucket edge"""
+    edges = bucket_edges or DEFAULT_BUCKET_EDGES
+    index = bisect.bisect_left(edges, length)
+    return edges[index] if index < len(edges) else length
+
+
+class TokenBatch:
+    """A padded token batch ready to feed to the model"""
+
+    def __init__(self, tokens: np.ndarray, styles: np.ndarray, speeds: np.ndarray,
+                 lengths: np.ndarray):
+        self.tokens = tokens      # [B, T] int64, boundary + pad tokens included
+        self.styles = styles      # [B, style_dim] float32
+        self.speeds = speeds      # [B] float32
+        self.lengths = lengths    # [B] unpadded token counts (without boundaries)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def padded_length(self) -> int:
+        return self.tokens.shape[1]
+
+    @property
+    def padding_waste(self) -> float:
+        """Share of token slots that are padding"""
+        slots = self.tokens.size
+        return (slots - int(self.lengths.sum() + 2 * len(self))) / slots if slots else 0.0
+
+    def input_feed(self) -> dict:
+        """Model inputs for ONNX Runtime"""
+        return {'tokens': self.tokens, 'style': self.styles, 'speed': self.speeds}
+
+    def split_audio(self, outputs: list) -> list[np.ndarray]:
+        """Split batched model outputs into per-request audio, trimming the padding"""
+        audio = np.asarray(outputs[0])
+        if len(outputs) < 2 or audio.ndim != 2 or audio.shape[0] != len(self):
+            raise ValueError("model does not return per-sample audio and durations")
+
+        # Trim padding from each sample using its predicted durations
+        durations = np.asarray(outputs[1])
+        return [
+            audio[i, :int(durations[i, :length + 2].sum()) * SAMPLES_PER_FRAME]
+            for i, length in enumerate(self.lengths)
+        ]
+
+
+def select_style(voice_style: np.ndarray, num_tokens: int) -> np.ndarray:
+    """Pick the style vector for a sequence length from a voice style table"""
+    voice_style = np.asarray(voice_style, dtype=np.float32)
+    if voice_style.ndim >= 2 and voice_style.shape[0] > 1:
+        voice_style = voice_style[num_tokens]
+    return voice_style.reshape(-1)
+
+
+def build_token_batch(token_seqs: list, voice_styles: list, speeds: list | None = None,
+                      bucket_edges: list[int] | None = None) -> TokenBatch:
+    """
+    Build one contiguous padded batch
+
+    Args:
+        token_seqs: Token sequences (without boundary tokens)
+        voice_styles: Per-request voice style tables (e.g. shape (510, 1, 256)),
+            or style vectors already selected for the sequence length
+        speeds: Per-request speeds (default 1.0)
+        bucket_edges: Bucket edges for the padded length (None = powers of two)
+
+    Returns:
+        TokenBatch with tokens [B, T], styles [B, style_dim] and speeds [B]
+    """
+    lengths = np.array([len(tokens) for tokens in token_seqs], dtype=np.int64)
+    padded_length = bucket_length(int(lengths.max()) + 2, bucket_edges)
+
+    tokens = np.full((len(token_seqs), padded_length), PAD_TOKEN, dtype=np.int64)
+    for i, seq in enumerate(token_seqs):
+        tokens[i, 1:1 + len(seq)] = seq
+
+    styles = np.stack([select_style(style, int(length)) for style, length in zip(voice_styles, lengths)])
+    speeds = np.asarray(speeds if speeds is not None else [1.0] * len(token_seqs), dtype=np.float32)
+
+    return TokenBatch(tokens, styles, speeds, lengths)
+
+
+def verify_batched_inference(run_model, token_seqs: list, voice_style, speed: float = 1.0,
+                             bucket_edges: list[int] | None = None, tolerance: float = 1e-3) -> str | None:
+    """
+    Check that a padded batch gives the same audio as running each sequence alone
+
+    Args:
+        run_model: Callable (tokens [B, T], styles [B, style_dim], speeds [B]) -> model outputs
+        token_seqs: Token sequences of different lengths (without boundary tokens)
+        voice_style: Voice style table used for every sequence
+        speed: Speech speed
+        bucket_edges: Bucket edges for the padded length (None = powers of two)
+        tolerance: Largest absolute sample difference accepted
+
+    Returns:
+        None when the batched audio matches, otherwise the reason it doesn't
+    """
+    try:
+        singles = []
+        for seq in token_seqs:
+            outputs = run_model(np.array([[PAD_TOKEN, *seq, PAD_TOKEN]], dtype=np.int64),
+                                select_style(voice_style, len(seq))[np.newaxis],
+                                np.array([speed], dtype=np.float32))
+            singles.append(np.asarray(outputs[0], dtype=np.float32).reshape(-1))
+
+        batch = build_token_batch(token_seqs, [voice_style] * len(token_seqs),
+                                  [speed] * len(token_seqs), bucket_edges)
+        batched = batch.split_audio(run_model(batch.tokens, batch.styles, batch.speeds))
+    except Exception as e:
+        return f"batched run failed: {e}"
+
+    for index, (single, audio) in enumerate(zip(singles, batched)):
+        if len(audio) != len(single):
+            return f"sequence {index} is {len(audio)} samples batched but {len(single)} alone"
+        error = float(np.max(np.abs(audio - single))) if len(single) else 0.0
+        if error > tolerance:
+            return f"sequence {index} differs by up to {error:.4f} when batched"
+    return None
+
+
+def iter_bucketed_batches(items: list, length_of, max_batch_size: int = 8,
+                          bucket_edges: list[int] | None = None):
+    """
+    Group items into batches of the same length bucket
+
+    Args:
+        items: Items to batch (e.g. tokenized requests or corpus lines)
+        length_of: Function giving an item's token count
+        max_batch_size: Largest batch yielded
+        bucket_edges: Bucket edges (None = powers of two)
+
+    Yields:
+        Lists of items, shortest buckets first
+    """
+    buckets = {}
+    for item in items:
+        buckets.setdefault(bucket_length(length_of(item) + 2, bucket_edges), []).append(item)
+
+    for _, bucket in sorted(buckets.items()):
+        bucket.sort(key=length_of)
+        for start in range(0, len(bucket), max_batch_size):
+            yield bucket[start:start + max_batch_size]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Lightweight Request Tracing
+
+Per-request traces made of nested, timed spans (monotonic clock), so a
+synthesis request can be broken down into cache lookup, worker queue wait,
+phonemize, inference, encoding and storage. The active trace and span live
+in context variables: code anywhere in the pipeline wraps work in
+`with span("name"):` and it is a no-op when no trace is active. Spans
+measured in another process (the synthesis workers) are grafted in with
+add_remote_spans(). Finished traces are kept in a ring buffer for /traces.
+"""
+
+import os
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+TRACE_BUFFER_SIZE = int(os.environ.get('MAGIC_UNICORN_TRACE_BUFFER', 200))
+
+_current_trace = contextvars.ContextVar('magic_unicorn_trace', default=None)
+_current_span = contextvars.ContextVar('magic_unicorn_span', default=None)
+
+_finished = deque(maxlen=TRACE_BUFFER_SIZE)
+_finished_lock = threading.Lock()
+
+
+class Trace:
+    """Timeline of one request"""
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._end = None
+        self._spans = []
+        self._lock = threading.Lock()
+        self.error = None
+
+    def _offset(self, timestamp: float) -> float:
+        return (timestamp - self._start) * 1000
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a child of the context's current span"""
+        record = {
+            'parent': _current_span.get(),
+            'name': name,
+            'start_ms': self._offset(time.perf_counter()),
+            'duration_ms': None,
+            'attributes': attributes
+        }
+        with self._lock:
+            record['id'] = len(self._spans) + 1
+            self._spans.append(record)
+
+        token = _current_span.set(record['id'])
+        try:
+            yield record
+        except Exception as e:
+            record['attributes']['error'] = str(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            record['duration_ms'] = self._offset(time.perf_counter()) - record['start_ms']
+
+    def add_remote_spans(self, spans: list[dict], parent: int | None, base_ms: float):
+        """
+        Attach spans timed elsewhere (e.g. in a worker process)
+
+        Args:
+            spans: Dicts with 'name', 'start' and 'duration' in seconds
+                relative to the remote side's own start
+            parent: Span ID to nest them under
+            base_ms: Offset in this trace the remote start corresponds to
+        """
+        with self._lock:
+            for remote in spans:
+                self._spans.append({
+                    'id': len(self._spans) + 1,
+                    'parent': parent,
+                    'name': remote['name'],
+                    'start_ms': base_ms + remote['start'] * 1000,
+                    'duration_ms': remote['duration'] * 1000,
+                    'attributes': {'remote': True, **remote.get('attributes', {})}
+                })
+
+    def finish(self, error: str | None = None):
+        """Close the trace and keep it in the ring buffer"""
+        if self._end is not None:
+            return
+        self._end = time.perf_counter()
+        self.error = error
+        with _finished_lock:
+            _finished.append(self)
+
+    @property
+    def duration_ms(self) -> float | None:
+        return self._offset(self._end) if self._end is not None else None
+
+    def summary(self) -> dict:
+        """Trace without its spans"""
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'error': self.error,
+            'attributes': self.attributes,
+            'span_count': len(self._spans)
+        }
+
+    def to_dict(self) -> dict:
+        """Trace with its spans ordered by start time"""
+        with self._lock:
+            spans = sorted((dict(record) for record in self._spans), key=lambda record: record['start_ms'])
+        return {**self.summary(), 'spans': spans}
+
+
+def current_trace() -> Trace | None:
+    """Trace active in this context, if any"""
+    return _current_trace.get()
+
+
+@contextmanager
+def activate(trace: Trace | None, parent: int | None = None):
+    """Make a trace (and optionally a parent span) current in this context"""
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(parent)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """Trace the enclosed block as one request, finishing it on exit"""
+    trace = Trace(name, **attributes)
+    error = None
+    with activate(trace):
+        try:
+            yield trace
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            trace.finish(error)
+
+
+def span(name: str, **attributes):
+    """Time a block in the current trace (no-op without one)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, **attributes)
+
+
+def bind(func):
+    """Wrap func to run under the caller's current trace and span, for work handed to other threads"""
+    trace = _current_trace.get()
+    if trace is None:
+        return func
+    parent = _current_span.get()
+
+    def bound(*args, **kwargs):
+        with activate(trace, parent):
+            return func(*args, **kwargs)
+    return bound
+
+
+def get_traces(limit: int = 50) -> list[dict]:
+    """Summaries of the most recent finished traces, newest first"""
+    with _finished_lock:
+        traces = list(_finished)[-limit:] if limit > 0 else []
+    return [trace.summary() for trace in reversed(traces)]
+
+
+def get_trace(trace_id: str) -> dict | None:
+    """Full timeline of a finished trace"""
+    with _finished_lock:
+        for trace in reversed(_finished):
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+    return None
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Voice Blending
+
+Custom voices made by mixing existing voice styles, e.g. 70% af_heart +
+30% af_sky. A blend is given as a spec string ("af_heart:0.7+af_sky:0.3")
+or a dict ({"af_heart": 0.7, "af_sky": 0.3}); weights are normalized to sum
+to 1 and specs have one canonical form, so equal blends share cache entries.
+Blended style tables are cached by spec, and named blends can be registered
+at runtime and are persisted to a JSON file shared by all processes.
+"""
+
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VOICE_BLENDS_PATH = os.environ.get(
+    'MAGIC_UNICORN_VOICE_BLENDS',
+    os.path.join(os.path.expanduser('~'), '.cache', 'magic_unicorn', 'voice_blends.json')
+)
+
+BLEND_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_\-]{1,64}$')
+
+
+def is_blend_spec(voice) -> bool:
+    """Whether a voice argument is a blend spec rather than a voice/blend name"""
+    return isinstance(voice, dict) or (isinstance(voice, str) and (':' in voice or '+' in voice))
+
+
+def parse_blend(spec) -> list[tuple[str, float]]:
+    """
+    Parse a blend spec into (voice, weight) pairs with weights summing to 1
+
+    Raises:
+        ValueError: If the spec is malformed or has no positive weight
+    """
+    if isinstance(spec, dict):
+        items = list(spec.items())
+    else:
+        items = []
+        for part in str(spec).split('+'):
+            name, _, weight = part.strip().partition(':')
+            items.append((name, weight or 1.0))
+
+    weights = {}
+    for name, weight in items:
+        name = str(name).strip()
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid weight for voice '{name}' in blend")
+        if not name or not math.isfinite(weight) or weight < 0:
+            raise ValueError(f"Invalid blend component '{name}:{weight}'")
+        weights[name] = weights.get(name, 0.0) + weight
+
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Blend needs at least one voice with a positive weight")
+    return sorted((name, weight / total) for name, weight in weights.items() if weight > 0)
+
+
+def format_blend(components: list[tuple[str, float]]) -> str:
+    """Canonical spec string of parsed components"""
+    return '+'.join(f"{name}:{weight:.4g}" for name, weight in components)
+
+
+class BlendRegistry:
+    """Named blends persisted to a JSON file, reloaded when another process changes it"""
+
+    def __init__(self, path: str = VOICE_BLENDS_PATH, voices=None):
+        """
+        Initialize the registry
+
+        Args:
+            path: JSON file the named blends are persisted to
+            voices: Known voice IDs blends may use (not checked if None)
+        """
+        self.path = path
+        self.voices = frozenset(voices) if voices is not None else None
+        self._lock = threading.Lock()
+        self._blends = {}
+        self._mtime = None
+        self._reload_if_changed()
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path) as f:
+                blends = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Could not load voice blends from {self.path}: {e}")
+            return
+        self._blends = blends
+        self._mtime = mtime
+
+    def _check_voices(self, components: list[tuple[str, float]]):
+        """Reject blend components that aren't known voices"""
+        if self.voices is None:
+            return
+        unknown = sorted(name for name, _ in components if name not in self.voices)
+        if unknown:
+            raise ValueError(f"Unknown voice(s) in blend: {', '.join(unknown)}")
+
+    def get(self, name: str) -> str | None:
+        """Get the canonical spec of a named blend"""
+        with self._lock:
+            self._reload_if_changed()
+            return self._blends.get(name)
+
+    def get_blends(self) -> dict:
+        """Get all named blends (name -> canonical spec)"""
+        with self._lock:
+            self._reload_if_changed()
+            return dict(self._blends)
+
+    def register(self, name: str, spec, reserved=()) -> str:
+        """
+        Register (or replace) a named blend and persist it
+
+        Args:
+            name: Blend name (letters, digits, '_' and '-')
+            spec: Blend spec string or dict
+            reserved: Names that can't be used besides the known voices
+
+        Returns:
+            Canonical spec of the blend
+
+        Raises:
+            ValueError: If the name or spec is invalid
+        """
+        if not isinstance(name, str) or not BLEND_NAME_PATTERN.match(name):
+            raise ValueError("Blend name must be 1-64 letters, digits, '_' or '-'")
+        if name in reserved or (self.voices is not None and name in self.voices):
+            raise ValueError(f"'{name}' is already a voice name")
+        components = parse_blend(spec)
+        self._check_voices(components)
+        canonical = format_blend(components)
+
+        with self._lock:
+            self._reload_if_changed()
+            blends = {**self._blends, name: canonical}
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(blends, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+            self._blends = blends
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+        logger.info(f"🎨 Registered voice blend '{name}' = {canonical}")
+        return canonical
+
+    def normalize(self, voice) -> str:
+        """
+        Turn a voice argument into the string that identifies its sound
+
+        Blend specs and dicts become their canonical spec and named blends
+        expand to their spec, so cache keys follow the actual mix even if a
+        named blend is redefined. Plain voice names are returned unchanged.
+
+        Raises:
+            ValueError: If a blend spec is malformed or uses an unknown voice,
+                or a plain name is neither a known voice nor a named blend
+        """
+        if is_blend_spec(voice):
+            components = parse_blend(voice)
+            self._check_voices(components)
+            return format_blend(components)
+        if not isinstance(voice, str):
+            raise ValueError("Voice must be a name or a blend spec")
+
+        named = self.get(voice)
+        if named is not None:
+            return named
+        if self.voices is not None and voice not in self.voices:
+            raise ValueError(f"Unknown voice '{voice}'")
+        return voice
+
+
+class VoiceBlender:
+    """Resolves voice names, blend specs and named blends to style tables"""
+
+    def __init__(self, voice_store, registry: BlendRegistry | None = None, max_cached: int = 64):
+        """
+        Initialize the blender
+
+        Args:
+            voice_store: VoiceStore providing the base voice styles
+            registry: Named blend registry (None = the default registry file)
+            max_cached: Blended style tables kept in memory
+        """
+        self.voice_store = voice_store
+        self.registry = registry or BlendRegistry()
+        self.max_cached = max_cached
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()   # canonical spec -> style table
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def resolve(self, voice) -> np.ndarray:
+        """
+        Get the style table of a voice name, blend spec or named blend
+
+        Raises:
+            KeyError: If a voice is unknown
+            ValueError: If a blend spec is malformed
+        """
+        if isinstance(voice, str) and voice in self.voice_store:
+            return self.voice_store.get_voice_style(voice)
+
+        if not is_blend_spec(voice):
+            spec = self.registry.get(voice)
+            if spec is None:
+                raise KeyError(f"Unknown voice '{voice}'")
+            voice = spec
+
+        components = parse_blend(voice)
+        spec = format_blend(components)
+        with self._lock:
+            style = self._cache.get(spec)
+            if style is not None:
+                self._cache.move_to_end(spec)
+                self._stats['hits'] += 1
+                return style
+            self._stats['misses'] += 1
+
+        style = np.zeros_like(self.voice_store.get_voice_style(components[0][0]), dtype=np.float32)
+        for name, weight in components:
+            style += weight * self.voice_store.get_voice_style(name)
+        style.setflags(write=False)
+
+        with self._lock:
+            self._cache[spec] = style
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return style
+
+    def get_voices(self) -> list[str]:
+        """Base voices followed by named blends"""
+        return self.voice_store.get_voices() + sorted(self.registry.get_blends())
+
+    def get_stats(self) -> dict:
+        """Get blend cache counters and named blends"""
+        with self._lock:
+            stats = {**self._stats, 'cached_blends': len(self._cache)}
+        stats['named_blends'] = self.registry.get_blends()
+        return stats
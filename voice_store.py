@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Voice Style Store
+
+Converts the Kokoro voices file (an .npz of per-voice style tables) once into
+a single aligned .npy array plus a JSON index of voice name -> row. Every
+process maps the same array read-only, so N workers share one copy of the
+style data through the OS page cache instead of each loading its own, and
+listing voices only reads the small index.
+"""
+
+import os
+import json
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VOICE_STORE_DIR = os.environ.get(
+    'MAGIC_UNICORN_VOICE_STORE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'magic_unicorn', 'voices')
+)
+
+
+class VoiceStore:
+    """Read-only voice style tables backed by a shared memory-mapped array"""
+
+    def __init__(self, voices_path: str, store_dir: str = VOICE_STORE_DIR):
+        """
+        Open the store for a voices file, converting it on first use
+
+        Args:
+            voices_path: Kokoro voices file (e.g. voices-v1.0.bin)
+            store_dir: Directory of the converted array and index
+        """
+        from synthesis_cache import model_fingerprint
+
+        self.voices_path = voices_path
+        self.store_dir = store_dir
+
+        stem = os.path.splitext(os.path.basename(voices_path))[0]
+        key = model_fingerprint(voices_path)[:16]
+        self.array_path = os.path.join(store_dir, f"{stem}.{key}.npy")
+        self.index_path = os.path.join(store_dir, f"{stem}.{key}.json")
+
+        self._styles = None
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.index_path):
+            self._convert()
+
+        with open(self.index_path) as f:
+            self._index = json.load(f)
+        self._rows = {name: row for row, name in enumerate(self._index['voices'])}
+
+    def _convert(self):
+        """Write all voices into one [voices, ...] array, then the index"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        voices = np.load(self.voices_path)
+        names = sorted(voices.keys())
+        styles = np.stack([np.asarray(voices[name], dtype=np.float32) for name in names])
+
+        # The index is written last, so its presence means the array is complete
+        temp_suffix = f".{os.getpid()}.tmp"
+        with open(self.array_path + temp_suffix, 'wb') as f:
+            np.save(f, np.ascontiguousarray(styles))
+        os.replace(self.array_path + temp_suffix, self.array_path)
+
+        with open(self.index_path + temp_suffix, 'w') as f:
+            json.dump({
+                'voices': names,
+                'shape': list(styles.shape[1:]),
+                'dtype': str(styles.dtype),
+                'source': os.path.abspath(self.voices_path)
+            }, f, indent=2)
+        os.replace(self.index_path + temp_suffix, self.index_path)
+
+        logger.info(f"🎭 Converted {len(names)} voices to memory-mapped store {self.array_path} "
+                    f"({styles.nbytes / 1e6:.1f} MB)")
+
+    @property
+    def styles(self) -> np.ndarray:
+        """The mapped [voices, ...] style array (mapped on first access)"""
+        if self._styles is None:
+            with self._lock:
+                if self._styles is None:
+                    self._styles = np.load(self.array_path, mmap_mode='r')
+        return self._styles
+
+    def get_voices(self) -> list[str]:
+        """Get voice names from the index without touching the style data"""
+        return list(self._index['voices'])
+
+    def get_voice_style(self, voice: str) -> np.ndarray:
+        """
+        Get a voice's style table as a read-only view of the mapped array
+
+        Raises:
+            KeyError: If the voice is not in the store
+        """
+        row = self._rows.get(voice)
+        if row is None:
+            raise KeyError(f"Unknown voice '{voice}'")
+        return self.styles[row]
+
+    def __contains__(self, voice: str) -> bool:
+        return voice in self._rows
+
+    def get_stats(self) -> dict:
+        """Get store location and size"""
+        return {
+            'path': self.array_path,
+            'voices': len(self._rows),
+            'style_shape': self._index['shape'],
+            'bytes': os.path.getsize(self.array_path),
+            'mapped': self._styles is not None
+        }
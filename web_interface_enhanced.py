@@ -8,17 +8,12 @@ import os
 import sys
 import time
 import json
-import uuid
 import logging
-import threading
-import queue
-import subprocess
 from datetime import datetime
 from pathlib import Path
-from collections import deque
 
-from flask import Flask, render_template_string, request, send_file, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template_string, request, jsonify
+from flask_socketio import SocketIO
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -28,30 +23,6 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'magic_unicorn_secret_key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Global log buffer for real-time streaming
-log_buffer = deque(maxlen=1000)
-log_queue = queue.Queue()
-
-# Custom log handler to capture logs
-class WebLogHandler(logging.Handler):
-    def emit(self, record):
-        try:
-            log_entry = {
-                'timestamp': datetime.fromtimestamp(record.created).strftime('%H:%M:%S.%f')[:-3],
-                'level': record.levelname,
-                'message': self.format(record),
-                'module': record.name
-            }
-            log_buffer.append(log_entry)
-            log_queue.put(log_entry)
-        except Exception:
-            pass
-
-# Add our custom handler to capture all logs
-web_handler = WebLogHandler()
-web_handler.setFormatter(logging.Formatter('%(message)s'))
-logging.getLogger().addHandler(web_handler)
-
 # Magic Unicorn branding and configuration
 BRAND_CONFIG = {
     "title": "Magic Unicorn TTS Pro",
@@ -87,49 +58,32 @@ APP_SETTINGS = {
 
 # Initialize other components...
 from web_interface_magic_unicorn import (
-    detect_system_status, 
-    run_synthesis_subprocess, 
+    detect_system_status,
+    start_background_services,
+    get_worker_pool,
+    get_worker_pool_stats,
+    get_job_queue_stats,
+    get_session_profile_status,
+    synthesize,
+    synthesize_stream,
+    submit_job,
+    get_job,
+    voice_blends,
+    serve_audio,
+    get_logs,
+    get_metrics,
+    get_prometheus_metrics,
+    get_recent_traces,
+    get_trace_timeline,
+    get_system,
+    static_files,
+    handle_connect,
+    handle_disconnect,
+    handle_log_request,
+    handle_set_log_level,
     AVAILABLE_VOICES
 )
 
-# Performance tracking
-performance_metrics = deque(maxlen=100)
-
-def get_system_info():
-    """Get detailed system information"""
-    try:
-        info = {
-            'cpu_temp': 'N/A',
-            'npu_util': 'N/A',
-            'memory_usage': 'N/A',
-            'disk_space': 'N/A'
-        }
-        
-        # Try to get CPU temperature
-        try:
-            temp_result = subprocess.run(['sensors'], capture_output=True, text=True, timeout=2)
-            if temp_result.returncode == 0 and 'Tctl:' in temp_result.stdout:
-                for line in temp_result.stdout.split('\n'):
-                    if 'Tctl:' in line:
-                        temp = line.split('+')[1].split('°')[0] if '+' in line else 'N/A'
-                        info['cpu_temp'] = f"{temp}°C"
-                        break
-        except:
-            pass
-            
-        # Try to get memory usage
-        try:
-            import psutil
-            mem = psutil.virtual_memory()
-            info['memory_usage'] = f"{mem.percent:.1f}%"
-        except:
-            pass
-            
-        return info
-    except Exception as e:
-        logger.warning(f"System info collection failed: {e}")
-        return {'cpu_temp': 'N/A', 'npu_util': 'N/A', 'memory_usage': 'N/A', 'disk_space': 'N/A'}
-
 def get_enhanced_template():
     """Return the enhanced Magic Unicorn HTML template with tabs"""
     return """
@@ -971,6 +925,7 @@ def get_enhanced_template():
                 this.currentTab = 'synthesis';
                 this.charts = {};
                 this.autoScroll = true;
+                this.lastLogSeq = null;
                 
                 this.initializeApp();
                 this.setupEventListeners();
@@ -1014,6 +969,8 @@ def get_enhanced_template():
                 });
 
                 document.getElementById('log-level-filter').addEventListener('change', (e) => {
+                    // The server only streams entries at or above the selected level
+                    this.socket.emit('set_log_level', { level: e.target.value === 'all' ? 'DEBUG' : e.target.value });
                     this.filterLogs(e.target.value);
                 });
 
@@ -1030,10 +987,18 @@ def get_enhanced_template():
             setupWebSocket() {
                 this.socket.on('connect', () => {
                     console.log('🔌 Connected to WebSocket');
+                    // On reconnect only the entries missed meanwhile are fetched
+                    const filter = document.getElementById('log-level-filter')?.value;
+                    if (filter && filter !== 'all') {
+                        this.socket.emit('set_log_level', { level: filter });
+                    } else {
+                        this.socket.emit('request_logs', { since: this.lastLogSeq });
+                    }
                 });
 
-                this.socket.on('new_log', (logEntry) => {
-                    this.addLogEntry(logEntry);
+                this.socket.on('log_batch', (batch) => {
+                    this.lastLogSeq = batch.cursor;
+                    this.addLogEntries(batch.logs);
                 });
 
                 this.socket.on('performance_update', (metrics) => {
@@ -1085,24 +1050,39 @@ def get_enhanced_template():
                 try {
                     const startTime = Date.now();
                     
+                    // Inline mode: the audio comes back in this response, metrics in its headers
                     const response = await fetch('/synthesize', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
+                            'Accept': 'audio/wav'
                         },
                         body: JSON.stringify({
                             text: text,
                             voice: voice,
-                            method: method
+                            method: method,
+                            inline: true
                         })
                     });
 
-                    const result = await response.json();
-                    const endTime = Date.now();
-                    
-                    if (result.success) {
-                        this.handleSuccess(result, endTime - startTime);
+                    if (response.ok && (response.headers.get('Content-Type') || '').startsWith('audio/')) {
+                        const audioBlob = await response.blob();
+                        const endTime = Date.now();
+                        
+                        this.handleSuccess({
+                            success: true,
+                            audioUrl: URL.createObjectURL(audioBlob),
+                            metrics: {
+                                generation_time: response.headers.get('X-Generation-Time'),
+                                audio_length: response.headers.get('X-Audio-Length'),
+                                rtf: response.headers.get('X-RTF'),
+                                method_used: response.headers.get('X-Method-Used'),
+                                voice: response.headers.get('X-Voice'),
+                                sample_rate: response.headers.get('X-Sample-Rate')
+                            }
+                        }, endTime - startTime);
                     } else {
+                        const result = await response.json();
                         this.handleError(result.error || 'Generation failed');
                     }
                 } catch (error) {
@@ -1118,7 +1098,7 @@ def get_enhanced_template():
                 this.updateMetric('rtf-metric', result.metrics?.rtf || '0.00');
                 
                 // Show audio player
-                this.showAudioPlayer(result.filename);
+                this.showAudioPlayer(result.audioUrl);
                 
                 // Magic success effect
                 this.showNotification('Magic voice generated successfully! 🎉', 'success');
@@ -1177,12 +1157,18 @@ def get_enhanced_template():
                 return 'Applying final touches... ✨';
             }
 
-            showAudioPlayer(filename) {
+            showAudioPlayer(audioUrl) {
                 const panel = document.getElementById('audio-panel');
                 const audio = document.getElementById('audio-element');
                 
+                // Release the previous clip's blob
+                if (this.audioUrl) {
+                    URL.revokeObjectURL(this.audioUrl);
+                }
+                this.audioUrl = audioUrl;
+                
                 panel.style.display = 'block';
-                audio.src = `/audio/${filename}`;
+                audio.src = audioUrl;
                 
                 // Auto-play if enabled
                 const autoPlay = document.getElementById('auto-play-setting')?.checked;
@@ -1192,23 +1178,32 @@ def get_enhanced_template():
             }
 
             addLogEntry(logEntry) {
+                this.addLogEntries([logEntry]);
+            }
+            
+            addLogEntries(logEntries) {
                 const container = document.getElementById('log-container');
-                const entry = document.createElement('div');
-                entry.className = 'log-entry';
+                const fragment = document.createDocumentFragment();
                 
                 // Check filter
                 const filter = document.getElementById('log-level-filter')?.value;
-                if (filter !== 'all' && logEntry.level !== filter) {
-                    return;
-                }
-                
-                entry.innerHTML = `
-                    <span class="log-timestamp">${logEntry.timestamp}</span>
-                    <span class="log-level ${logEntry.level}">${logEntry.level}</span>
-                    <span class="log-message">${logEntry.message}</span>
-                `;
+                logEntries.forEach(logEntry => {
+                    if (filter !== 'all' && logEntry.level !== filter) {
+                        return;
+                    }
+                    
+                    const entry = document.createElement('div');
+                    entry.className = 'log-entry';
+                    entry.innerHTML = `
+                        <span class="log-timestamp">${logEntry.timestamp}</span>
+                        <span class="log-level ${logEntry.level}">${logEntry.level}</span>
+                        <span class="log-message">${logEntry.message}</span>
+                    `;
+                    fragment.appendChild(entry);
+                });
                 
-                container.appendChild(entry);
+                // One DOM update per batch
+                container.appendChild(fragment);
                 
                 // Auto-scroll if enabled
                 if (this.autoScroll && this.currentTab === 'logs') {
@@ -1224,8 +1219,11 @@ def get_enhanced_template():
             loadLogBuffer(logs) {
                 const container = document.getElementById('log-container');
                 container.innerHTML = '';
+                if (logs.length) {
+                    this.lastLogSeq = logs[logs.length - 1].seq;
+                }
                 
-                logs.forEach(log => this.addLogEntry(log));
+                this.addLogEntries(logs);
             }
 
             clearLogs() {
@@ -1475,115 +1473,26 @@ def index():
         status=current_status
     )
 
-# Include all the routes from the original file
-@app.route('/synthesize', methods=['POST'])
-def synthesize():
-    """Real TTS synthesis endpoint"""
-    try:
-        data = request.get_json()
-        text = data.get('text', '')
-        voice = data.get('voice', 'af_heart')
-        method = data.get('method', 'auto')
-        
-        logger.info(f"🎵 Real TTS request: {len(text)} chars, voice={voice}, method={method}")
-        
-        if not text.strip():
-            return jsonify({
-                'success': False,
-                'error': 'No text provided for synthesis'
-            }), 400
-        
-        start_time = time.time()
-        
-        logger.info(f"🎵 Running real TTS synthesis in clean subprocess...")
-        synthesis_result = run_synthesis_subprocess(text, voice, method)
-        
-        if not synthesis_result['success']:
-            raise Exception(synthesis_result['error'])
-        
-        audio_data = synthesis_result['audio_data']
-        sample_rate = synthesis_result['sample_rate']
-        
-        # Save real audio to file
-        filename = f"real_speech_{uuid.uuid4().hex[:8]}.wav"
-        audio_dir = '/tmp'
-        audio_path = os.path.join(audio_dir, filename)
-        
-        # Write real WAV file
-        import wave
-        import numpy as np
-        with wave.open(audio_path, 'w') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-            # Convert float audio to int16 properly
-            audio_int16 = (np.clip(audio_data, -1.0, 1.0) * 32767).astype(np.int16)
-            wav_file.writeframes(audio_int16.tobytes())
-        
-        generation_time = time.time() - start_time
-        audio_duration = len(audio_data) / sample_rate
-        rtf = generation_time / audio_duration
-        
-        # Store performance metrics
-        metric_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'method': method,
-            'voice': voice,
-            'text_length': len(text),
-            'generation_time': generation_time,
-            'audio_duration': audio_duration,
-            'rtf': rtf,
-            'sample_rate': sample_rate
-        }
-        performance_metrics.append(metric_entry)
-        
-        logger.info(f"✅ REAL SPEECH generated: {generation_time:.2f}s, RTF: {rtf:.3f}")
-        logger.info(f"🎵 Real speech file: {audio_path} ({os.path.getsize(audio_path)} bytes)")
-        
-        # Emit performance update via WebSocket
-        socketio.emit('performance_update', metric_entry)
-        
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'metrics': {
-                'generation_time': f'{generation_time:.2f}',
-                'audio_length': f'{audio_duration:.2f}',
-                'rtf': f'{rtf:.3f}',
-                'method_used': 'Real Kokoro TTS',
-                'voice': voice,
-                'sample_rate': sample_rate
-            },
-            'message': f'Real speech generated successfully! 🎤✨'
-        })
-        
-    except Exception as e:
-        logger.error(f"❌ Real TTS failed: {e}")
-        import traceback
-        logger.error(f"❌ Full error: {traceback.format_exc()}")
-        
-        return jsonify({
-            'success': False,
-            'error': f'TTS generation failed: {str(e)}'
-        }), 500
-
-@app.route('/audio/<filename>')
-def serve_audio(filename):
-    """Serve generated audio files"""
-    try:
-        temp_dir = '/tmp'
-        audio_path = os.path.join(temp_dir, filename)
-        
-        if os.path.exists(audio_path):
-            logger.info(f"🎵 Serving real speech file: {filename}")
-            return send_file(audio_path, mimetype='audio/wav', as_attachment=False)
-        else:
-            logger.error(f"❌ Real audio file not found: {filename}")
-            return jsonify({'error': 'Audio file not found'}), 404
-            
-    except Exception as e:
-        logger.error(f"❌ Audio serving error: {e}")
-        return jsonify({'error': f'Could not serve audio: {str(e)}'}), 500
+# Routes and socket handlers shared with the base app; events reach this app's
+# clients once start_background_services() has been given its socket
+app.add_url_rule('/synthesize', view_func=synthesize, methods=['POST'])
+app.add_url_rule('/synthesize/stream', view_func=synthesize_stream, methods=['POST'])
+app.add_url_rule('/jobs', view_func=submit_job, methods=['POST'])
+app.add_url_rule('/jobs/<job_id>', view_func=get_job)
+app.add_url_rule('/voices/blends', view_func=voice_blends, methods=['GET', 'POST'])
+app.add_url_rule('/audio/<filename>', view_func=serve_audio)
+app.add_url_rule('/logs', view_func=get_logs)
+app.add_url_rule('/metrics', view_func=get_metrics)
+app.add_url_rule('/metrics/prometheus', view_func=get_prometheus_metrics)
+app.add_url_rule('/traces', view_func=get_recent_traces)
+app.add_url_rule('/traces/<trace_id>', view_func=get_trace_timeline)
+app.add_url_rule('/system', view_func=get_system)
+app.add_url_rule('/static/<path:filename>', view_func=static_files)
+
+socketio.on_event('connect', handle_connect)
+socketio.on_event('disconnect', handle_disconnect)
+socketio.on_event('request_logs', handle_log_request)
+socketio.on_event('set_log_level', handle_set_log_level)
 
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
@@ -1605,32 +1514,6 @@ def settings():
     
     return jsonify(APP_SETTINGS)
 
-@app.route('/logs')
-def get_logs():
-    """Get recent logs"""
-    return jsonify(list(log_buffer))
-
-@app.route('/metrics')
-def get_metrics():
-    """Get performance metrics"""
-    return jsonify({
-        'recent': list(performance_metrics)[-20:],  # Last 20 entries
-        'summary': {
-            'total_generations': len(performance_metrics),
-            'avg_rtf': sum(m['rtf'] for m in performance_metrics) / len(performance_metrics) if performance_metrics else 0,
-            'avg_time': sum(m['generation_time'] for m in performance_metrics) / len(performance_metrics) if performance_metrics else 0,
-            'methods_used': list(set(m['method'] for m in performance_metrics))
-        }
-    })
-
-@app.route('/system')
-def get_system():
-    """Get system information"""
-    return jsonify({
-        **get_system_info(),
-        **detect_system_status()
-    })
-
 @app.route('/status')
 def get_status():
     """Get system status"""
@@ -1650,46 +1533,16 @@ def get_status():
             'npu': 'ready' if current_status['npu_available'] else 'offline',
             'mlir_aie': 'ready' if current_status['mlir_aie_ready'] else 'offline'
         },
+        'worker_pool': get_worker_pool_stats(),
+        'job_queue': get_job_queue_stats(),
+        'session_profile': get_session_profile_status(),
         'version': BRAND_CONFIG['version']
     })
 
-@app.route('/static/<path:filename>')
-def static_files(filename):
-    """Serve static files"""
-    return send_from_directory('static', filename)
-
-# WebSocket handlers
-@socketio.on('connect')
-def handle_connect():
-    """Client connected"""
-    logger.info("🔌 Client connected to WebSocket")
-    emit('log_buffer', list(log_buffer))
-
-@socketio.on('disconnect')
-def handle_disconnect():
-    """Client disconnected"""
-    logger.info("🔌 Client disconnected from WebSocket")
-
-@socketio.on('request_logs')
-def handle_log_request():
-    """Send log buffer to client"""
-    emit('log_buffer', list(log_buffer))
-
-# Background task to stream logs
-def log_streamer():
-    """Stream logs to connected clients"""
-    while True:
-        try:
-            log_entry = log_queue.get(timeout=1)
-            socketio.emit('new_log', log_entry)
-        except queue.Empty:
-            continue
-        except Exception as e:
-            logger.error(f"Log streaming error: {e}")
-
-# Start log streaming thread
-log_thread = threading.Thread(target=log_streamer, daemon=True)
-log_thread.start()
+@app.before_request
+def ensure_background_services():
+    """Start the shared background services on the first request when not run as a script"""
+    start_background_services(socketio)
 
 if __name__ == '__main__':
     logger.info("🦄✨ Starting Magic Unicorn TTS Pro Web Interface ✨🦄")
@@ -1697,6 +1550,11 @@ if __name__ == '__main__':
     logger.info(f"🎨 Enhanced experience: {BRAND_CONFIG['title']}")
     logger.info("🚀 Pro features: Logs, Settings, Monitoring, System Info!")
     
+    start_background_services(socketio)
+    
+    # Load the model into the worker pool before taking requests
+    get_worker_pool()
+    
     socketio.run(
         app,
         host='0.0.0.0',
@@ -11,14 +11,29 @@ import json
 import uuid
 import logging
 import threading
-import queue
+import atexit
+import itertools
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from collections import deque
 
-from flask import Flask, render_template_string, request, send_file, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template_string, request, send_file, jsonify, send_from_directory
+from flask_socketio import SocketIO, emit, join_room, leave_room
+
+from text_segmentation import split_text_segments
+from synthesis_cache import SynthesisCache, cache_key, model_fingerprint
+from job_queue import QueueFullError, SynthesisJobQueue
+from session_profiles import describe_profile
+from voice_blending import BlendRegistry, is_blend_spec
+from audio_encoding import AUDIO_FORMATS, create_encoder, encode_audio, negotiate_format
+from audio_store import AudioStore
+from status_collector import StatusCollector
+from prometheus_metrics import MetricsRegistry, text_length_bucket
+from metrics_sketch import PerformanceStore
+from log_pipeline import LOG_LEVELS, LogPipeline, filter_level
+import tracing
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -28,29 +43,25 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'magic_unicorn_secret_key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Global log buffer for real-time streaming
-log_buffer = deque(maxlen=1000)
-log_queue = queue.Queue()
-
-# Custom log handler to capture logs
-class WebLogHandler(logging.Handler):
-    def emit(self, record):
-        try:
-            log_entry = {
-                'timestamp': datetime.fromtimestamp(record.created).strftime('%H:%M:%S.%f')[:-3],
-                'level': record.levelname,
-                'message': self.format(record),
-                'module': record.name
-            }
-            log_buffer.append(log_entry)
-            log_queue.put(log_entry)
-        except Exception:
-            pass
-
-# Add our custom handler to capture all logs
-web_handler = WebLogHandler()
-web_handler.setFormatter(logging.Formatter('%(message)s'))
-logging.getLogger().addHandler(web_handler)
+# Socket of the app being served, which events and log batches go to; the
+# enhanced app shares this module's handlers and points it at its own socket
+# through start_background_services()
+_event_socketio = socketio
+
+def emit_event(event, payload, **kwargs):
+    """Emit a socket event to the clients of the app being served"""
+    _event_socketio.emit(event, payload, **kwargs)
+
+# Log capture for the log viewer, shared by both apps: the handler only queues records,
+# a background thread formats them into a bounded ring and streams them in batches
+log_pipeline = LogPipeline(
+    capacity=1000,
+    pending_limit=int(os.environ.get('MAGIC_UNICORN_LOG_PENDING_LIMIT', 5000)),
+    flush_interval=float(os.environ.get('MAGIC_UNICORN_LOG_FLUSH_INTERVAL', 0.1)),
+    batch_size=int(os.environ.get('MAGIC_UNICORN_LOG_BATCH_SIZE', 200))
+)
+logging.getLogger().addHandler(log_pipeline.handler)
+log_client_levels = {}   # socket session ID -> minimum level streamed to it
 
 # Magic Unicorn branding and configuration
 BRAND_CONFIG = {
@@ -71,79 +82,122 @@ BRAND_CONFIG = {
     }
 }
 
-# Initialize TTS systems with real detection
-def detect_system_status():
-    """Detect actual system capabilities"""
+# System status probes, refreshed in the background by status_collector
+def probe_npu_hardware():
+    """Check the NPU kernel driver and XRT runtime"""
     status = {
         'npu_available': False,
-        'vitisai_provider': False,
-        'models_loaded': 0,
-        'voices_available': 0,
-        'mlir_aie_ready': False,
         'hardware_detected': 'Unknown',
         'npu_readiness': 'checking',
-        'acceleration_status': 'optimized',
-        'performance_tier': 'excellent'
+        'acceleration_status': 'optimized'
     }
     
-    try:
-        # Check for NPU hardware
-        import subprocess
-        result = subprocess.run(['lsmod'], capture_output=True, text=True)
-        if 'amdxdna' in result.stdout:
-            status['npu_available'] = True
-            status['hardware_detected'] = 'AMD Ryzen AI NPU Phoenix'
-            
-            # Check XRT runtime
-            try:
-                xrt_result = subprocess.run(['xrt-smi', 'examine'], 
-                                          capture_output=True, text=True, timeout=5)
-                if xrt_result.returncode == 0 and "NPU Phoenix" in xrt_result.stdout:
-                    status['npu_readiness'] = '100%'
-                    status['acceleration_status'] = 'npu_ready'
-                else:
-                    status['npu_readiness'] = '75%'
-            except:
-                status['npu_readiness'] = '50%'
+    result = subprocess.run(['lsmod'], capture_output=True, text=True, timeout=5)
+    if 'amdxdna' in result.stdout:
+        status['npu_available'] = True
+        status['hardware_detected'] = 'AMD Ryzen AI NPU Phoenix'
         
-        # Check for VitisAI provider
+        # Check XRT runtime
         try:
-            sys.path.insert(0, '/home/ucadmin/Development/kokoro_npu_project')
-            from vitisai_onnxruntime_wrapper import get_available_providers
-            providers = get_available_providers()
-            if 'VitisAIExecutionProvider' in providers:
-                status['vitisai_provider'] = True
+            xrt_result = subprocess.run(['xrt-smi', 'examine'], 
+                                      capture_output=True, text=True, timeout=5)
+            if xrt_result.returncode == 0 and "NPU Phoenix" in xrt_result.stdout:
+                status['npu_readiness'] = '100%'
+                status['acceleration_status'] = 'npu_ready'
+            else:
+                status['npu_readiness'] = '75%'
         except:
-            pass
-            
-        # Check for models  
-        model_files = [
-            '/home/ucadmin/Development/kokoro_npu_project/kokoro-v1.0.onnx',
-            '/home/ucadmin/Development/kokoro_npu_project/optimized_models/kokoro-npu-quantized-int8.onnx'
-        ]
-        status['models_loaded'] = sum(1 for f in model_files if os.path.exists(f))
-        
-        # Set performance tier based on available optimizations
-        if status['models_loaded'] >= 2 and status['npu_available']:
-            status['performance_tier'] = 'npu_ready'
-        elif status['models_loaded'] >= 1:
-            status['performance_tier'] = 'optimized'
-        else:
-            status['performance_tier'] = 'baseline'
-        
-        # Check for voices
-        voices_file = '/home/ucadmin/Development/kokoro_npu_project/voices-v1.0.bin'
-        if os.path.exists(voices_file):
-            status['voices_available'] = 54  # Known voice count
-            
-        # Check for MLIR-AIE
-        mlir_path = '/home/ucadmin/Development/kokoro_npu_project/mlir-aie/install'
-        if os.path.exists(mlir_path):
-            status['mlir_aie_ready'] = True
-            
-    except Exception as e:
-        logger.warning(f"Status detection error: {e}")
-        
+            status['npu_readiness'] = '50%'
+    
+    return status
+
+def probe_vitisai_provider():
+    """Check for the VitisAI execution provider"""
+    try:
+        if '/home/ucadmin/Development/kokoro_npu_project' not in sys.path:
+            sys.path.insert(0, '/home/ucadmin/Development/kokoro_npu_project')
+        from vitisai_onnxruntime_wrapper import get_available_providers
+        return {'vitisai_provider': 'VitisAIExecutionProvider' in get_available_providers()}
+    except:
+        return {'vitisai_provider': False}
+
+def probe_model_files():
+    """Check for models, voices and MLIR-AIE"""
+    model_files = [
+        '/home/ucadmin/Development/kokoro_npu_project/kokoro-v1.0.onnx',
+        '/home/ucadmin/Development/kokoro_npu_project/optimized_models/kokoro-npu-quantized-int8.onnx'
+    ]
+    voices_file = '/home/ucadmin/Development/kokoro_npu_project/voices-v1.0.bin'
+    mlir_path = '/home/ucadmin/Development/kokoro_npu_project/mlir-aie/install'
+    
+    return {
+        'models_loaded': sum(1 for f in model_files if os.path.exists(f)),
+        'voices_available': 54 if os.path.exists(voices_file) else 0,  # Known voice count
+        'mlir_aie_ready': os.path.exists(mlir_path)
+    }
+
+def probe_cpu_temperature():
+    """Read the CPU temperature from lm-sensors"""
+    try:
+        temp_result = subprocess.run(['sensors'], capture_output=True, text=True, timeout=2)
+    except (OSError, subprocess.SubprocessError):
+        return {'cpu_temp': 'N/A'}
+    if temp_result.returncode == 0 and 'Tctl:' in temp_result.stdout:
+        for line in temp_result.stdout.split('\n'):
+            if 'Tctl:' in line:
+                temp = line.split('+')[1].split('°')[0] if '+' in line else 'N/A'
+                return {'cpu_temp': f"{temp}°C"}
+    return {'cpu_temp': 'N/A'}
+
+def probe_memory_usage():
+    """Read system memory usage"""
+    try:
+        import psutil
+    except ImportError:
+        return {'memory_usage': 'N/A'}
+    return {'memory_usage': f"{psutil.virtual_memory().percent:.1f}%"}
+
+# name -> (probe, refresh interval in seconds, fields until the first run)
+STATUS_PROBES = {
+    'npu_hardware': (probe_npu_hardware, float(os.environ.get('MAGIC_UNICORN_NPU_PROBE_INTERVAL', 60)), {
+        'npu_available': False,
+        'hardware_detected': 'Unknown',
+        'npu_readiness': 'checking',
+        'acceleration_status': 'optimized'
+    }),
+    'vitisai_provider': (probe_vitisai_provider, 300, {'vitisai_provider': False}),
+    'model_files': (probe_model_files, 30, {'models_loaded': 0, 'voices_available': 0, 'mlir_aie_ready': False}),
+    'cpu_temperature': (probe_cpu_temperature, 10, {'cpu_temp': 'N/A'}),
+    'memory_usage': (probe_memory_usage, 5, {'memory_usage': 'N/A'})
+}
+
+status_collector = StatusCollector()
+for _name, (_probe, _interval, _defaults) in STATUS_PROBES.items():
+    status_collector.register(_name, _probe, _interval, _defaults)
+
+def detect_system_status():
+    """Get system capabilities from the latest background probe snapshot"""
+    snapshot = status_collector.snapshot()
+    status = {
+        'npu_available': snapshot['npu_available'],
+        'vitisai_provider': snapshot['vitisai_provider'],
+        'models_loaded': snapshot['models_loaded'],
+        'voices_available': snapshot['voices_available'],
+        'mlir_aie_ready': snapshot['mlir_aie_ready'],
+        'hardware_detected': snapshot['hardware_detected'],
+        'npu_readiness': snapshot['npu_readiness'],
+        'acceleration_status': snapshot['acceleration_status'],
+        'performance_tier': 'excellent'
+    }
+    
+    # Set performance tier based on available optimizations
+    if status['models_loaded'] >= 2 and status['npu_available']:
+        status['performance_tier'] = 'npu_ready'
+    elif status['models_loaded'] >= 1:
+        status['performance_tier'] = 'optimized'
+    else:
+        status['performance_tier'] = 'baseline'
+    
     return status
 
 # Application settings with defaults
@@ -167,183 +221,325 @@ AVAILABLE_VOICES = [
     {'id': 'am_michael', 'name': 'am_michael', 'lang': 'English (US)', 'gender': 'Male'},
     {'id': 'am_adam', 'name': 'am_adam', 'lang': 'English (US)', 'gender': 'Male'},
 ]
-SYSTEM_STATUS = detect_system_status()
 
-# Performance tracking
+def known_voice_ids():
+    """Voice IDs in the voices file, or the built-in list if it can't be read"""
+    import numpy as np
+    from synthesis_worker_pool import DEFAULT_VOICES_PATH
+    
+    try:
+        with np.load(DEFAULT_VOICES_PATH) as voices:
+            return list(voices.files)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not list voices in {DEFAULT_VOICES_PATH}: {e}")
+        return [voice['id'] for voice in AVAILABLE_VOICES]
+
+# Performance tracking: recent entries for the UI, rolling quantile sketches for summaries
 performance_metrics = deque(maxlen=100)
+performance_store = PerformanceStore()
+PERFORMANCE_WINDOWS = {'1m': 60, '1h': 3600, '24h': 86400}
 
 def get_system_info():
-    """Get detailed system information"""
-    try:
-        info = {
-            'cpu_temp': 'N/A',
-            'npu_util': 'N/A',
-            'memory_usage': 'N/A',
-            'disk_space': 'N/A'
-        }
-        
-        # Try to get CPU temperature
-        try:
-            temp_result = subprocess.run(['sensors'], capture_output=True, text=True, timeout=2)
-            if temp_result.returncode == 0 and 'Tctl:' in temp_result.stdout:
-                for line in temp_result.stdout.split('\n'):
-                    if 'Tctl:' in line:
-                        temp = line.split('+')[1].split('°')[0] if '+' in line else 'N/A'
-                        info['cpu_temp'] = f"{temp}°C"
-                        break
-        except:
-            pass
-            
-        # Try to get memory usage
-        try:
-            import psutil
-            mem = psutil.virtual_memory()
-            info['memory_usage'] = f"{mem.percent:.1f}%"
-        except:
-            pass
-            
-        return info
-    except Exception as e:
-        logger.warning(f"System info collection failed: {e}")
-        return {'cpu_temp': 'N/A', 'npu_util': 'N/A', 'memory_usage': 'N/A', 'disk_space': 'N/A'}
+    """Get detailed system information from the latest background probe snapshot"""
+    snapshot = status_collector.snapshot()
+    return {
+        'cpu_temp': snapshot['cpu_temp'],
+        'npu_util': 'N/A',
+        'memory_usage': snapshot['memory_usage'],
+        'disk_space': 'N/A'
+    }
 
-def run_synthesis_subprocess(text, voice, method):
-    """Run synthesis in a clean subprocess to avoid import conflicts"""
-    import subprocess
-    import tempfile
-    import numpy as np
-    import json
-    
-    # Escape text and voice for safe inclusion in script
-    text_escaped = json.dumps(text)
-    voice_escaped = json.dumps(voice)
-    
-    # Create synthesis script
-    synthesis_script = f'''
-import sys
-import os
-import numpy as np
-import json
+# Warm synthesis worker pool
+WORKER_POOL_CONFIG = {
+    'pool_size': int(os.environ.get('MAGIC_UNICORN_POOL_SIZE', 2)),
+    'max_jobs_per_worker': int(os.environ.get('MAGIC_UNICORN_MAX_JOBS_PER_WORKER', 200)),
+    'job_timeout': 30.0,
+    'session_profile': os.environ.get('MAGIC_UNICORN_SESSION_PROFILE', 'throughput')
+}
 
-# Clean sys.path - remove conflicting paths
-clean_paths = []
-for path in sys.path:
-    if "onnxruntime/build" not in path and "onnxruntime/onnxruntime" not in path:
-        clean_paths.append(path)
-sys.path = clean_paths
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
 
-# Add kokoro source
-kokoro_src = "/home/ucadmin/Development/kokoro_npu_project/kokoro-onnx/src"
-if kokoro_src not in sys.path:
-    sys.path.insert(0, kokoro_src)
+# Job queue threads only wait on the worker pool, so they are sized separately from it
+JOB_QUEUE_CONFIG = {
+    'workers': int(os.environ.get('MAGIC_UNICORN_JOB_WORKERS', 2)),
+    'max_queued': int(os.environ.get('MAGIC_UNICORN_MAX_QUEUED_JOBS', 100))
+}
 
-try:
-    from kokoro_onnx import Kokoro
+def get_worker_pool():
+    """Get the shared synthesis worker pool, starting it on first use"""
+    global _worker_pool
     
-    model_path = "/home/ucadmin/Development/kokoro_npu_project/kokoro-v1.0.onnx"
-    voices_path = "/home/ucadmin/Development/kokoro_npu_project/voices-v1.0.bin"
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            from synthesis_worker_pool import SynthesisWorkerPool, DEFAULT_MODEL_PATH
+            
+            logger.info(f"🔥 Starting synthesis worker pool: {WORKER_POOL_CONFIG}")
+            _worker_pool = SynthesisWorkerPool(**WORKER_POOL_CONFIG)
+            _worker_pool.start()
+            # Hash the model for cache keys at startup rather than on the first request
+            model_fingerprint(DEFAULT_MODEL_PATH)
+            atexit.register(_worker_pool.shutdown)
+        return _worker_pool
+
+def get_worker_pool_stats():
+    """Get worker pool stats without starting the pool"""
+    return _worker_pool.get_stats() if _worker_pool else None
+
+def get_session_profile_status():
+    """Get the ONNX Runtime tuning profile used by the synthesis workers"""
+    return describe_profile(WORKER_POOL_CONFIG['session_profile'])
+
+# Content-addressed cache of synthesized audio in front of the worker pool
+SYNTHESIS_CACHE_CONFIG = {
+    'memory_max_bytes': int(os.environ.get('MAGIC_UNICORN_CACHE_MEMORY_MB', 64)) * 1024 * 1024,
+    'disk_dir': os.environ.get('MAGIC_UNICORN_CACHE_DIR', '/tmp/magic_unicorn_cache'),
+    'disk_max_bytes': int(os.environ.get('MAGIC_UNICORN_CACHE_DISK_MB', 1024)) * 1024 * 1024
+}
+
+synthesis_cache = SynthesisCache(**SYNTHESIS_CACHE_CONFIG)
+
+# Audio files handed out by /synthesize, removed by age and total size
+AUDIO_STORE_CONFIG = {
+    'directory': os.environ.get('MAGIC_UNICORN_AUDIO_DIR', '/tmp/magic_unicorn_audio'),
+    'max_bytes': int(os.environ.get('MAGIC_UNICORN_AUDIO_MAX_MB', 512)) * 1024 * 1024,
+    'max_age': float(os.environ.get('MAGIC_UNICORN_AUDIO_MAX_AGE', 3600)),
+    'sweep_interval': float(os.environ.get('MAGIC_UNICORN_AUDIO_SWEEP_INTERVAL', 60))
+}
+
+audio_store = AudioStore(**AUDIO_STORE_CONFIG)
+
+# Named voice blends, shared with the synthesis workers through the blends file
+blend_registry = BlendRegistry(voices=known_voice_ids())
+
+# Prometheus metrics, served at /metrics/prometheus by both apps
+prometheus_registry = MetricsRegistry()
+SYNTHESIS_LABELS = ('voice', 'method', 'text_length')
+TTS_REQUESTS = prometheus_registry.counter(
+    'magic_unicorn_tts_requests_total', 'Synthesis requests', ('endpoint',) + SYNTHESIS_LABELS)
+TTS_ERRORS = prometheus_registry.counter(
+    'magic_unicorn_tts_errors_total', 'Failed synthesis requests', ('endpoint',) + SYNTHESIS_LABELS)
+TTS_AUDIO_SECONDS = prometheus_registry.counter(
+    'magic_unicorn_tts_audio_seconds_total', 'Seconds of audio produced', ('voice', 'method'))
+TTS_CACHE_LOOKUPS = prometheus_registry.counter(
+    'magic_unicorn_tts_cache_lookups_total', 'Synthesis cache lookups by result', ('result',))
+TTS_LATENCY = prometheus_registry.histogram(
+    'magic_unicorn_tts_request_duration_seconds', 'Synthesis request latency', ('endpoint',) + SYNTHESIS_LABELS)
+TTS_QUEUE_WAIT = prometheus_registry.histogram(
+    'magic_unicorn_tts_queue_wait_seconds', 'Time waiting for an idle synthesis worker', SYNTHESIS_LABELS)
+TTS_PHONEMIZE = prometheus_registry.histogram(
+    'magic_unicorn_tts_phonemize_seconds', 'Phonemization time per synthesis', SYNTHESIS_LABELS)
+TTS_INFERENCE = prometheus_registry.histogram(
+    'magic_unicorn_tts_inference_seconds', 'Model inference time per synthesis', SYNTHESIS_LABELS)
+TTS_ENCODE = prometheus_registry.histogram(
+    'magic_unicorn_tts_encode_seconds', 'Audio encoding time per request', ('format',) + SYNTHESIS_LABELS)
+
+# Methods offered by the UI; anything else is reported as 'other' in metrics
+SYNTHESIS_METHODS = ('auto', 'mlir_npu', 'npu_basic', 'cpu')
+
+def metric_labels(voice, method, text):
+    """Label values (voice, method, text_length) for synthesis metrics"""
+    # Labels come from client input, so they are mapped to fixed sets to keep series bounded
+    if is_blend_spec(voice):
+        voice = 'blend'
+    elif voice not in (blend_registry.voices or ()):
+        voice = 'other'
+    method = method if method in SYNTHESIS_METHODS else 'other'
+    return voice, method, text_length_bucket(len(text))
+
+def record_performance(metric_entry):
+    """Add a finished generation's latency and RTF to the rolling sketches"""
+    voice, method, _ = metric_labels(metric_entry['voice'], metric_entry['method'], '')
+    performance_store.record(voice, method, metric_entry)
+
+def publish_performance(metric_entry):
+    """Keep a finished generation's metrics for /metrics and push them to connected clients"""
+    performance_metrics.append(metric_entry)
+    record_performance(metric_entry)
+    emit_event('performance_update', metric_entry)
+
+def performance_summary(seconds=None, voice=None, method=None):
+    """Counts, means and p50/p95/p99 of generations, all time or over the last `seconds`"""
+    stats = performance_store.summary(seconds, voice, method)
+    voices, methods = performance_store.keys()
+    return {
+        'total_generations': stats['generation_time']['count'],
+        'avg_rtf': stats['rtf']['mean'] or 0,
+        'avg_time': stats['generation_time']['mean'] or 0,
+        'methods_used': methods,
+        'voices_used': voices,
+        'window_seconds': seconds,
+        'quantiles': stats,
+        'windows': {
+            name: {metric: performance_store.query(metric, window, voice, method).summary()
+                   for metric in ('generation_time', 'rtf')}
+            for name, window in PERFORMANCE_WINDOWS.items()
+        }
+    }
+
+def encode_speech(audio, sample_rate, audio_format, voice, method, text):
+    """Encode synthesized audio, recording the encode time"""
+    encode_start = time.perf_counter()
+    with tracing.span('encode', format=audio_format):
+        audio_bytes = encode_audio(audio, sample_rate, audio_format)
+    TTS_ENCODE.observe(time.perf_counter() - encode_start, audio_format, *metric_labels(voice, method, text))
+    return audio_bytes
+
+def observe_request(endpoint, voice, method, text, latency, audio_seconds=0.0, error=False):
+    """Record a finished (or failed) synthesis request"""
+    labels = metric_labels(voice, method, text)
+    TTS_REQUESTS.inc(endpoint, *labels)
+    if error:
+        TTS_ERRORS.inc(endpoint, *labels)
+        return
+    TTS_LATENCY.observe(latency, endpoint, *labels)
+    TTS_AUDIO_SECONDS.inc(labels[0], labels[1], amount=audio_seconds)
+
+def run_synthesis(text, voice, method, speed=1.0, lang='en-us', use_cache=True):
+    """Run synthesis on a warm worker from the shared pool, serving repeats from the cache"""
+    from synthesis_worker_pool import DEFAULT_MODEL_PATH
     
-    kokoro = Kokoro(model_path, voices_path)
-    audio, sample_rate = kokoro.create({text_escaped}, {voice_escaped}, speed=1.0)
+    key = cache_key(text, voice, speed, lang, model_fingerprint(DEFAULT_MODEL_PATH))
+    with tracing.span('cache_lookup') as lookup:
+        cached = synthesis_cache.get(key) if use_cache else None
+    if use_cache:
+        TTS_CACHE_LOOKUPS.inc('miss' if cached is None else 'hit')
+        if lookup is not None:
+            lookup['attributes']['hit'] = cached is not None
+    if cached is not None:
+        audio_data, sample_rate = cached
+        logger.info(f"💾 Synthesis cache hit: {key[:12]}")
+        return {
+            'success': True,
+            'audio_data': audio_data,
+            'sample_rate': sample_rate,
+            'method_used': 'Real Kokoro TTS (cached)',
+            'voice': voice,
+            'cached': True
+        }
     
-    # Save audio data to temp file
-    audio_file = "/tmp/synthesis_result.npy"
-    np.save(audio_file, audio)
+    with tracing.span('worker_pool'):
+        result = get_worker_pool().synthesize(text, voice, speed, lang)
+    if result['success']:
+        labels = metric_labels(voice, method, text)
+        timings = result.get('timings', {})
+        for stage, histogram in (('queue_wait', TTS_QUEUE_WAIT), ('phonemize', TTS_PHONEMIZE),
+                                 ('inference', TTS_INFERENCE)):
+            if stage in timings:
+                histogram.observe(timings[stage], *labels)
+        if use_cache:
+            synthesis_cache.put(key, result['audio_data'], result['sample_rate'])
+    return result
+
+# Streaming synthesis: segments are synthesized ahead of playback on the worker pool
+STREAM_LOOKAHEAD = 2
+_stream_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='stream-synthesis')
+
+def stream_synthesis(text, voice, method, audio_format='wav', start_time=None, on_complete=None,
+                     use_cache=True, trace=None, on_start=None):
+    """
+    Synthesize text segment by segment, yielding encoded audio as soon as each
+    segment is ready. The first chunk carries the container header (WAV, OGG)
+    plus the first segment, except for FLAC, which arrives whole once the last
+    segment is encoded; on_start receives the stream's sample rate
+    before that chunk is yielded and on_complete the metrics entry at the end.
+    Stage timings go to trace (a new one if not given), finished with the stream.
+    """
+    start_time = start_time or time.time()
+    trace = trace or tracing.Trace('synthesize_stream', voice=voice, method=method, chars=len(text),
+                                   format=audio_format)
+    segments = split_text_segments(text)
+    segment_iter = enumerate(segments)
+    pending = deque()
     
-    result = {{
-        "success": True,
-        "sample_rate": sample_rate,
-        "audio_samples": len(audio),
-        "audio_file": audio_file,
-        "method_used": "Real Kokoro TTS",
-        "voice": {voice_escaped}
-    }}
+    def synthesize_segment(index, segment):
+        with tracing.span('segment', index=index, chars=len(segment)):
+            return run_synthesis(segment, voice, method, use_cache=use_cache)
     
-    print(json.dumps(result))
+    def submit_next():
+        item = next(segment_iter, None)
+        if item is not None:
+            # Generator code doesn't run in the request's context, so bind the trace explicitly
+            with tracing.activate(trace):
+                pending.append(_stream_executor.submit(tracing.bind(synthesize_segment), *item))
     
-except Exception as e:
-    import traceback
-    result = {{
-        "success": False,
-        "error": str(e),
-        "traceback": traceback.format_exc()
-    }}
-    print(json.dumps(result))
-'''
+    for _ in range(STREAM_LOOKAHEAD):
+        submit_next()
     
-    # Write script to temp file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(synthesis_script)
-        temp_script = f.name
+    sample_rate = None
+    encoder = None
+    encode_time = 0.0
+    total_samples = 0
+    ttfb = None
     
     try:
-        # Run synthesis in clean subprocess
-        env = os.environ.copy()
-        env['PYTHONPATH'] = '/home/ucadmin/Development/kokoro_npu_project/venv/lib/python3.12/site-packages'
-        
-        result = subprocess.run([
-            '/home/ucadmin/Development/kokoro_npu_project/venv/bin/python',
-            temp_script
-        ], capture_output=True, text=True, env=env, timeout=30)
-        
-        if result.returncode == 0:
-            try:
-                import json
-                stdout_clean = result.stdout.strip()
-                if not stdout_clean:
-                    return {
-                        'success': False,
-                        'error': f"Subprocess returned empty output. STDERR: {result.stderr}"
-                    }
-                
-                # Extract JSON from output (handle warning messages)
-                lines = stdout_clean.split('\n')
-                json_line = None
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('{') and line.endswith('}'):
-                        json_line = line
-                        break
-                
-                if not json_line:
-                    return {
-                        'success': False,
-                        'error': f"No JSON found in output. STDOUT: '{result.stdout}', STDERR: '{result.stderr}'"
-                    }
-                
-                data = json.loads(json_line)
-                
-                if data['success']:
-                    # Load audio data
-                    import numpy as np
-                    audio_data = np.load(data['audio_file'])
-                    os.unlink(data['audio_file'])  # Clean up temp file
-                    
-                    return {
-                        'success': True,
-                        'audio_data': audio_data,
-                        'sample_rate': data['sample_rate'],
-                        'method_used': data['method_used'],
-                        'voice': data['voice']
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': data['error']
-                    }
-            except json.JSONDecodeError as e:
-                return {
-                    'success': False,
-                    'error': f"JSON parse error: {e}. STDOUT: '{result.stdout}', STDERR: '{result.stderr}'"
-                }
-        else:
-            return {
-                'success': False,
-                'error': f"Subprocess failed with code {result.returncode}. STDOUT: '{result.stdout}', STDERR: '{result.stderr}'"
-            }
+        while pending:
+            result = pending.popleft().result()
+            submit_next()
             
+            if not result['success']:
+                raise RuntimeError(result['error'])
+            
+            if encoder is None:
+                sample_rate = result['sample_rate']
+                encoder = create_encoder(audio_format, sample_rate)
+                ttfb = time.time() - start_time
+                logger.info(f"⚡ First audio segment ready after {ttfb:.3f}s")
+                if on_start:
+                    on_start(sample_rate)
+            
+            total_samples += len(result['audio_data'])
+            encode_start = time.perf_counter()
+            with tracing.activate(trace), tracing.span('encode', format=audio_format):
+                chunk = encoder.encode(result['audio_data'])
+            encode_time += time.perf_counter() - encode_start
+            if chunk:
+                yield chunk
+        
+        if encoder is not None:
+            with tracing.activate(trace), tracing.span('encode_finish', format=audio_format):
+                chunk = encoder.finish()
+            if chunk:
+                yield chunk
+    except Exception as e:
+        observe_request('stream', voice, method, text, time.time() - start_time, error=True)
+        trace.finish(str(e))
+        # Errors before the first chunk go back to the caller; later ones end the stream
+        if ttfb is None:
+            raise
+        logger.error(f"❌ Streaming TTS stopped mid-stream: {e}")
+        return
     finally:
-        os.unlink(temp_script)
+        for future in pending:
+            future.cancel()
+        # Covers clients that disconnect mid-stream (a no-op once finished above)
+        trace.finish()
+    
+    generation_time = time.time() - start_time
+    audio_duration = total_samples / sample_rate if sample_rate else 0
+    rtf = generation_time / audio_duration if audio_duration > 0 else 0
+    
+    metric_entry = {
+        'timestamp': datetime.now().isoformat(),
+        'method': method,
+        'voice': voice,
+        'text_length': len(text),
+        'generation_time': generation_time,
+        'audio_duration': audio_duration,
+        'rtf': rtf,
+        'ttfb': ttfb,
+        'segments': len(segments),
+        'streamed': True,
+        'sample_rate': sample_rate,
+        'trace_id': trace.trace_id
+    }
+    logger.info(f"✅ STREAMED SPEECH generated: {len(segments)} segments, TTFB: {ttfb:.3f}s, RTF: {rtf:.3f}")
+    
+    observe_request('stream', voice, method, text, generation_time, audio_duration)
+    TTS_ENCODE.observe(encode_time, audio_format, *metric_labels(voice, method, text))
+    
+    if on_complete:
+        on_complete(metric_entry)
 
 def get_magic_unicorn_template():
     """Return the Magic Unicorn branded HTML template"""
@@ -1158,24 +1354,39 @@ def get_magic_unicorn_template():
                 try {
                     const startTime = Date.now();
                     
+                    // Inline mode: the audio comes back in this response, metrics in its headers
                     const response = await fetch('/synthesize', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
+                            'Accept': 'audio/wav'
                         },
                         body: JSON.stringify({
                             text: text,
                             voice: voice,
-                            method: method
+                            method: method,
+                            inline: true
                         })
                     });
 
-                    const result = await response.json();
-                    const endTime = Date.now();
-                    
-                    if (result.success) {
-                        this.handleSuccess(result, endTime - startTime);
+                    if (response.ok && (response.headers.get('Content-Type') || '').startsWith('audio/')) {
+                        const audioBlob = await response.blob();
+                        const endTime = Date.now();
+                        
+                        this.handleSuccess({
+                            success: true,
+                            audioUrl: URL.createObjectURL(audioBlob),
+                            metrics: {
+                                generation_time: response.headers.get('X-Generation-Time'),
+                                audio_length: response.headers.get('X-Audio-Length'),
+                                rtf: response.headers.get('X-RTF'),
+                                method_used: response.headers.get('X-Method-Used'),
+                                voice: response.headers.get('X-Voice'),
+                                sample_rate: response.headers.get('X-Sample-Rate')
+                            }
+                        }, endTime - startTime);
                     } else {
+                        const result = await response.json();
                         this.handleError(result.error || 'Generation failed');
                     }
                 } catch (error) {
@@ -1191,7 +1402,7 @@ def get_magic_unicorn_template():
                 this.updateMetric('rtf-metric', result.metrics?.rtf || '0.00');
                 
                 // Show audio player
-                this.showAudioPlayer(result.filename);
+                this.showAudioPlayer(result.audioUrl);
                 
                 // Add to history
                 this.addToHistory(result);
@@ -1254,16 +1465,25 @@ def get_magic_unicorn_template():
                 return 'Applying final touches... ✨';
             }
 
-            showAudioPlayer(filename) {
+            showAudioPlayer(audioUrl) {
                 const panel = document.getElementById('audio-panel');
                 const audio = document.getElementById('audio-element');
                 const downloadBtn = document.getElementById('download-btn');
                 
+                // Release the previous clip's blob
+                if (this.audioUrl) {
+                    URL.revokeObjectURL(this.audioUrl);
+                }
+                this.audioUrl = audioUrl;
+                
                 panel.style.display = 'block';
-                audio.src = `/audio/${filename}`;
+                audio.src = audioUrl;
                 
                 downloadBtn.onclick = () => {
-                    window.open(`/audio/${filename}`, '_blank');
+                    const link = document.createElement('a');
+                    link.href = audioUrl;
+                    link.download = `magic_unicorn_speech_${Date.now()}.wav`;
+                    link.click();
                 };
             }
 
@@ -1409,6 +1629,205 @@ def index():
         status=current_status
     )
 
+def synthesize_speech(text, voice, method, use_cache=True):
+    """Synthesize text and record its metrics, returning (audio, sample_rate, response metrics)"""
+    start_time = time.time()
+    
+    # Use a warm worker process for clean synthesis (avoids import conflicts)
+    logger.info(f"🎵 Running real TTS synthesis on warm worker pool...")
+    with tracing.span('synthesis'):
+        synthesis_result = run_synthesis(text, voice, method, use_cache=use_cache)
+    
+    if not synthesis_result['success']:
+        observe_request('synthesize', voice, method, text, time.time() - start_time, error=True)
+        raise Exception(synthesis_result['error'])
+    
+    audio = synthesis_result['audio_data']
+    sample_rate = synthesis_result['sample_rate']
+    
+    generation_time = time.time() - start_time
+    audio_duration = len(audio) / sample_rate
+    rtf = generation_time / audio_duration
+    observe_request('synthesize', voice, method, text, generation_time, audio_duration)
+    
+    # Store performance metrics
+    metric_entry = {
+        'timestamp': datetime.now().isoformat(),
+        'method': method,
+        'voice': voice,
+        'text_length': len(text),
+        'generation_time': generation_time,
+        'audio_duration': audio_duration,
+        'rtf': rtf,
+        'sample_rate': sample_rate
+    }
+    
+    logger.info(f"✅ REAL SPEECH generated: {generation_time:.2f}s, RTF: {rtf:.3f}")
+    
+    # Keep it for /metrics and emit a performance update via WebSocket
+    publish_performance(metric_entry)
+    
+    return audio, sample_rate, {
+        'generation_time': f'{generation_time:.2f}',
+        'audio_length': f'{audio_duration:.2f}',
+        'rtf': f'{rtf:.3f}',
+        'method_used': 'Real Kokoro TTS',
+        'voice': voice,
+        'sample_rate': sample_rate
+    }
+
+def generate_speech(text, voice, method, use_cache=True, debug=False):
+    """Synthesize text, save it as a WAV file and return the response payload (with its stage timeline if debug)"""
+    with tracing.start_trace('synthesize', voice=voice, method=method, chars=len(text)) as trace:
+        audio, sample_rate, metrics = synthesize_speech(text, voice, method, use_cache)
+    
+        # Save real audio to the artifact store (evicted by age and size)
+        audio_bytes = encode_speech(audio, sample_rate, 'wav', voice, method, text)
+        with tracing.span('store'):
+            filename = audio_store.put(audio_bytes, 'wav', AUDIO_FORMATS['wav'])
+    
+    logger.info(f"🎵 Real speech file: {filename} ({len(audio_bytes)} bytes)")
+    
+    payload = {
+        'success': True,
+        'filename': filename,
+        'metrics': metrics,
+        'trace_id': trace.trace_id,
+        'message': f'Real speech generated successfully! 🎤✨'
+    }
+    if debug:
+        payload['trace'] = trace.to_dict()
+    return payload
+
+def inline_speech_response(text, voice, method, audio_format='wav', use_cache=True):
+    """Synthesize text and answer with the encoded audio itself, metrics in X- headers"""
+    with tracing.start_trace('synthesize_inline', voice=voice, method=method, chars=len(text),
+                             format=audio_format) as trace:
+        audio, sample_rate, metrics = synthesize_speech(text, voice, method, use_cache)
+        audio_bytes = encode_speech(audio, sample_rate, audio_format, voice, method, text)
+    
+    logger.info(f"🎵 Returning {len(audio_bytes)} bytes of {audio_format} audio inline")
+    
+    return Response(
+        audio_bytes,
+        content_type=AUDIO_FORMATS[audio_format],
+        headers={
+            'X-Generation-Time': metrics['generation_time'],
+            'X-Audio-Length': metrics['audio_length'],
+            'X-RTF': metrics['rtf'],
+            'X-Method-Used': metrics['method_used'],
+            'X-Voice': metrics['voice'],
+            'X-Sample-Rate': str(sample_rate),
+            'X-Audio-Format': audio_format,
+            'X-Trace-Id': trace.trace_id,
+            'Cache-Control': 'no-store',
+            'Vary': 'Accept'
+        }
+    )
+
+def stream_speech_response(data, on_complete, start_time=None):
+    """
+    Answer a streaming synthesis request, shared by the /synthesize/stream routes
+    
+    Args:
+        data: Request JSON (text, voice, method, format, cache); the format
+            falls back to ?format= and the Accept header
+        on_complete: Called with the metrics entry once the stream has finished
+        start_time: Request start, for TTFB (now if None)
+    
+    Returns:
+        Streaming audio response, or a JSON error and status code
+    """
+    start_time = start_time or time.time()
+    text = data.get('text', '')
+    voice = data.get('voice', 'af_heart')
+    method = data.get('method', 'auto')
+    audio_format = negotiate_format(data.get('format') or request.args.get('format'),
+                                    request.headers.get('Accept'))
+    
+    logger.info(f"🎵 Streaming TTS request: {len(text)} chars, voice={voice}, format={audio_format}")
+    
+    if not text.strip():
+        return jsonify({
+            'success': False,
+            'error': 'No text provided for synthesis'
+        }), 400
+    
+    try:
+        voice = blend_registry.normalize(voice)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid voice: {e}'}), 400
+    
+    if audio_format is None:
+        return jsonify({
+            'success': False,
+            'error': f"Unsupported stream format '{data.get('format') or request.args.get('format')}' "
+                     f"(use one of {', '.join(AUDIO_FORMATS)})"
+        }), 400
+    
+    stream_id = uuid.uuid4().hex[:8]
+    
+    stream_info = {}
+    
+    def on_stream_complete(metric_entry):
+        metric_entry['stream_id'] = stream_id
+        on_complete(metric_entry)
+    
+    trace = tracing.Trace('synthesize_stream', voice=voice, method=method, chars=len(text), format=audio_format)
+    chunks = stream_synthesis(text, voice, method, audio_format, start_time, on_stream_complete,
+                              data.get('cache', True), trace,
+                              on_start=lambda sample_rate: stream_info.update(sample_rate=sample_rate))
+    
+    # Produce the first segment before answering so failures still get a proper status
+    try:
+        first_chunk = next(chunks)
+    except Exception as e:
+        logger.error(f"❌ Streaming TTS failed: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'TTS generation failed: {str(e)}'
+        }), 500
+    
+    headers = {
+        'X-Stream-Id': stream_id,
+        'X-Trace-Id': trace.trace_id,
+        'X-Audio-Format': audio_format,
+        'X-Sample-Rate': str(stream_info['sample_rate']),
+        'X-Time-To-First-Byte': f'{time.time() - start_time:.3f}',
+        'Vary': 'Accept'
+    }
+    if audio_format in ('wav', 'pcm'):
+        headers['X-Sample-Format'] = 's16le'
+    
+    return Response(
+        itertools.chain([first_chunk], chunks),
+        content_type=AUDIO_FORMATS[audio_format],
+        headers=headers
+    )
+
+# Async job queue so long syntheses don't hold request threads; its workers
+# start with the first job submitted
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Get the synthesis job queue, starting its workers on first use"""
+    global _job_queue
+    
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = SynthesisJobQueue(
+                lambda payload: generate_speech(**payload),
+                on_complete=lambda job: emit_event('job_complete', _job_queue.describe(job)),
+                **JOB_QUEUE_CONFIG
+            )
+        return _job_queue
+
+def get_job_queue_stats():
+    """Get job queue statistics, None until the first job has been submitted"""
+    job_queue = _job_queue
+    return job_queue.get_stats() if job_queue is not None else None
+
 @app.route('/synthesize', methods=['POST'])
 def synthesize():
     """Real TTS synthesis endpoint - no demos or fallbacks"""
@@ -1426,73 +1845,22 @@ def synthesize():
                 'error': 'No text provided for synthesis'
             }), 400
         
-        start_time = time.time()
-        
-        # Use subprocess for clean synthesis (avoids import conflicts)
-        logger.info(f"🎵 Running real TTS synthesis in clean subprocess...")
-        synthesis_result = run_synthesis_subprocess(text, voice, method)
-        
-        if not synthesis_result['success']:
-            raise Exception(synthesis_result['error'])
-        
-        audio_data = synthesis_result['audio_data']
-        sample_rate = synthesis_result['sample_rate']
-        
-        # Audio data is already generated from subprocess
-        audio = audio_data
-        
-        # Save real audio to file
-        filename = f"real_speech_{uuid.uuid4().hex[:8]}.wav"
-        audio_dir = '/tmp'
-        audio_path = os.path.join(audio_dir, filename)
-        
-        # Write real WAV file
-        import wave
-        import numpy as np
-        with wave.open(audio_path, 'w') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-            # Convert float audio to int16 properly
-            audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
-            wav_file.writeframes(audio_int16.tobytes())
-        
-        generation_time = time.time() - start_time
-        audio_duration = len(audio) / sample_rate
-        rtf = generation_time / audio_duration
-        
-        # Store performance metrics
-        metric_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'method': method,
-            'voice': voice,
-            'text_length': len(text),
-            'generation_time': generation_time,
-            'audio_duration': audio_duration,
-            'rtf': rtf,
-            'sample_rate': sample_rate
-        }
-        performance_metrics.append(metric_entry)
-        
-        logger.info(f"✅ REAL SPEECH generated: {generation_time:.2f}s, RTF: {rtf:.3f}")
-        logger.info(f"🎵 Real speech file: {audio_path} ({os.path.getsize(audio_path)} bytes)")
+        try:
+            voice = blend_registry.normalize(voice)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Invalid voice: {e}'}), 400
         
-        # Emit performance update via WebSocket
-        socketio.emit('performance_update', metric_entry)
+        # Inline mode: the audio is the response body, nothing is written to disk
+        if data.get('inline', False) or (request.accept_mimetypes.best or '').startswith('audio/'):
+            audio_format = negotiate_format(data.get('format'), request.headers.get('Accept'))
+            if audio_format is None:
+                return jsonify({
+                    'success': False,
+                    'error': f"Unsupported audio format '{data.get('format')}' (use one of {', '.join(AUDIO_FORMATS)})"
+                }), 400
+            return inline_speech_response(text, voice, method, audio_format, data.get('cache', True))
         
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'metrics': {
-                'generation_time': f'{generation_time:.2f}',
-                'audio_length': f'{audio_duration:.2f}',
-                'rtf': f'{rtf:.3f}',
-                'method_used': 'Real Kokoro TTS',
-                'voice': voice,
-                'sample_rate': sample_rate
-            },
-            'message': f'Real speech generated successfully! 🎤✨'
-        })
+        return jsonify(generate_speech(text, voice, method, data.get('cache', True), data.get('debug', False)))
         
     except Exception as e:
         logger.error(f"❌ Real TTS failed: {e}")
@@ -1504,20 +1872,98 @@ def synthesize():
             'error': f'TTS generation failed: {str(e)}'
         }), 500
 
+@app.route('/synthesize/stream', methods=['POST'])
+def synthesize_stream():
+    """Streaming TTS endpoint - audio is sent segment by segment as it is generated"""
+    return stream_speech_response(request.get_json(), publish_performance)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a synthesis job and return its ID immediately"""
+    data = request.get_json()
+    text = data.get('text', '')
+    
+    if not text.strip():
+        return jsonify({
+            'success': False,
+            'error': 'No text provided for synthesis'
+        }), 400
+    
+    voice = data.get('voice', 'af_heart')
+    try:
+        voice = blend_registry.normalize(voice)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid voice: {e}'}), 400
+    
+    payload = {
+        'text': text,
+        'voice': voice,
+        'method': data.get('method', 'auto'),
+        'debug': bool(data.get('debug', False))
+    }
+    try:
+        priority = min(9, max(0, int(data.get('priority', 5))))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'priority must be an integer from 0 to 9'}), 400
+    
+    try:
+        job = get_job_queue().submit(payload, priority)
+    except QueueFullError as e:
+        logger.warning(f"⏳ Rejected synthesis job: {e}")
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    logger.info(f"📥 Queued synthesis job {job.id[:8]}: {len(text)} chars, priority={priority}")
+    return jsonify({'success': True, **get_job_queue().describe(job)}), 202
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Poll a synthesis job's status, queue position and result"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, **get_job_queue().describe(job)})
+
+@app.route('/voices/blends', methods=['GET', 'POST'])
+def voice_blends():
+    """List named voice blends, or register one from {name, spec}"""
+    if request.method == 'GET':
+        return jsonify({'success': True, 'blends': blend_registry.get_blends()})
+    
+    data = request.get_json()
+    try:
+        spec = blend_registry.register(
+            data.get('name', ''),
+            data.get('spec', ''),
+            reserved=[voice['id'] for voice in AVAILABLE_VOICES]
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, 'name': data['name'], 'spec': spec}), 201
+
 @app.route('/audio/<filename>')
 def serve_audio(filename):
     """Serve real generated audio files only"""
     try:
-        temp_dir = '/tmp'
-        audio_path = os.path.join(temp_dir, filename)
-        
-        if os.path.exists(audio_path):
-            logger.info(f"🎵 Serving real speech file: {filename}")
-            return send_file(audio_path, mimetype='audio/wav', as_attachment=False)
-        else:
+        entry = audio_store.get(filename)
+        if entry is None:
             logger.error(f"❌ Real audio file not found: {filename}")
             return jsonify({'error': 'Audio file not found'}), 404
-            
+        
+        logger.info(f"🎵 Serving real speech file: {filename}")
+        # Range requests, ETag/Last-Modified revalidation and 304s are handled by send_file
+        response = send_file(entry['path'], mimetype=entry['mimetype'], as_attachment=False,
+                             conditional=True, etag=entry['etag'], last_modified=entry['modified'])
+        # Filenames are content hashes, so the bytes behind a URL never change
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+    
+    except FileNotFoundError:
+        # Removed from disk outside the store
+        audio_store.discard(filename)
+        return jsonify({'error': 'Audio file not found'}), 404
     except Exception as e:
         logger.error(f"❌ Audio serving error: {e}")
         return jsonify({'error': f'Could not serve audio: {str(e)}'}), 500
@@ -1541,6 +1987,9 @@ def get_status():
             'npu': 'ready' if current_status['npu_available'] else 'offline',
             'mlir_aie': 'ready' if current_status['mlir_aie_ready'] else 'offline'
         },
+        'worker_pool': get_worker_pool_stats(),
+        'job_queue': get_job_queue_stats(),
+        'session_profile': get_session_profile_status(),
         'version': BRAND_CONFIG['version']
     })
 
@@ -1571,28 +2020,68 @@ def settings():
 
 @app.route('/logs')
 def get_logs():
-    """Get recent logs"""
-    return jsonify(list(log_buffer))
+    """Get recent logs (?since=<seq> for only newer ones, filtered by ?level=, ?module=, ?q=)"""
+    level = request.args.get('level', '').upper() or None
+    if level is not None and level not in LOG_LEVELS:
+        return jsonify({'success': False, 'error': f"Unknown log level (use one of {', '.join(LOG_LEVELS)})"}), 400
+    
+    return jsonify({
+        'success': True,
+        **log_pipeline.fetch(
+            request.args.get('since', type=int),
+            level,
+            request.args.get('module'),
+            request.args.get('q')
+        )
+    })
 
 @app.route('/metrics')
 def get_metrics():
-    """Get performance metrics"""
+    """Get performance metrics (?window=<seconds>&voice=&method= narrow the summary)"""
+    window = request.args.get('window')
+    try:
+        summary = performance_summary(
+            float(window) if window is not None else None,
+            request.args.get('voice'),
+            request.args.get('method')
+        )
+    except ValueError:
+        return jsonify({'success': False, 'error': 'window must be a positive number of seconds'}), 400
+    
     return jsonify({
         'recent': list(performance_metrics)[-20:],  # Last 20 entries
-        'summary': {
-            'total_generations': len(performance_metrics),
-            'avg_rtf': sum(m['rtf'] for m in performance_metrics) / len(performance_metrics) if performance_metrics else 0,
-            'avg_time': sum(m['generation_time'] for m in performance_metrics) / len(performance_metrics) if performance_metrics else 0,
-            'methods_used': list(set(m['method'] for m in performance_metrics))
-        }
+        'summary': summary,
+        'cache': synthesis_cache.get_stats()
     })
 
+@app.route('/metrics/prometheus')
+def get_prometheus_metrics():
+    """Prometheus text-exposition metrics"""
+    return Response(prometheus_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/traces')
+def get_recent_traces():
+    """List recent request traces, newest first"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'success': True, 'traces': tracing.get_traces(limit)})
+
+@app.route('/traces/<trace_id>')
+def get_trace_timeline(trace_id):
+    """Get the stage timeline of one request"""
+    trace = tracing.get_trace(trace_id)
+    if trace is None:
+        return jsonify({'success': False, 'error': 'Unknown trace'}), 404
+    return jsonify({'success': True, 'trace': trace})
+
 @app.route('/system')
 def get_system():
     """Get system information"""
     return jsonify({
         **get_system_info(),
-        **detect_system_status()
+        **detect_system_status(),
+        'audio_store': audio_store.get_stats(),
+        'status_probes': status_collector.describe(),
+        'log_pipeline': log_pipeline.get_stats()
     })
 
 # WebSocket handlers
@@ -1600,33 +2089,86 @@ def get_system():
 def handle_connect():
     """Client connected"""
     logger.info("🔌 Client connected to WebSocket")
-    emit('log_buffer', list(log_buffer))
+    log_client_levels[request.sid] = 'DEBUG'
+    join_room('logs:DEBUG')
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Client disconnected"""
+    log_client_levels.pop(request.sid, None)
     logger.info("🔌 Client disconnected from WebSocket")
 
 @socketio.on('request_logs')
-def handle_log_request():
-    """Send log buffer to client"""
-    emit('log_buffer', list(log_buffer))
-
-# Background task to stream logs
-def log_streamer():
-    """Stream logs to connected clients"""
-    while True:
-        try:
-            log_entry = log_queue.get(timeout=1)
-            socketio.emit('new_log', log_entry)
-        except queue.Empty:
-            continue
-        except Exception as e:
-            logger.error(f"Log streaming error: {e}")
-
-# Start log streaming thread
-log_thread = threading.Thread(target=log_streamer, daemon=True)
-log_thread.start()
+def handle_log_request(data=None):
+    """Send log buffer to client, or with {since: <seq>} only newer entries (module/q filter them)"""
+    data = data or {}
+    try:
+        since = int(data['since']) if data.get('since') is not None else None
+    except (TypeError, ValueError):
+        since = None    # an unreadable cursor gets the whole buffer, like /logs
+    result = log_pipeline.fetch(since, log_client_levels.get(request.sid), data.get('module'), data.get('q'))
+    if since is None or result['truncated']:
+        emit('log_buffer', result['logs'])
+    else:
+        emit('log_batch', {'logs': result['logs'], 'cursor': result['cursor'],
+                           'dropped': log_pipeline.get_stats()['dropped']})
+
+@socketio.on('set_log_level')
+def handle_set_log_level(data):
+    """Only stream entries at or above a level to this client, resending the buffer"""
+    level = str((data or {}).get('level', 'DEBUG')).upper()
+    if level not in LOG_LEVELS:
+        level = 'DEBUG'
+    leave_room(f"logs:{log_client_levels.get(request.sid, 'DEBUG')}")
+    join_room(f'logs:{level}')
+    log_client_levels[request.sid] = level
+    emit('log_buffer', log_pipeline.entries(level))
+
+def emit_log_batch(batch):
+    """Send a batch of log entries to each level's room, filtered to that level"""
+    dropped = log_pipeline.get_stats()['dropped']
+    for level in LOG_LEVELS:
+        entries = filter_level(batch, level)
+        if not entries:
+            break   # higher levels only get a subset
+        emit_event('log_batch', {'logs': entries, 'cursor': batch[-1]['seq'], 'dropped': dropped},
+                   to=f'logs:{level}')
+
+# Background services start when an app is served rather than on import, so
+# the enhanced app can import this module without a second set of threads
+_services_started = False
+_services_lock = threading.Lock()
+
+def start_background_services(app_socketio=None):
+    """
+    Start the status probes, audio store sweeper and log streaming (once per process)
+    
+    Args:
+        app_socketio: Socket of the app being served, which gets events and
+            log batches (this module's if None)
+    """
+    global _services_started, _event_socketio
+    
+    if _services_started:
+        return
+    with _services_lock:
+        if _services_started:
+            return
+        if app_socketio is not None:
+            _event_socketio = app_socketio
+        status_collector.start()
+        atexit.register(status_collector.stop)
+        audio_store.start()
+        atexit.register(audio_store.stop)
+        log_pipeline.add_sink(emit_log_batch)
+        log_pipeline.start()
+        atexit.register(log_pipeline.stop)
+        _services_started = True
+
+@app.before_request
+def ensure_background_services():
+    """Start the background services on the first request when not run as a script"""
+    start_background_services(socketio)
 
 if __name__ == '__main__':
     logger.info("🦄✨ Starting Magic Unicorn TTS Web Interface ✨🦄")
@@ -1634,6 +2176,11 @@ if __name__ == '__main__':
     logger.info(f"🎨 Branded experience: {BRAND_CONFIG['title']}")
     logger.info("🚀 NPU-Ready with VitisAI integration!")
     
+    start_background_services(socketio)
+    
+    # Load the model into the worker pool before taking requests
+    get_worker_pool()
+    
     socketio.run(
         app,
         host='0.0.0.0',